@@ -1,10 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from src.shared.database.connection import init_db
+from src.shared.database.connection import SessionLocal, init_db
 from src.shared.config.settings import get_settings
 from src.modules.users.user_routes import router as user_router
 from src.modules.rooms.room_routes import router as room_router
 from src.modules.reservations.reservation_routes import router as reservation_router
+from src.modules.reservations.interval_index import get_interval_index
+from src.modules.rooms.availability_stream import register_availability_stream
+from src.modules.reports.report_routes import router as report_router
+from src.modules.admin.admin_routes import router as admin_router
 
 # Configuración
 settings = get_settings()
@@ -22,6 +26,8 @@ app = FastAPI(
     * **Salas**: CRUD completo de salas con control de estado
     * **Reservas**: Creación de reservas con validación de solapamiento
     * **Caché**: Sistema de caché para consultas de disponibilidad
+    * **Reportes**: Utilización de las salas por sala, día de la semana y hora
+    * **Administración**: Métricas del caché (JSON y Prometheus)
     
     ## Reglas de Negocio
     
@@ -47,24 +53,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],  # legibles desde el navegador
 )
 
 # Registrar routers (endpoints)
 app.include_router(user_router)
 app.include_router(room_router)
 app.include_router(reservation_router)
+app.include_router(report_router)
+app.include_router(admin_router)
 
 
 @app.on_event("startup")
 def on_startup():
     """
     Se ejecuta al iniciar la aplicación.
-    Crea las tablas en la base de datos si no existen.
+    Crea las tablas en la base de datos si no existen, engancha la
+    publicación de reservas para los streams de disponibilidad y, si está
+    activado, carga el índice de reservas en memoria.
     """
     print(f"🚀 Iniciando {settings.app_name} v{settings.app_version}")
     print("📊 Inicializando base de datos...")
     init_db()
     print("✅ Base de datos inicializada correctamente")
+    register_availability_stream()
+    if settings.reservation_index_enabled:
+        with SessionLocal() as db:
+            get_interval_index().load(db)
+        print("🗂️  Índice de reservas cargado en memoria")
     print(f"📡 Documentación disponible en: http://localhost:8000/docs")
 
 
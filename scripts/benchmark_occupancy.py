@@ -0,0 +1,145 @@
+"""
+Benchmark de la detección de solapamientos.
+
+Compara, sobre una base de datos SQLite en memoria con una sala llena de
+reservas, el método anterior (cargar las reservas del día como objetos del
+ORM y recorrerlas en Python) con el bitmap de ocupación (un SELECT de un
+entero y un AND). Mide también el cálculo de huecos libres.
+
+Además verifica la corrección: ambos métodos dan el mismo resultado para
+todas las consultas.
+
+Uso:
+    python scripts/benchmark_occupancy.py
+    python scripts/benchmark_occupancy.py --days 60 --queries 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from src.modules.reservations.occupancy_model import free_hours  # noqa: E402
+from src.modules.reservations.reservation_model import Reservation  # noqa: E402
+from src.modules.reservations.reservation_repository import (  # noqa: E402
+    ReservationRepository,
+)
+from src.modules.rooms.room_model import Room  # noqa: E402
+from src.modules.users.user_model import User  # noqa: E402
+from src.shared.database.connection import Base  # noqa: E402
+
+FIRST_DAY = date(2025, 1, 1)
+
+
+def loop_overlap(db, room_id, day, start_hour, end_hour) -> bool:
+    """Método anterior: recorrer las reservas del día."""
+    reservations = (
+        db.query(Reservation)
+        .filter(Reservation.room_id == room_id, Reservation.date == day)
+        .all()
+    )
+    for res in reservations:
+        if start_hour < res.end_hour and res.start_hour < end_hour:
+            return True
+    return False
+
+
+def loop_free_slots(db, room_id, day) -> list:
+    """Método anterior: construir un set con las horas ocupadas."""
+    reservations = (
+        db.query(Reservation)
+        .filter(Reservation.room_id == room_id, Reservation.date == day)
+        .all()
+    )
+    occupied_hours = set()
+    for reservation in reservations:
+        for hour in range(reservation.start_hour, reservation.end_hour):
+            occupied_hours.add(hour)
+    return sorted(set(range(8, 20)) - occupied_hours)
+
+
+def populate(db, days: int) -> int:
+    """Crea una sala con reservas de 1 hora en horas alternas de cada día."""
+    user = User(nombre="Bench", email="bench@example.com")
+    room = Room(nombre="Sala Bench", capacidad=10, ubicacion="Piso 0")
+    db.add_all([user, room])
+    db.commit()
+
+    repository = ReservationRepository(db)
+    for offset in range(days):
+        day = FIRST_DAY + timedelta(days=offset)
+        for hour in range(0, 24, 2):
+            repository.create(user.id, room.id, day, hour, hour + 1)
+    return room.id
+
+
+def timed(fn, queries) -> tuple:
+    """Ejecuta fn sobre cada consulta; retorna (resultados, consultas/s)."""
+    began = time.perf_counter()
+    results = [fn(*query) for query in queries]
+    return results, len(queries) / (time.perf_counter() - began)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=5000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    room_id = populate(db, args.days)
+    repository = ReservationRepository(db)
+
+    rng = random.Random(42)
+    overlap_queries = []
+    for _ in range(args.queries):
+        day = FIRST_DAY + timedelta(days=rng.randrange(args.days))
+        start_hour = rng.randrange(0, 23)
+        overlap_queries.append(
+            (room_id, day, start_hour, rng.randrange(start_hour + 1, 24))
+        )
+    day_queries = [(room_id, day) for room_id, day, _, _ in overlap_queries]
+
+    def bitmap_free_slots(room_id, day):
+        return free_hours(repository.get_occupancy_mask(room_id, day))
+
+    rows = [
+        (
+            "solapamiento",
+            lambda *q: loop_overlap(db, *q),
+            repository.check_overlap,
+            overlap_queries,
+        ),
+        (
+            "huecos libres",
+            lambda *q: loop_free_slots(db, *q),
+            bitmap_free_slots,
+            day_queries,
+        ),
+    ]
+
+    print(
+        f"{'consulta':>14} | {'bucle (q/s)':>12} | {'bitmap (q/s)':>13} | {'mejora':>7}"
+    )
+    print("-" * 56)
+    for name, loop_fn, bitmap_fn, queries in rows:
+        expected, loop_qps = timed(loop_fn, queries)
+        results, bitmap_qps = timed(bitmap_fn, queries)
+        assert results == expected, f"{name}: los métodos no coinciden"
+        print(
+            f"{name:>14} | {loop_qps:>12,.0f} | {bitmap_qps:>13,.0f} | "
+            f"{bitmap_qps / loop_qps:>6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
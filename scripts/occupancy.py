@@ -0,0 +1,59 @@
+"""
+Verifica o reconstruye la tabla de ocupación (room_day_occupancy).
+
+La tabla se mantiene en la misma transacción que cada reserva, pero una
+carga manual de datos o una escritura fuera de ReservationRepository puede
+desincronizarla. Este comando la compara con `reservations` y, si se pide,
+la reconstruye desde cero.
+
+Uso:
+    python scripts/occupancy.py verify    # sale con código 1 si hay diferencias
+    python scripts/occupancy.py rebuild
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.reservations.reservation_repository import (  # noqa: E402
+    ReservationRepository,
+)
+from src.modules.rooms.room_model import Room  # noqa: E402,F401
+from src.modules.users.user_model import User  # noqa: E402,F401
+from src.shared.database.connection import Base, SessionLocal, engine  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    with SessionLocal() as db:
+        repository = ReservationRepository(db)
+
+        if args.command == "rebuild":
+            rows = repository.rebuild_occupancy()
+            print(f"✅ Ocupación reconstruida: {rows} día(s) con reservas")
+            return 0
+
+        mismatches = repository.verify_occupancy()
+        if not mismatches:
+            print("✅ La ocupación coincide con las reservas")
+            return 0
+
+        print(f"❌ {len(mismatches)} día(s) no coinciden:")
+        for (room_id, day), (stored, expected) in sorted(mismatches.items()):
+            print(
+                f"  sala {room_id} {day}: "
+                f"guardado {stored:024b}, esperado {expected:024b}"
+            )
+        print("Ejecuta `python scripts/occupancy.py rebuild` para repararlo")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
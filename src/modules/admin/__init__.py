@@ -0,0 +1 @@
+# Módulo de administración
@@ -0,0 +1,52 @@
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+# Schemas de salida
+
+
+class CacheStatsResponse(BaseModel):
+    """Esquema de respuesta con las métricas del caché."""
+
+    backend: str
+    entries: Optional[int]
+    bytes: Optional[int]
+    namespaces: Dict[str, dict]
+    tiers: Optional[Dict[str, Dict[str, int]]] = None
+
+
+# Controlador
+
+
+class AdminController:
+    """
+    Controlador de Administración.
+
+    Expone información operativa (por ahora, métricas del caché).
+    """
+
+    def __init__(self, cache):
+        """
+        Args:
+            cache: Instancia del servicio de caché (cualquier backend)
+        """
+        self.cache = cache
+
+    def get_cache_stats(self) -> CacheStatsResponse:
+        """Retorna contadores, latencias y tamaño del caché en JSON."""
+        size = self.cache.size_snapshot()
+        stats = getattr(self.cache, "stats", None)
+        return CacheStatsResponse(
+            backend=type(self.cache).__name__,
+            entries=size["entries"],
+            bytes=size["bytes"],
+            namespaces=self.cache.metrics.snapshot(),
+            tiers=stats() if stats is not None else None,
+        )
+
+    def get_cache_metrics(self) -> str:
+        """Retorna las métricas del caché en formato de texto Prometheus."""
+        size = self.cache.size_snapshot()
+        return self.cache.metrics.to_prometheus(
+            size=size["entries"], size_bytes=size["bytes"]
+        )
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from src.modules.admin.admin_controller import AdminController, CacheStatsResponse
+from src.shared.cache.cache_service import get_cache
+
+# Router de administración
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def get_controller() -> AdminController:
+    """Inyección de dependencias para el controlador."""
+    return AdminController(get_cache())
+
+
+@router.get("/cache/stats", response_model=CacheStatsResponse)
+def get_cache_stats(controller: AdminController = Depends(get_controller)):
+    """
+    Métricas del caché por namespace (prefijo de la clave).
+
+    - **hits / misses / expirations / evictions / sets**: contadores
+    - **latency**: histogramas de get y set (segundos)
+    - **entries / bytes**: tamaño actual (null en Redis)
+    """
+    return controller.get_cache_stats()
+
+
+@router.get("/cache/metrics", response_class=PlainTextResponse)
+def get_cache_metrics(controller: AdminController = Depends(get_controller)):
+    """
+    Las mismas métricas en formato de texto Prometheus.
+    """
+    return controller.get_cache_metrics()
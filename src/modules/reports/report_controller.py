@@ -0,0 +1,79 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+# Schemas de salida
+
+
+class RoomUtilization(BaseModel):
+    """Utilización de una sala en el rango."""
+
+    roomId: int
+    nombre: str
+    reservedHours: int
+    utilization: float = Field(..., description="% del horario de apertura")
+
+
+class WeekdayUtilization(BaseModel):
+    """Utilización por día de la semana (0 = lunes)."""
+
+    weekday: int
+    utilization: float
+
+
+class HourUtilization(BaseModel):
+    """Porcentaje de salas-día ocupadas en una hora."""
+
+    hour: int
+    utilization: float
+
+
+class UtilizationReportResponse(BaseModel):
+    """Esquema de respuesta del reporte de utilización."""
+
+    from_: str = Field(..., alias="from")
+    to: str
+    reservedHours: int
+    utilization: float
+    rooms: List[RoomUtilization]
+    byWeekday: List[WeekdayUtilization]
+    byHour: List[HourUtilization]
+    peakHours: List[int]
+
+    model_config = {"populate_by_name": True}
+
+
+# Controller
+
+
+class ReportController:
+    """
+    Controlador de Reportes.
+
+    Maneja las peticiones HTTP de los reportes de ocupación.
+    """
+
+    def __init__(self, service):
+        """
+        Args:
+            service: Instancia de ReportService
+        """
+        self.service = service
+
+    def get_utilization(
+        self, date_from: str, date_to: str, room_id: Optional[int] = None
+    ) -> UtilizationReportResponse:
+        """Reporte de utilización en un rango de fechas."""
+        report = self.service.get_utilization(
+            self._parse_date(date_from), self._parse_date(date_to), room_id
+        )
+        return UtilizationReportResponse(**report)
+
+    @staticmethod
+    def _parse_date(value: str) -> date:
+        """Convierte una fecha YYYY-MM-DD en date."""
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValueError("Formato de fecha inválido. Use YYYY-MM-DD")
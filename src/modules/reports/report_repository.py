@@ -0,0 +1,73 @@
+from datetime import date
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.modules.reservations.reservation_model import Reservation
+from src.modules.rooms.room_model import Room
+
+
+class ReportRepository:
+    """
+    Repositorio de Reportes.
+
+    Consultas de solo lectura para los reportes. Devuelve tuplas planas (no
+    objetos del ORM) para poder recorrer meses de reservas sin coste por fila.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Args:
+            db: Sesión de SQLAlchemy
+        """
+        self.db = db
+
+    def get_rooms(self, room_id: Optional[int] = None) -> List[Tuple[int, str]]:
+        """
+        Retorna las salas del reporte.
+
+        Args:
+            room_id: Limitar a una sala (None = todas)
+
+        Returns:
+            Lista de tuplas (id, nombre) ordenadas por ID
+        """
+        query = select(Room.id, Room.nombre).order_by(Room.id)
+        if room_id is not None:
+            query = query.where(Room.id == room_id)
+        return [tuple(row) for row in self.db.execute(query)]
+
+    def iter_reservation_chunks(
+        self,
+        date_from: date,
+        date_to: date,
+        room_id: Optional[int] = None,
+        chunk_size: int = 5000,
+    ) -> Iterator[Sequence[Tuple[int, date, int, int]]]:
+        """
+        Recorre las reservas de un rango en bloques de tuplas.
+
+        Usa yield_per para que el driver no cargue todo el resultado de golpe.
+
+        Args:
+            date_from: Primera fecha (incluida)
+            date_to: Última fecha (incluida)
+            room_id: Limitar a una sala (None = todas)
+            chunk_size: Filas por bloque
+
+        Yields:
+            Listas de tuplas (room_id, date, start_hour, end_hour)
+        """
+        query = select(
+            Reservation.room_id,
+            Reservation.date,
+            Reservation.start_hour,
+            Reservation.end_hour,
+        ).where(Reservation.date >= date_from, Reservation.date <= date_to)
+        if room_id is not None:
+            query = query.where(Reservation.room_id == room_id)
+
+        result = self.db.execute(query.execution_options(yield_per=chunk_size))
+        for partition in result.partitions():
+            yield partition
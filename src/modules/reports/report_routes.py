@@ -0,0 +1,48 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from src.modules.reports.report_controller import (
+    ReportController,
+    UtilizationReportResponse,
+)
+from src.modules.reports.report_service import ReportService
+from src.shared.database.connection import get_db
+
+# Router de reportes
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+
+def get_controller(db: Session = Depends(get_db)) -> ReportController:
+    """Inyección de dependencias para el controlador."""
+    service = ReportService(db)
+    return ReportController(service)
+
+
+@router.get("/utilization", response_model=UtilizationReportResponse)
+def get_utilization_report(
+    date_from: str = Query(
+        ..., alias="from", description="Fecha inicial en formato YYYY-MM-DD"
+    ),
+    date_to: str = Query(
+        ..., alias="to", description="Fecha final (incluida) en formato YYYY-MM-DD"
+    ),
+    roomId: Optional[int] = Query(None, description="Limitar a una sala"),
+    controller: ReportController = Depends(get_controller),
+):
+    """
+    Reporte de utilización de las salas en un rango de fechas.
+
+    - **utilization**: % de horas reservadas sobre el horario de apertura (8 a 20)
+    - **rooms**: horas reservadas y utilización por sala
+    - **byWeekday**: utilización por día de la semana (0 = lunes)
+    - **byHour**: % de salas-día ocupadas en cada hora
+    - **peakHours**: las horas con más ocupación
+
+    Máximo 366 días por reporte.
+    """
+    try:
+        return controller.get_utilization(date_from, date_to, roomId)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
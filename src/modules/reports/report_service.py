@@ -0,0 +1,174 @@
+from datetime import date
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from src.modules.reports.report_repository import ReportRepository
+from src.modules.reservations.occupancy_model import CLOSING_HOUR, OPENING_HOUR
+
+# Máximo de días por reporte (el tensor ocupa salas × días × 24 bytes)
+MAX_REPORT_DAYS = 366
+
+# Número de horas pico que se devuelven
+PEAK_HOURS = 3
+
+
+class ReportService:
+    """
+    Servicio de Reportes.
+
+    Calcula la utilización de las salas construyendo un tensor de ocupación
+    salas × días × 24 horas con NumPy: cada reserva suma +1 en su hora de
+    inicio y -1 en la de fin, y una suma acumulada a lo largo de las horas
+    marca las horas ocupadas. Todos los agregados salen de ese tensor sin
+    bucles en Python.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Args:
+            db: Sesión de SQLAlchemy
+        """
+        self.repository = ReportRepository(db)
+
+    def get_utilization(
+        self, date_from: date, date_to: date, room_id: Optional[int] = None
+    ) -> dict:
+        """
+        Reporte de utilización en un rango de fechas.
+
+        La utilización es el porcentaje de horas reservadas sobre las horas
+        de apertura (de OPENING_HOUR a CLOSING_HOUR); `byHour` usa como base
+        todas las salas-día del rango.
+
+        Args:
+            date_from: Primera fecha (incluida)
+            date_to: Última fecha (incluida)
+            room_id: Limitar a una sala (None = todas)
+
+        Returns:
+            Dict con from, to, reservedHours, utilization, rooms, byWeekday,
+            byHour y peakHours
+
+        Raises:
+            ValueError: Si el rango no es válido o la sala no existe
+        """
+        if date_from > date_to:
+            raise ValueError("La fecha inicial debe ser anterior o igual a la final")
+
+        total_days = (date_to - date_from).days + 1
+        if total_days > MAX_REPORT_DAYS:
+            raise ValueError(f"El rango no puede superar {MAX_REPORT_DAYS} días")
+
+        rooms = self.repository.get_rooms(room_id)
+        if room_id is not None and not rooms:
+            raise ValueError(f"No se encontró la sala con ID {room_id}")
+
+        occupied = self._build_occupancy(rooms, date_from, date_to, room_id)
+        return self._aggregate(occupied, rooms, date_from, date_to)
+
+    def _build_occupancy(
+        self, rooms: list, date_from: date, date_to: date, room_id: Optional[int]
+    ) -> np.ndarray:
+        """
+        Construye el tensor booleano salas × días × 24 de horas ocupadas.
+
+        Las reservas llegan en bloques de tuplas; cada bloque se vuelca en
+        arrays y se acumula con np.add.at (sin recorrer filas en Python).
+        """
+        total_days = (date_to - date_from).days + 1
+        room_ids = np.array([rid for rid, _ in rooms], dtype=np.int64)
+
+        # 25 posiciones: el -1 de una reserva que acaba a las 24 cae en la última
+        deltas = np.zeros((len(rooms), total_days, 25), dtype=np.int32)
+        first_day = date_from.toordinal()
+
+        for chunk in self.repository.iter_reservation_chunks(
+            date_from, date_to, room_id
+        ):
+            rows = np.array(
+                [(rid, day.toordinal(), start, end) for rid, day, start, end in chunk],
+                dtype=np.int64,
+            ).reshape(-1, 4)
+
+            # Posición de cada sala en el tensor (las salas que ya no existen
+            # se descartan)
+            rooms_idx = np.searchsorted(room_ids, rows[:, 0])
+            known = rooms_idx < len(room_ids)
+            known[known] = room_ids[rooms_idx[known]] == rows[known, 0]
+            rows, rooms_idx = rows[known], rooms_idx[known]
+            days_idx = rows[:, 1] - first_day
+
+            np.add.at(deltas, (rooms_idx, days_idx, rows[:, 2]), 1)
+            np.add.at(deltas, (rooms_idx, days_idx, rows[:, 3]), -1)
+
+        return np.cumsum(deltas, axis=2)[:, :, :24] > 0
+
+    @staticmethod
+    def _aggregate(
+        occupied: np.ndarray, rooms: list, date_from: date, date_to: date
+    ) -> dict:
+        """Calcula los agregados del reporte a partir del tensor de ocupación."""
+        total_rooms, total_days, _ = occupied.shape
+        opening = occupied[:, :, OPENING_HOUR:CLOSING_HOUR]
+        open_hours_per_day = CLOSING_HOUR - OPENING_HOUR
+
+        def percent(part, whole):
+            return np.round(100.0 * part / np.maximum(whole, 1), 2)
+
+        # Por sala: horas reservadas (todo el día) y % sobre el horario de apertura
+        reserved_by_room = occupied.sum(axis=(1, 2))
+        open_by_room = opening.sum(axis=(1, 2))
+        room_utilization = percent(open_by_room, total_days * open_hours_per_day)
+
+        # Por día de la semana (0 = lunes)
+        weekdays = (date_from.weekday() + np.arange(total_days)) % 7
+        open_by_day = opening.sum(axis=(0, 2))
+        open_by_weekday = np.bincount(weekdays, weights=open_by_day, minlength=7)
+        days_per_weekday = np.bincount(weekdays, minlength=7)
+        weekday_utilization = percent(
+            open_by_weekday, days_per_weekday * total_rooms * open_hours_per_day
+        )
+
+        # Por hora: % de salas-día con esa hora ocupada
+        by_hour = occupied.sum(axis=(0, 1))
+        hour_utilization = percent(by_hour, total_rooms * total_days)
+
+        # Horas pico: las más ocupadas (solo si tienen alguna reserva)
+        ranking = np.argsort(-by_hour, kind="stable")[:PEAK_HOURS]
+        peak_hours = [int(hour) for hour in ranking if by_hour[hour] > 0]
+
+        return {
+            "from": str(date_from),
+            "to": str(date_to),
+            "reservedHours": int(reserved_by_room.sum()),
+            "utilization": float(
+                percent(
+                    open_by_room.sum(),
+                    total_rooms * total_days * open_hours_per_day,
+                )
+            ),
+            "rooms": [
+                {
+                    "roomId": rid,
+                    "nombre": nombre,
+                    "reservedHours": int(reserved_by_room[i]),
+                    "utilization": float(room_utilization[i]),
+                }
+                for i, (rid, nombre) in enumerate(rooms)
+            ],
+            "byWeekday": [
+                {
+                    "weekday": weekday,
+                    "utilization": float(weekday_utilization[weekday]),
+                }
+                for weekday in range(7)
+                if days_per_weekday[weekday]
+            ],
+            "byHour": [
+                {"hour": hour, "utilization": float(hour_utilization[hour])}
+                for hour in range(24)
+            ],
+            "peakHours": peak_hours,
+        }
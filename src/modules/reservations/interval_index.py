@@ -0,0 +1,250 @@
+import bisect
+import threading
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from src.modules.reservations.occupancy_model import CLOSING_HOUR, OPENING_HOUR
+from src.modules.reservations.reservation_model import Reservation
+
+# Clave en session.info donde se acumulan las reservas nuevas hasta el commit
+_PENDING_KEY = "interval_index"
+
+
+def _to_hour(day: date, hour: int) -> int:
+    """Hora absoluta (horas desde el día 1 del calendario)."""
+    return day.toordinal() * 24 + hour
+
+
+def _from_hour(absolute: int) -> Tuple[date, int]:
+    """Convierte una hora absoluta en (fecha, hora del día)."""
+    return date.fromordinal(absolute // 24), absolute % 24
+
+
+class _RoomIntervals:
+    """
+    Reservas de una sala como dos listas ordenadas de horas absolutas.
+
+    Las reservas de una sala no se solapan, así que ordenar por inicio
+    ordena también por fin: starts[i] y ends[i] son la misma reserva.
+    """
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+
+    def add(self, start: int, end: int) -> None:
+        position = bisect.bisect_left(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """Si [start, end) se cruza con alguna reserva (un bisect)."""
+        position = bisect.bisect_right(self.ends, start)
+        return position < len(self.starts) and self.starts[position] < end
+
+    def first_gap(self, after: int, hours: int) -> int:
+        """
+        Primera hora >= after desde la que hay `hours` horas libres seguidas
+        dentro del horario de un mismo día.
+
+        Cada paso hace un bisect y salta o bien una reserva o bien el resto
+        de un día, así que el coste es O(log n) más las reservas que se
+        interponen.
+        """
+        candidate = after
+        while True:
+            day, hour = _from_hour(candidate)
+            if hour < OPENING_HOUR:
+                candidate = _to_hour(day, OPENING_HOUR)
+            elif hour + hours > CLOSING_HOUR:
+                candidate = _to_hour(day + timedelta(days=1), OPENING_HOUR)
+                continue
+
+            # Primera reserva que termina después del candidato
+            position = bisect.bisect_right(self.ends, candidate)
+            if (
+                position == len(self.starts)
+                or self.starts[position] >= candidate + hours
+            ):
+                return candidate
+            candidate = self.ends[position]
+
+
+class IntervalIndex:
+    """
+    Índice en memoria de las reservas de cada sala.
+
+    Responde "primer hueco de al menos K horas seguidas desde una fecha"
+    con búsquedas binarias sobre las reservas ordenadas de la sala, en vez
+    de recorrer la disponibilidad día a día.
+
+    Se carga de `reservations` la primera vez que se usa y se mantiene al
+    día con las reservas confirmadas en este proceso (eventos del ORM, tras
+    el commit). Las reservas hechas por otros procesos no se ven: por eso
+    cada resultado se comprueba contra la BD (ver
+    ReservationService.find_next_available) y, si no cuadra, se recarga la
+    sala.
+
+    Uso:
+        index = get_interval_index()
+        index.ensure_loaded(db)
+        room_date_hour = index.next_available(5, date(2025, 2, 19), 2)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rooms: Dict[int, _RoomIntervals] = {}
+        self._loaded = False
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def ensure_loaded(self, db: Session) -> None:
+        """Carga todas las reservas si el índice aún no se cargó."""
+        if not self._loaded:
+            self.load(db)
+
+    def load(self, db: Session, room_id: Optional[int] = None) -> None:
+        """
+        (Re)carga el índice desde la BD.
+
+        Args:
+            db: Sesión de SQLAlchemy
+            room_id: Recargar solo esta sala (None = todas)
+        """
+        query = select(
+            Reservation.room_id,
+            Reservation.date,
+            Reservation.start_hour,
+            Reservation.end_hour,
+        ).order_by(Reservation.room_id, Reservation.date, Reservation.start_hour)
+        if room_id is not None:
+            query = query.where(Reservation.room_id == room_id)
+
+        rooms: Dict[int, _RoomIntervals] = {}
+        for rid, day, start_hour, end_hour in db.execute(query):
+            intervals = rooms.get(rid)
+            if intervals is None:
+                intervals = rooms[rid] = _RoomIntervals()
+            # Ya vienen ordenadas: añadir al final
+            intervals.starts.append(_to_hour(day, start_hour))
+            intervals.ends.append(_to_hour(day, end_hour))
+
+        with self._lock:
+            if room_id is None:
+                self._rooms = rooms
+                self._loaded = True
+            else:
+                self._rooms[room_id] = rooms.get(room_id, _RoomIntervals())
+
+    def add(self, room_id: int, day: date, start_hour: int, end_hour: int) -> None:
+        """Añade una reserva confirmada."""
+        with self._lock:
+            intervals = self._rooms.get(room_id)
+            if intervals is None:
+                intervals = self._rooms[room_id] = _RoomIntervals()
+            intervals.add(_to_hour(day, start_hour), _to_hour(day, end_hour))
+
+    def overlaps(self, room_id: int, day: date, start_hour: int, end_hour: int) -> bool:
+        """
+        Indica si el índice ya conoce una reserva que se cruza con el horario.
+
+        Un True es definitivo (las reservas no se borran); un False no, porque
+        el índice puede no ver reservas recientes de otros procesos.
+
+        Args:
+            room_id: ID de la sala
+            day: Fecha
+            start_hour: Hora de inicio
+            end_hour: Hora de fin
+
+        Returns:
+            True si hay solapamiento con una reserva conocida
+        """
+        with self._lock:
+            intervals = self._rooms.get(room_id)
+            return intervals is not None and intervals.overlaps(
+                _to_hour(day, start_hour), _to_hour(day, end_hour)
+            )
+
+    def next_available(
+        self, room_id: int, from_date: date, hours: int
+    ) -> Tuple[date, int]:
+        """
+        Primer hueco de `hours` horas seguidas de una sala desde una fecha.
+
+        Args:
+            room_id: ID de la sala
+            from_date: Primera fecha a considerar (incluida)
+            hours: Horas seguidas necesarias (como mucho el horario de un día)
+
+        Returns:
+            Tupla (fecha, hora de inicio)
+
+        Raises:
+            ValueError: Si `hours` no cabe en el horario de un día
+        """
+        if not 1 <= hours <= CLOSING_HOUR - OPENING_HOUR:
+            raise ValueError(
+                f"Las horas deben estar entre 1 y {CLOSING_HOUR - OPENING_HOUR}"
+            )
+
+        with self._lock:
+            intervals = self._rooms.get(room_id) or _RoomIntervals()
+            start = intervals.first_gap(_to_hour(from_date, OPENING_HOUR), hours)
+        return _from_hour(start)
+
+    def clear(self) -> None:
+        """Vacía el índice (se recargará en el próximo uso)."""
+        with self._lock:
+            self._rooms = {}
+            self._loaded = False
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    """Anota las reservas insertadas en el flush."""
+    for obj in session.new:
+        if isinstance(obj, Reservation):
+            session.info.setdefault(_PENDING_KEY, []).append(
+                (obj.room_id, obj.date, obj.start_hour, obj.end_hour)
+            )
+
+
+def _after_commit(session: Session) -> None:
+    """Pasa al índice las reservas solo cuando el commit tuvo éxito."""
+    for reservation in session.info.pop(_PENDING_KEY, ()):
+        if _index is not None and _index.loaded:
+            _index.add(*reservation)
+
+
+def _after_rollback(session: Session) -> None:
+    """Descarta las reservas de una transacción que no se confirmó."""
+    session.info.pop(_PENDING_KEY, None)
+
+
+# Instancia global
+_index: Optional[IntervalIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_interval_index() -> IntervalIndex:
+    """
+    Retorna la instancia global del índice de intervalos.
+
+    La primera llamada engancha los eventos del ORM que lo mantienen al día.
+
+    Returns:
+        Instancia singleton del índice
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = IntervalIndex()
+            event.listen(Session, "after_flush", _after_flush)
+            event.listen(Session, "after_commit", _after_commit)
+            event.listen(Session, "after_rollback", _after_rollback)
+    return _index
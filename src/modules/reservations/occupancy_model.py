@@ -0,0 +1,97 @@
+from typing import List
+
+from sqlalchemy import Column, Date, ForeignKey, Integer
+
+from src.shared.database.connection import Base
+
+# Horario en el que se ofrecen huecos libres (de 8 a 20)
+OPENING_HOUR = 8
+CLOSING_HOUR = 20
+
+
+class RoomDayOccupancy(Base):
+    """
+    Modelo de Ocupación diaria de una sala.
+
+    Guarda en un entero de 24 bits qué horas de un día tiene reservadas una
+    sala: el bit h está a 1 si la hora [h, h+1) está ocupada. Se mantiene en
+    la misma transacción que inserta cada reserva, así un solapamiento se
+    detecta con un AND y los huecos libres salen del bitmap sin cargar las
+    reservas.
+
+    Atributos:
+        room_id: ID de la sala
+        date: Fecha
+        mask: Horas ocupadas (bit h = hora h)
+        version: Contador que sube con cada cambio del día (para ETags)
+    """
+
+    __tablename__ = "room_day_occupancy"
+
+    room_id = Column(Integer, ForeignKey("rooms.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    mask = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (
+            f"<RoomDayOccupancy(room_id={self.room_id}, date={self.date}, "
+            f"mask={self.mask:024b}, version={self.version})>"
+        )
+
+
+class ReservationSlot(Base):
+    """
+    Modelo de Hora reservada de una sala.
+
+    Una fila por cada hora de cada reserva. La clave primaria (sala, fecha,
+    hora) hace que la propia BD rechace dos reservas de la misma hora aunque
+    ambas hayan pasado la comprobación de solapamiento a la vez: la segunda
+    transacción falla al insertar y no hace falta serializar las escrituras.
+
+    Atributos:
+        room_id: ID de la sala
+        date: Fecha
+        hour: Hora [hour, hour+1)
+        reservation_id: Reserva que ocupa esa hora
+    """
+
+    __tablename__ = "reservation_slots"
+
+    room_id = Column(Integer, ForeignKey("rooms.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)
+    reservation_id = Column(Integer, ForeignKey("reservations.id"), nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<ReservationSlot(room_id={self.room_id}, date={self.date}, "
+            f"hour={self.hour}, reservation_id={self.reservation_id})>"
+        )
+
+
+def hours_mask(start_hour: int, end_hour: int) -> int:
+    """
+    Bitmap de las horas [start_hour, end_hour).
+
+    Ejemplo:
+        hours_mask(10, 12) == 0b110000000000  # bits 10 y 11
+    """
+    return (1 << end_hour) - (1 << start_hour)
+
+
+def free_hours(
+    mask: int, start_hour: int = OPENING_HOUR, end_hour: int = CLOSING_HOUR
+) -> List[int]:
+    """
+    Horas libres de un bitmap dentro del horario [start_hour, end_hour).
+
+    Args:
+        mask: Bitmap de horas ocupadas
+        start_hour: Primera hora del horario
+        end_hour: Hora de cierre (excluida)
+
+    Returns:
+        Lista ordenada de horas libres
+    """
+    return [hour for hour in range(start_hour, end_hour) if not mask >> hour & 1]
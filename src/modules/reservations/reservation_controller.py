@@ -1,7 +1,10 @@
-from typing import List
+from datetime import date, datetime
+from typing import Iterator, List, Literal, Optional, Tuple
 
 from pydantic import BaseModel, Field
 
+from src.modules.reservations.reservation_service import MAX_BATCH_SIZE
+
 # Schemas de entrada
 
 
@@ -29,6 +32,57 @@ class ReservationCreateRequest(BaseModel):
     }
 
 
+class BatchReservationRequest(BaseModel):
+    """Esquema para crear varias reservas a la vez."""
+
+    mode: Literal["atomic", "best_effort"] = Field(
+        "atomic",
+        description="atomic: todo o nada; best_effort: crear las válidas",
+    )
+    reservations: List[ReservationCreateRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        description="Reservas del lote",
+    )
+
+
+class SeriesCreateRequest(BaseModel):
+    """Esquema para crear una serie de reservas recurrentes."""
+
+    userId: int = Field(..., description="ID del usuario que reserva")
+    roomId: int = Field(..., description="ID de la sala a reservar")
+    frequency: Literal["daily", "weekly"] = Field(..., description="Frecuencia")
+    interval: int = Field(1, ge=1, le=52, description="Cada cuántos días/semanas")
+    weekdays: Optional[List[int]] = Field(
+        None, description="Días de la semana (0 = lunes, solo weekly)"
+    )
+    startDate: str = Field(..., description="Primera fecha (YYYY-MM-DD)")
+    endDate: str = Field(..., description="Última fecha, incluida (YYYY-MM-DD)")
+    startHour: int = Field(..., ge=0, le=23, description="Hora de inicio (0-23)")
+    endHour: int = Field(..., ge=0, le=23, description="Hora de fin (0-23)")
+    skipConflicts: bool = Field(
+        False, description="Crear el resto si alguna fecha está ocupada"
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "userId": 1,
+                    "roomId": 5,
+                    "frequency": "weekly",
+                    "weekdays": [0],
+                    "startDate": "2025-03-03",
+                    "endDate": "2025-08-31",
+                    "startHour": 9,
+                    "endHour": 11,
+                }
+            ]
+        }
+    }
+
+
 # Schemas de salida
 
 
@@ -57,6 +111,52 @@ class ReservationResponse(BaseModel):
         )
 
 
+class BatchReservationResult(BaseModel):
+    """Resultado de un elemento del lote."""
+
+    index: int
+    status: Literal["created", "failed", "skipped"]
+    reservation: Optional[ReservationResponse] = None
+    error: Optional[str] = None
+
+
+class BatchReservationResponse(BaseModel):
+    """Esquema de respuesta de un lote de reservas."""
+
+    mode: str
+    created: int
+    failed: int
+    results: List[BatchReservationResult]
+
+
+class SeriesResponse(BaseModel):
+    """Esquema de respuesta de una serie de reservas."""
+
+    id: int
+    userId: int
+    roomId: int
+    frequency: str
+    interval: int
+    weekdays: Optional[List[int]]
+    startDate: str
+    endDate: str
+    startHour: int
+    endHour: int
+    reservations: List[ReservationResponse]
+    skippedDates: List[str] = Field(
+        ..., description="Fechas omitidas por estar ocupadas"
+    )
+
+
+class NextAvailableResponse(BaseModel):
+    """Esquema de respuesta del primer hueco disponible."""
+
+    roomId: int
+    date: str
+    startHour: int
+    endHour: int
+
+
 # Controller
 
 
@@ -104,6 +204,99 @@ class ReservationController:
 
         return ReservationResponse.from_model(reservation)
 
+    def create_reservations_batch(
+        self, request: BatchReservationRequest
+    ) -> BatchReservationResponse:
+        """
+        Crea un lote de reservas.
+
+        Args:
+            request: Modo y reservas del lote
+
+        Returns:
+            Resultado de cada reserva del lote
+        """
+        # Una fecha mal formada solo hace fallar a su elemento
+        items, invalid = [], {}
+        for index, item in enumerate(request.reservations):
+            try:
+                reservation_date = self._parse_date(item.date)
+            except ValueError as e:
+                reservation_date = None
+                invalid[index] = str(e)
+            items.append(
+                {
+                    "user_id": item.userId,
+                    "room_id": item.roomId,
+                    "reservation_date": reservation_date,
+                    "start_hour": item.startHour,
+                    "end_hour": item.endHour,
+                }
+            )
+
+        results = self.service.create_reservations_batch(
+            items, atomic=request.mode == "atomic", invalid=invalid
+        )
+        return BatchReservationResponse(
+            mode=request.mode,
+            created=sum(result["status"] == "created" for result in results),
+            failed=sum(result["status"] == "failed" for result in results),
+            results=[
+                BatchReservationResult(
+                    index=result["index"],
+                    status=result["status"],
+                    reservation=(
+                        ReservationResponse.from_model(result["reservation"])
+                        if result["reservation"] is not None
+                        else None
+                    ),
+                    error=result["error"],
+                )
+                for result in results
+            ],
+        )
+
+    def create_series(self, request: SeriesCreateRequest) -> SeriesResponse:
+        """
+        Crea una serie de reservas recurrentes.
+
+        Args:
+            request: Regla de la serie
+
+        Returns:
+            Serie creada con sus reservas
+        """
+        series, reservations, skipped = self.service.create_series(
+            user_id=request.userId,
+            room_id=request.roomId,
+            frequency=request.frequency,
+            start_date=self._parse_date(request.startDate),
+            end_date=self._parse_date(request.endDate),
+            start_hour=request.startHour,
+            end_hour=request.endHour,
+            interval=request.interval,
+            weekdays=request.weekdays,
+            skip_conflicts=request.skipConflicts,
+        )
+        return SeriesResponse(
+            id=series.id,
+            userId=series.user_id,
+            roomId=series.room_id,
+            frequency=series.frequency,
+            interval=series.interval,
+            weekdays=(
+                [int(day) for day in series.weekdays.split(",")]
+                if series.weekdays
+                else None
+            ),
+            startDate=str(series.start_date),
+            endDate=str(series.end_date),
+            startHour=series.start_hour,
+            endHour=series.end_hour,
+            reservations=[ReservationResponse.from_model(res) for res in reservations],
+            skippedDates=[str(day) for day in skipped],
+        )
+
     def get_reservation(self, reservation_id: int) -> ReservationResponse:
         """
         Obtiene una reserva por ID.
@@ -117,15 +310,88 @@ class ReservationController:
         reservation = self.service.get_reservation_by_id(reservation_id)
         return ReservationResponse.from_model(reservation)
 
-    def get_reservations_by_room(self, room_id: int) -> List[ReservationResponse]:
+    def get_reservations_by_room(
+        self,
+        room_id: int,
+        limit: Optional[int] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[ReservationResponse], Optional[str]]:
         """
-        Obtiene todas las reservas de una sala.
+        Obtiene una página de reservas de una sala.
 
         Args:
             room_id: ID de la sala
+            limit: Máximo de reservas (None = todas si no hay cursor)
+            date_from: Primera fecha (YYYY-MM-DD, opcional)
+            date_to: Última fecha (YYYY-MM-DD, opcional)
+            cursor: Cursor de la página anterior
 
         Returns:
-            Lista de reservas
+            Tupla (reservas, cursor de la siguiente página o None)
         """
-        reservations = self.service.get_reservations_by_room(room_id)
-        return [ReservationResponse.from_model(res) for res in reservations]
+        rows, next_cursor = self.service.get_reservations_by_room(
+            room_id,
+            limit=limit,
+            date_from=self._parse_date(date_from) if date_from else None,
+            date_to=self._parse_date(date_to) if date_to else None,
+            cursor=cursor,
+        )
+        return [ReservationResponse.from_model(row) for row in rows], next_cursor
+
+    def export_reservations(
+        self,
+        export_format: str,
+        room_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Exporta reservas (NDJSON o CSV) como un iterador de texto.
+
+        Args:
+            export_format: "ndjson" o "csv"
+            room_id: Filtrar por sala
+            user_id: Filtrar por usuario
+            date_from: Primera fecha (YYYY-MM-DD, opcional)
+            date_to: Última fecha (YYYY-MM-DD, opcional)
+
+        Returns:
+            Iterador de trozos de texto para una respuesta en streaming
+        """
+        return self.service.export_reservations(
+            export_format,
+            room_id=room_id,
+            user_id=user_id,
+            date_from=self._parse_date(date_from) if date_from else None,
+            date_to=self._parse_date(date_to) if date_to else None,
+        )
+
+    def find_next_available(
+        self, from_date: str, hours: int, room_id: Optional[int] = None
+    ) -> NextAvailableResponse:
+        """
+        Busca el primer hueco disponible desde una fecha.
+
+        Args:
+            from_date: Fecha inicial (YYYY-MM-DD)
+            hours: Horas seguidas necesarias
+            room_id: Sala concreta (None = cualquiera)
+
+        Returns:
+            Primer hueco encontrado
+        """
+        slot = self.service.find_next_available(
+            self._parse_date(from_date), hours, room_id
+        )
+        return NextAvailableResponse(**slot)
+
+    @staticmethod
+    def _parse_date(value: str) -> date:
+        """Convierte una fecha YYYY-MM-DD en date."""
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValueError("Formato de fecha inválido. Use YYYY-MM-DD")
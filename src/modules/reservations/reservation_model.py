@@ -1,5 +1,8 @@
-from sqlalchemy import Column, Date, ForeignKey, Integer
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer
 
+from src.modules.reservations.series_model import (  # noqa: F401 (registra la tabla de la FK series_id)
+    ReservationSeries,
+)
 from src.shared.database.connection import Base
 
 
@@ -16,9 +19,20 @@ class Reservation(Base):
         date: Fecha de la reserva
         start_hour: Hora de inicio (0-23)
         end_hour: Hora de fin (0-23)
+        series_id: Serie recurrente a la que pertenece (None si es suelta)
     """
 
     __tablename__ = "reservations"
+    __table_args__ = (
+        # Reservas de una sala por fecha: solapamientos, paginación por cursor
+        # (get_page_by_room) y reservas futuras al borrar una sala. Sirve
+        # también como índice (room_id, date) por ser su prefijo
+        Index(
+            "ix_reservations_room_date_hour_id", "room_id", "date", "start_hour", "id"
+        ),
+        # Reservas de un usuario (exportación por usuario)
+        Index("ix_reservations_user_date", "user_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -26,6 +40,7 @@ class Reservation(Base):
     date = Column(Date, nullable=False, index=True)
     start_hour = Column(Integer, nullable=False)
     end_hour = Column(Integer, nullable=False)
+    series_id = Column(Integer, ForeignKey("reservation_series.id"), nullable=True)
 
     def __repr__(self):
         return (
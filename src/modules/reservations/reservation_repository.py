@@ -1,9 +1,25 @@
 from datetime import date
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
+from sqlalchemy import Row, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from src.modules.reservations.occupancy_model import (
+    ReservationSlot,
+    RoomDayOccupancy,
+    hours_mask,
+)
 from src.modules.reservations.reservation_model import Reservation
+from src.modules.reservations.series_model import ReservationSeries
+
+# Motores con INSERT ... ON CONFLICT DO UPDATE (upsert en una sentencia)
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+class SlotTakenError(ValueError):
+    """Alguna hora de la reserva ya la ocupa otra (restricción de reservation_slots)."""
 
 
 class ReservationRepository:
@@ -31,6 +47,11 @@ class ReservationRepository:
         """
         Crea una nueva reserva.
 
+        En la misma transacción reclama sus horas en reservation_slots y
+        las marca en el bitmap de ocupación de la sala y el día
+        (room_day_occupancy). Si otra transacción ya reclamó alguna de esas
+        horas, la clave primaria de reservation_slots lo impide.
+
         Args:
             user_id: ID del usuario
             room_id: ID de la sala
@@ -40,6 +61,9 @@ class ReservationRepository:
 
         Returns:
             Reserva creada con su ID asignado
+
+        Raises:
+            SlotTakenError: Si alguna de las horas ya está reservada
         """
         reservation = Reservation(
             user_id=user_id,
@@ -49,10 +73,109 @@ class ReservationRepository:
             end_hour=end_hour,
         )
         self.db.add(reservation)
+        self.db.flush()  # asigna el ID que guardan las horas reclamadas
+
+        try:
+            self.db.execute(
+                insert(ReservationSlot),
+                [
+                    {
+                        "room_id": room_id,
+                        "date": reservation_date,
+                        "hour": hour,
+                        "reservation_id": reservation.id,
+                    }
+                    for hour in range(start_hour, end_hour)
+                ],
+            )
+        except IntegrityError:
+            self.db.rollback()
+            raise SlotTakenError(
+                f"La sala {room_id} ya tiene reservada alguna hora "
+                f"entre {start_hour} y {end_hour}"
+            )
+
+        self._mark_occupied(room_id, reservation_date, hours_mask(start_hour, end_hour))
         self.db.commit()
         self.db.refresh(reservation)
         return reservation
 
+    def create_many(
+        self, items: List[dict], series: Optional[ReservationSeries] = None
+    ) -> List[Reservation]:
+        """
+        Crea varias reservas en una sola transacción.
+
+        Inserta las reservas en bloque, reclama todas sus horas con un solo
+        INSERT en reservation_slots y actualiza una vez el bitmap de cada
+        (sala, día) afectado. Si alguna hora ya estaba reclamada no se crea
+        ninguna.
+
+        Args:
+            items: Dicts con user_id, room_id, reservation_date, start_hour
+                y end_hour
+            series: Serie nueva a la que pertenecen (se crea en la misma
+                transacción)
+
+        Returns:
+            Reservas creadas (en el mismo orden) con su ID asignado
+
+        Raises:
+            SlotTakenError: Si alguna de las horas ya está reservada
+        """
+        series_id = None
+        if series is not None:
+            self.db.add(series)
+            self.db.flush()
+            series_id = series.id
+
+        reservations = [
+            Reservation(
+                user_id=item["user_id"],
+                room_id=item["room_id"],
+                date=item["reservation_date"],
+                start_hour=item["start_hour"],
+                end_hour=item["end_hour"],
+                series_id=series_id,
+            )
+            for item in items
+        ]
+        self.db.add_all(reservations)
+        self.db.flush()
+
+        try:
+            self.db.execute(
+                insert(ReservationSlot),
+                [
+                    {
+                        "room_id": reservation.room_id,
+                        "date": reservation.date,
+                        "hour": hour,
+                        "reservation_id": reservation.id,
+                    }
+                    for reservation in reservations
+                    for hour in range(reservation.start_hour, reservation.end_hour)
+                ],
+            )
+        except IntegrityError:
+            self.db.rollback()
+            raise SlotTakenError("Alguna de las horas del lote ya está reservada")
+
+        bits_by_day: Dict[Tuple[int, date], int] = {}
+        for reservation in reservations:
+            key = (reservation.room_id, reservation.date)
+            bits_by_day[key] = bits_by_day.get(key, 0) | hours_mask(
+                reservation.start_hour, reservation.end_hour
+            )
+        for (room_id, reservation_date), bits in bits_by_day.items():
+            self._mark_occupied(room_id, reservation_date, bits)
+
+        ids = [reservation.id for reservation in reservations]
+        self.db.commit()
+        # Refrescar todas con una consulta en vez de una por reserva
+        self.db.query(Reservation).filter(Reservation.id.in_(ids)).all()
+        return reservations
+
     def get_by_id(self, reservation_id: int) -> Optional[Reservation]:
         """
         Busca una reserva por su ID.
@@ -79,6 +202,72 @@ class ReservationRepository:
         """
         return self.db.query(Reservation).filter(Reservation.room_id == room_id).all()
 
+    def get_page_by_room(
+        self,
+        room_id: int,
+        limit: Optional[int],
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        after: Optional[Tuple[date, int, int]] = None,
+    ) -> List[Row]:
+        """
+        Obtiene una página de reservas de una sala (paginación por cursor).
+
+        Ordena por (date, start_hour, id) y continúa después de `after` con
+        una comparación de tuplas, así cada página cuesta lo mismo sin
+        importar cuántas haya antes (a diferencia de OFFSET). Usa el índice
+        ix_reservations_room_date_hour_id y lee solo columnas, sin crear
+        objetos del ORM.
+
+        Args:
+            room_id: ID de la sala
+            limit: Máximo de filas (None = todas)
+            date_from: Primera fecha (incluida)
+            date_to: Última fecha (incluida)
+            after: (date, start_hour, id) de la última fila de la página anterior
+
+        Returns:
+            Filas con id, user_id, room_id, date, start_hour y end_hour
+        """
+        query = select(
+            Reservation.id,
+            Reservation.user_id,
+            Reservation.room_id,
+            Reservation.date,
+            Reservation.start_hour,
+            Reservation.end_hour,
+        ).where(Reservation.room_id == room_id)
+        if date_from is not None:
+            query = query.where(Reservation.date >= date_from)
+        if date_to is not None:
+            query = query.where(Reservation.date <= date_to)
+        if after is not None:
+            query = query.where(
+                tuple_(Reservation.date, Reservation.start_hour, Reservation.id)
+                > tuple_(*after)
+            )
+        query = query.order_by(
+            Reservation.date, Reservation.start_hour, Reservation.id
+        ).limit(limit)
+        return list(self.db.execute(query))
+
+    def count_from_date(self, room_id: int, from_date: date) -> int:
+        """
+        Cuenta las reservas de una sala desde una fecha (incluida).
+
+        Args:
+            room_id: ID de la sala
+            from_date: Primera fecha a contar
+
+        Returns:
+            Número de reservas
+        """
+        return (
+            self.db.query(Reservation)
+            .filter(Reservation.room_id == room_id, Reservation.date >= from_date)
+            .count()
+        )
+
     def get_by_room_and_date(
         self, room_id: int, reservation_date: date
     ) -> List[Reservation]:
@@ -100,6 +289,59 @@ class ReservationRepository:
             .all()
         )
 
+    def iter_for_export(
+        self,
+        room_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[List[Row]]:
+        """
+        Recorre las reservas por bloques para exportarlas.
+
+        Usa `yield_per`: el driver entrega las filas por bloques (cursor de
+        servidor donde la BD lo soporta) y solo se leen columnas, sin crear
+        objetos del ORM, así la memoria no depende del número de reservas.
+
+        Args:
+            room_id: Filtrar por sala
+            user_id: Filtrar por usuario
+            date_from: Primera fecha (incluida)
+            date_to: Última fecha (incluida)
+            batch_size: Filas por bloque
+
+        Returns:
+            Iterador de bloques de filas (id, user_id, room_id, date,
+            start_hour, end_hour, series_id), por fecha e ID
+        """
+        query = select(
+            Reservation.id,
+            Reservation.user_id,
+            Reservation.room_id,
+            Reservation.date,
+            Reservation.start_hour,
+            Reservation.end_hour,
+            Reservation.series_id,
+        )
+        if room_id is not None:
+            query = query.where(Reservation.room_id == room_id)
+        if user_id is not None:
+            query = query.where(Reservation.user_id == user_id)
+        if date_from is not None:
+            query = query.where(Reservation.date >= date_from)
+        if date_to is not None:
+            query = query.where(Reservation.date <= date_to)
+
+        # Orden de los índices (fecha y, dentro de ella, ID): la BD no tiene
+        # que ordenar todo el resultado antes de entregar la primera fila
+        result = self.db.execute(
+            query.order_by(Reservation.date, Reservation.id).execution_options(
+                yield_per=batch_size
+            )
+        )
+        yield from result.partitions()
+
     def check_overlap(
         self, room_id: int, reservation_date: date, start_hour: int, end_hour: int
     ) -> bool:
@@ -115,14 +357,261 @@ class ReservationRepository:
         Returns:
             True si hay solapamiento, False si no
         """
-        # Obtener reservas del mismo día y sala
-        reservations = self.get_by_room_and_date(room_id, reservation_date)
+        # Un solo AND contra el bitmap de ocupación del día
+        return (
+            self.get_occupancy_mask(room_id, reservation_date)
+            & hours_mask(start_hour, end_hour)
+            != 0
+        )
+
+    def get_occupancy_mask(self, room_id: int, reservation_date: date) -> int:
+        """
+        Obtiene el bitmap de horas ocupadas de una sala en una fecha.
 
-        # Verificar solapamiento
-        for res in reservations:
-            # Dos rangos [A, B) y [C, D) se solapan si:
-            # A < D y C < B
-            if start_hour < res.end_hour and res.start_hour < end_hour:
-                return True
+        Args:
+            room_id: ID de la sala
+            reservation_date: Fecha a consultar
+
+        Returns:
+            Entero con el bit h a 1 si la hora h está reservada (0 si no hay reservas)
+        """
+        return self.get_occupancy(room_id, reservation_date)[0]
+
+    def get_occupancy(self, room_id: int, reservation_date: date) -> Tuple[int, int]:
+        """
+        Obtiene el bitmap de ocupación y su versión (búsqueda por clave primaria).
+
+        Args:
+            room_id: ID de la sala
+            reservation_date: Fecha a consultar
+
+        Returns:
+            Tupla (bitmap, versión); (0, 0) si el día no tiene reservas
+        """
+        row = self.db.execute(
+            select(RoomDayOccupancy.mask, RoomDayOccupancy.version).where(
+                RoomDayOccupancy.room_id == room_id,
+                RoomDayOccupancy.date == reservation_date,
+            )
+        ).first()
+        return (row.mask, row.version) if row is not None else (0, 0)
+
+    def get_occupancy_masks(
+        self, room_days: Iterable[Tuple[int, date]]
+    ) -> Dict[Tuple[int, date], int]:
+        """
+        Obtiene en una sola consulta los bitmaps de varios (sala, día).
+
+        Args:
+            room_days: Pares (room_id, fecha)
 
-        return False
+        Returns:
+            Dict (room_id, fecha) -> bitmap (solo los días con reservas)
+        """
+        room_days = set(room_days)
+        if not room_days:
+            return {}
+        # IN por columna (usa la clave primaria; un IN de tuplas recorre la
+        # tabla en SQLite) y descarte en Python de los cruces no pedidos
+        rows = self.db.execute(
+            select(
+                RoomDayOccupancy.room_id, RoomDayOccupancy.date, RoomDayOccupancy.mask
+            ).where(
+                RoomDayOccupancy.room_id.in_({room_id for room_id, _ in room_days}),
+                RoomDayOccupancy.date.in_({day for _, day in room_days}),
+            )
+        )
+        return {
+            (room_id, day): mask
+            for room_id, day, mask in rows
+            if (room_id, day) in room_days
+        }
+
+    def get_occupancy_range(
+        self, room_id: int, date_from: date, date_to: date
+    ) -> Dict[date, Tuple[int, int]]:
+        """
+        Obtiene en una sola consulta los bitmaps de ocupación de un rango.
+
+        Args:
+            room_id: ID de la sala
+            date_from: Primera fecha (incluida)
+            date_to: Última fecha (incluida)
+
+        Returns:
+            Dict fecha -> (bitmap, versión) (solo los días con reservas)
+        """
+        rows = self.db.execute(
+            select(
+                RoomDayOccupancy.date, RoomDayOccupancy.mask, RoomDayOccupancy.version
+            ).where(
+                RoomDayOccupancy.room_id == room_id,
+                RoomDayOccupancy.date >= date_from,
+                RoomDayOccupancy.date <= date_to,
+            )
+        )
+        return {day: (mask, version) for day, mask, version in rows}
+
+    def rebuild_occupancy(self) -> int:
+        """
+        Reconstruye la tabla de ocupación y las horas reclamadas
+        (reservation_slots) a partir de las reservas.
+
+        Sirve para poblarlas en bases de datos creadas antes de que existieran
+        o para repararlas si verify_occupancy() encuentra diferencias. Si hay
+        reservas solapadas de antes, cada hora queda a nombre de la primera.
+
+        Returns:
+            Número de filas (sala, día) escritas
+        """
+        masks = self._masks_from_reservations()
+
+        # Las versiones nunca bajan: un ETag ya entregado no debe repetirse
+        versions = {
+            (room_id, day): version
+            for room_id, day, version in self.db.execute(
+                select(
+                    RoomDayOccupancy.room_id,
+                    RoomDayOccupancy.date,
+                    RoomDayOccupancy.version,
+                )
+            )
+        }
+
+        self.db.execute(RoomDayOccupancy.__table__.delete())
+        if masks:
+            self.db.execute(
+                insert(RoomDayOccupancy),
+                [
+                    {
+                        "room_id": room_id,
+                        "date": day,
+                        "mask": mask,
+                        "version": versions.get((room_id, day), 0) + 1,
+                    }
+                    for (room_id, day), mask in masks.items()
+                ],
+            )
+
+        self.db.execute(ReservationSlot.__table__.delete())
+        slots = self._slots_from_reservations()
+        if slots:
+            self.db.execute(
+                insert(ReservationSlot),
+                [
+                    {
+                        "room_id": room_id,
+                        "date": day,
+                        "hour": hour,
+                        "reservation_id": reservation_id,
+                    }
+                    for (room_id, day, hour), reservation_id in slots.items()
+                ],
+            )
+        self.db.commit()
+        return len(masks)
+
+    def verify_occupancy(self) -> Dict[Tuple[int, date], Tuple[int, int]]:
+        """
+        Compara la tabla de ocupación con lo que dicen las reservas.
+
+        Returns:
+            Dict (room_id, fecha) -> (bitmap guardado, bitmap esperado) con
+            solo los días que no coinciden (vacío si todo cuadra)
+        """
+        expected = self._masks_from_reservations()
+        stored = {
+            (room_id, day): mask
+            for room_id, day, mask in self.db.execute(
+                select(
+                    RoomDayOccupancy.room_id,
+                    RoomDayOccupancy.date,
+                    RoomDayOccupancy.mask,
+                )
+            )
+        }
+
+        mismatches = {}
+        for key in expected.keys() | stored.keys():
+            # Un día sin fila equivale a un bitmap vacío
+            if stored.get(key, 0) != expected.get(key, 0):
+                mismatches[key] = (stored.get(key, 0), expected.get(key, 0))
+        return mismatches
+
+    def _masks_from_reservations(self) -> Dict[Tuple[int, date], int]:
+        """Calcula el bitmap de cada (sala, día) recorriendo las reservas."""
+        masks = {}
+        rows = self.db.execute(
+            select(
+                Reservation.room_id,
+                Reservation.date,
+                Reservation.start_hour,
+                Reservation.end_hour,
+            )
+        )
+        for room_id, reservation_date, start_hour, end_hour in rows:
+            key = (room_id, reservation_date)
+            masks[key] = masks.get(key, 0) | hours_mask(start_hour, end_hour)
+        return masks
+
+    def _slots_from_reservations(self) -> Dict[Tuple[int, date, int], int]:
+        """Reserva dueña de cada (sala, día, hora): la de menor ID si se solapan."""
+        slots = {}
+        rows = self.db.execute(
+            select(
+                Reservation.id,
+                Reservation.room_id,
+                Reservation.date,
+                Reservation.start_hour,
+                Reservation.end_hour,
+            ).order_by(Reservation.id)
+        )
+        for reservation_id, room_id, reservation_date, start_hour, end_hour in rows:
+            for hour in range(start_hour, end_hour):
+                slots.setdefault((room_id, reservation_date, hour), reservation_id)
+        return slots
+
+    def _mark_occupied(self, room_id: int, reservation_date: date, bits: int) -> None:
+        """
+        Suma `bits` al bitmap del día y sube su versión (sin confirmar).
+
+        Es un solo upsert: con UPDATE y luego INSERT, dos primeras reservas
+        simultáneas del mismo día (horas distintas) verían ambas la fila
+        inexistente y la segunda fallaría en la clave primaria.
+        """
+        values = {
+            "room_id": room_id,
+            "date": reservation_date,
+            "mask": bits,
+            "version": 1,
+        }
+        changes = {
+            "mask": RoomDayOccupancy.mask.op("|")(bits),
+            "version": RoomDayOccupancy.version + 1,
+        }
+
+        upsert = _UPSERT_INSERTS.get(self.db.get_bind().dialect.name)
+        if upsert is not None:
+            self.db.execute(
+                upsert(RoomDayOccupancy)
+                .values(**values)
+                .on_conflict_do_update(
+                    index_elements=[RoomDayOccupancy.room_id, RoomDayOccupancy.date],
+                    set_=changes,
+                )
+            )
+            return
+
+        # Otros motores: si el INSERT choca con la fila que otra transacción
+        # acaba de crear, se deshace solo el savepoint y se repite el UPDATE
+        room_day = update(RoomDayOccupancy).where(
+            RoomDayOccupancy.room_id == room_id,
+            RoomDayOccupancy.date == reservation_date,
+        )
+        if self.db.execute(room_day.values(**changes)).rowcount:
+            return
+        try:
+            with self.db.begin_nested():
+                self.db.execute(insert(RoomDayOccupancy).values(**values))
+        except IntegrityError:
+            self.db.execute(room_day.values(**changes))
@@ -1,11 +1,23 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from src.modules.reservations.reservation_controller import (
-    ReservationController, ReservationCreateRequest, ReservationResponse)
-from src.modules.reservations.reservation_service import ReservationService
+    BatchReservationRequest,
+    BatchReservationResponse,
+    NextAvailableResponse,
+    ReservationController,
+    ReservationCreateRequest,
+    ReservationResponse,
+    SeriesCreateRequest,
+    SeriesResponse,
+)
+from src.modules.reservations.reservation_service import (
+    ReservationService,
+    RoomNotFoundError,
+)
 from src.shared.database.connection import get_db
 
 # Router de reservas
@@ -51,6 +63,133 @@ def create_reservation(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post(
+    "/batch",
+    response_model=BatchReservationResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={400: {"model": BatchReservationResponse}},
+)
+def create_reservations_batch(
+    request: BatchReservationRequest,
+    response: Response,
+    controller: ReservationController = Depends(get_controller),
+):
+    """
+    Crea varias reservas (hasta 100) en una sola petición.
+
+    Se validan juntas, con las mismas reglas que `POST /reservations/`, y
+    además se rechazan las que se solapan con otra del mismo lote. Las
+    válidas se insertan en una sola transacción.
+
+    **mode:**
+    - `atomic` (por defecto): si alguna falla no se crea ninguna
+    - `best_effort`: se crean las válidas
+
+    La respuesta trae un resultado por reserva (`created`, `failed` con su
+    error, o `skipped` si era válida pero el lote atómico falló). Si no se
+    creó ninguna responde 400 con el mismo cuerpo.
+    """
+    try:
+        result = controller.create_reservations_batch(request)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if result.created == 0:
+        response.status_code = status.HTTP_400_BAD_REQUEST
+    return result
+
+
+@router.post(
+    "/series", response_model=SeriesResponse, status_code=status.HTTP_201_CREATED
+)
+def create_series(
+    request: SeriesCreateRequest,
+    controller: ReservationController = Depends(get_controller),
+):
+    """
+    Crea una serie de reservas recurrentes (ej: cada lunes de 9 a 11 durante
+    6 meses).
+
+    - **frequency**: `daily` o `weekly`; **interval**: cada cuántos días/semanas
+    - **weekdays**: días de la semana para `weekly` (0 = lunes; por defecto el
+      de startDate)
+    - **startDate** / **endDate**: rango de la serie (máximo 366 fechas)
+    - **skipConflicts**: si es `false` (por defecto) y alguna fecha está
+      ocupada no se crea nada y el error lista las fechas; si es `true` se
+      crean las demás y las ocupadas vuelven en `skippedDates`
+    """
+    try:
+        return controller.create_series(request)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+# Tipo de contenido de cada formato de exportación
+_EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+# Declarada antes de /{reservation_id} para que no se tome como un ID
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media: {} for media in _EXPORT_MEDIA_TYPES.values()}}},
+)
+def export_reservations(
+    format: str = Query("ndjson", description="ndjson o csv"),
+    roomId: Optional[int] = Query(None, description="Filtrar por sala"),
+    userId: Optional[int] = Query(None, description="Filtrar por usuario"),
+    date_from: Optional[str] = Query(
+        None, alias="from", description="Primera fecha (YYYY-MM-DD)"
+    ),
+    date_to: Optional[str] = Query(
+        None, alias="to", description="Última fecha, incluida (YYYY-MM-DD)"
+    ),
+    controller: ReservationController = Depends(get_controller),
+):
+    """
+    Exporta el historial de reservas en streaming.
+
+    Las filas se envían a medida que se leen de la BD (por bloques), así
+    la memoria del servidor no crece con el número de reservas.
+
+    - **format**: `ndjson` (un objeto JSON por línea) o `csv` (con cabecera)
+    - **roomId** / **userId** / **from** / **to**: Filtros opcionales
+    """
+    try:
+        chunks = controller.export_reservations(
+            format, roomId, userId, date_from, date_to
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return StreamingResponse(
+        chunks,
+        media_type=_EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="reservations.{format}"'
+        },
+    )
+
+
+@router.get("/next-available", response_model=NextAvailableResponse)
+def find_next_available(
+    date: str = Query(..., description="Fecha desde la que buscar (YYYY-MM-DD)"),
+    hours: int = Query(..., ge=1, le=12, description="Horas seguidas necesarias"),
+    roomId: Optional[int] = Query(None, description="Sala concreta (opcional)"),
+    controller: ReservationController = Depends(get_controller),
+):
+    """
+    Busca el primer hueco de al menos `hours` horas seguidas.
+
+    Con **roomId** busca en esa sala; sin él, en cualquier sala activa (el
+    hueco más temprano). Los huecos están dentro del horario de 8 a 20.
+    """
+    try:
+        return controller.find_next_available(date, hours, roomId)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.get("/{reservation_id}", response_model=ReservationResponse)
 def get_reservation(
     reservation_id: int, controller: ReservationController = Depends(get_controller)
@@ -68,14 +207,42 @@ def get_reservation(
 # Se podría poner en room_routes.py, pero la dejo aquí por cohesión
 @router.get("/room/{room_id}", response_model=List[ReservationResponse])
 def get_room_reservations(
-    room_id: int, controller: ReservationController = Depends(get_controller)
+    room_id: int,
+    response: Response,
+    date_from: Optional[str] = Query(
+        None, alias="from", description="Primera fecha (YYYY-MM-DD)"
+    ),
+    date_to: Optional[str] = Query(
+        None, alias="to", description="Última fecha, incluida (YYYY-MM-DD)"
+    ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=1000, description="Reservas por página (activa la paginación)"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Valor de X-Next-Cursor de la página anterior"
+    ),
+    controller: ReservationController = Depends(get_controller),
 ):
     """
-    Obtiene todas las reservas de una sala específica.
+    Obtiene las reservas de una sala específica, en orden cronológico.
 
-    Útil para ver el historial completo de reservas de una sala.
+    Útil para ver el historial de reservas de una sala. Sin `limit` ni
+    `cursor` devuelve todas las reservas, como siempre. Con `limit` la
+    respuesta se pagina: si hay más reservas, la cabecera `X-Next-Cursor`
+    trae el cursor para pedir la siguiente página (`?cursor=...`).
+
+    - **from** / **to**: Filtrar por rango de fechas (opcionales)
+    - **limit**: Reservas por página (máximo 1000; con solo `cursor`, 100)
     """
     try:
-        return controller.get_reservations_by_room(room_id)
-    except ValueError as e:
+        reservations, next_cursor = controller.get_reservations_by_room(
+            room_id, limit, date_from, date_to, cursor
+        )
+    except RoomNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return reservations
@@ -1,14 +1,59 @@
-from datetime import date
-from typing import List
+import base64
+import csv
+import io
+import json
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 from sqlalchemy.orm import Session
 
+from src.modules.reservations.interval_index import get_interval_index
+from src.modules.reservations.occupancy_model import (
+    CLOSING_HOUR,
+    OPENING_HOUR,
+    hours_mask,
+)
 from src.modules.reservations.reservation_model import Reservation
-from src.modules.reservations.reservation_repository import \
-    ReservationRepository
+from src.modules.reservations.reservation_repository import (
+    ReservationRepository,
+    SlotTakenError,
+)
+from src.modules.reservations.series_model import ReservationSeries, expand_occurrences
 from src.modules.rooms.room_repository import RoomRepository
 from src.modules.users.user_repository import UserRepository
-from src.shared.cache.cache_service import get_cache
+from src.shared.config.settings import get_settings
+
+# Máximo de reservas en un mismo lote (POST /reservations/batch)
+MAX_BATCH_SIZE = 100
+
+# Máximo de fechas que puede generar una serie recurrente
+MAX_SERIES_OCCURRENCES = 366
+
+# Primer hueco sin el índice en memoria: días de ocupación leídos por
+# consulta y cuántos días como mucho se buscan
+NEXT_AVAILABLE_CHUNK_DAYS = 31
+NEXT_AVAILABLE_MAX_DAYS = 366
+
+# Tamaño de página de GET /reservations/room/{room_id} (por defecto y máximo)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Exportación: formatos admitidos, columnas y filas leídas por bloque
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_COLUMNS = (
+    "id",
+    "user_id",
+    "room_id",
+    "date",
+    "start_hour",
+    "end_hour",
+    "series_id",
+)
+EXPORT_BATCH_SIZE = 1000
+
+
+class RoomNotFoundError(ValueError):
+    """La sala pedida no existe (las rutas lo traducen a 404)."""
 
 
 class ReservationService:
@@ -18,7 +63,9 @@ class ReservationService:
     Contiene toda la lógica de negocio para reservas:
     - Validaciones complejas
     - Detección de solapamientos
-    - Invalidación de caché
+
+    La invalidación del caché de disponibilidad es automática tras el
+    commit (ver src/shared/cache/cache_invalidation.py).
     """
 
     def __init__(self, db: Session):
@@ -29,7 +76,12 @@ class ReservationService:
         self.repository = ReservationRepository(db)
         self.user_repository = UserRepository(db)
         self.room_repository = RoomRepository(db)
-        self.cache = get_cache()
+        self.db = db
+
+        # El índice solo sirve si se cargó (al arrancar, ver api.py)
+        self._index_enabled = (
+            get_settings().reservation_index_enabled and get_interval_index().loaded
+        )
 
     def create_reservation(
         self,
@@ -48,6 +100,18 @@ class ReservationService:
         3. La sala debe existir y estar activa
         4. No debe haber solapamiento con otras reservas
 
+        La comprobación de solapamiento da el error habitual sin escribir
+        nada, pero quien garantiza la regla 4 es la BD: si dos peticiones la
+        pasan a la vez, la clave primaria de reservation_slots hace fallar a
+        la segunda, que recibe el mismo error.
+
+        Con `reservation_index_enabled`, un solapamiento con una reserva que
+        el índice en memoria ya conoce se rechaza tras la regla 1, sin
+        ninguna consulta a la BD. Ese error tiene prioridad sobre los de las
+        reglas 2 y 3: un horario ocupado da "Ya existe una reserva" aunque el
+        usuario no exista o la sala esté inactiva. Lo que el índice da por
+        libre pasa por todas las validaciones en BD.
+
         Args:
             user_id: ID del usuario
             room_id: ID de la sala
@@ -61,13 +125,16 @@ class ReservationService:
         Raises:
             ValueError: Si alguna validación falla
         """
-        # Validación 1: startHour < endHour
-        if start_hour >= end_hour:
-            raise ValueError("La hora de inicio debe ser menor que la hora de fin")
+        # Validación 1: startHour < endHour (y horas entre 0 y 23)
+        self._validate_hours(start_hour, end_hour)
 
-        # Validar rango de horas válido
-        if not (0 <= start_hour <= 23) or not (0 <= end_hour <= 23):
-            raise ValueError("Las horas deben estar entre 0 y 23")
+        # Pre-chequeo en memoria (opcional): un solapamiento con una reserva
+        # ya conocida se rechaza sin consultar la BD (antes que las
+        # validaciones 2 y 3, ver docstring)
+        if self._index_enabled and get_interval_index().overlaps(
+            room_id, reservation_date, start_hour, end_hour
+        ):
+            raise self._overlap_error(room_id, start_hour, end_hour)
 
         # Validación 2: El usuario debe existir
         user = self.user_repository.get_by_id(user_id)
@@ -92,24 +159,309 @@ class ReservationService:
         )
 
         if has_overlap:
+            raise self._overlap_error(room_id, start_hour, end_hour)
+
+        # Crear la reserva (el caché de disponibilidad se invalida tras el commit)
+        try:
+            return self.repository.create(
+                user_id=user_id,
+                room_id=room_id,
+                reservation_date=reservation_date,
+                start_hour=start_hour,
+                end_hour=end_hour,
+            )
+        except SlotTakenError:
+            # Otra petición reservó esas horas después de nuestra comprobación
+            raise self._overlap_error(room_id, start_hour, end_hour)
+
+    def create_reservations_batch(
+        self,
+        items: List[dict],
+        atomic: bool = True,
+        invalid: Optional[Dict[int, str]] = None,
+    ) -> List[dict]:
+        """
+        Crea varias reservas validándolas juntas.
+
+        Aplica las mismas reglas que create_reservation, pero con una sola
+        consulta IN para los usuarios, otra para las salas y otra para la
+        ocupación de todos los (sala, día) del lote. También rechaza los
+        elementos que se solapan con otro anterior del mismo lote. Las
+        reservas válidas se insertan en bloque en una sola transacción.
+
+        Modos:
+        - atomic: si algún elemento falla no se crea ninguno
+        - best_effort: se crean los válidos y se informa de los que fallan
+
+        Args:
+            items: Dicts con user_id, room_id, reservation_date, start_hour
+                y end_hour
+            atomic: True = todo o nada, False = best effort
+            invalid: Errores ya detectados por índice (ej: fecha mal
+                formada); esos elementos fallan sin validarse
+
+        Returns:
+            Un resultado por elemento, en el mismo orden: dict con index,
+            status ("created", "failed" o "skipped"), reservation y error
+
+        Raises:
+            ValueError: Si el lote está vacío o es demasiado grande
+        """
+        if not items:
+            raise ValueError("El lote no tiene reservas")
+        if len(items) > MAX_BATCH_SIZE:
+            raise ValueError(f"El lote no puede tener más de {MAX_BATCH_SIZE} reservas")
+
+        errors: Dict[int, str] = dict(invalid or {})
+        self._validate_batch(items, errors)
+
+        valid = [index for index in range(len(items)) if index not in errors]
+        if not valid or (atomic and errors):
+            return self._batch_results(len(items), {}, errors)
+
+        try:
+            created = self.repository.create_many([items[index] for index in valid])
+        except SlotTakenError:
+            # Otra petición reservó alguna de estas horas entre la validación
+            # y la inserción
+            if atomic:
+                for index in valid:
+                    errors[index] = (
+                        "Otra reserva ocupó alguna de las horas del lote mientras "
+                        "se procesaba"
+                    )
+                return self._batch_results(len(items), {}, errors)
+            return self._create_one_by_one(items, valid, errors)
+
+        return self._batch_results(len(items), dict(zip(valid, created)), errors)
+
+    def create_series(
+        self,
+        user_id: int,
+        room_id: int,
+        frequency: str,
+        start_date: date,
+        end_date: date,
+        start_hour: int,
+        end_hour: int,
+        interval: int = 1,
+        weekdays: Optional[List[int]] = None,
+        skip_conflicts: bool = False,
+    ) -> Tuple[ReservationSeries, List[Reservation], List[date]]:
+        """
+        Crea una serie de reservas recurrentes (ej: cada lunes de 9 a 11).
+
+        La regla se expande aquí a fechas concretas y los solapamientos de
+        todas ellas se comprueban con una sola consulta de rango sobre el
+        bitmap de ocupación de la sala. La serie y sus reservas se insertan
+        en bloque en una sola transacción, y el caché de disponibilidad de
+        todos los días afectados se invalida de una vez tras el commit.
+
+        Args:
+            user_id: ID del usuario
+            room_id: ID de la sala
+            frequency: "daily" o "weekly"
+            start_date: Primera fecha posible (incluida)
+            end_date: Última fecha posible (incluida)
+            start_hour: Hora de inicio (0-23)
+            end_hour: Hora de fin (0-23)
+            interval: Cada cuántos días/semanas
+            weekdays: Días de la semana, 0 = lunes (solo weekly)
+            skip_conflicts: True = crear el resto si alguna fecha está ocupada
+
+        Returns:
+            Tupla (serie, reservas creadas, fechas omitidas por conflicto)
+
+        Raises:
+            ValueError: Si alguna validación falla o hay conflictos (y no se
+                pidió omitirlos)
+        """
+        self._validate_hours(start_hour, end_hour)
+        occurrences = expand_occurrences(
+            frequency,
+            start_date,
+            end_date,
+            interval,
+            weekdays,
+            limit=MAX_SERIES_OCCURRENCES,
+        )
+        if not occurrences:
+            raise ValueError("La regla no genera ninguna fecha")
+
+        user = self.user_repository.get_by_id(user_id)
+        if not user:
+            raise ValueError(f"No existe el usuario con ID {user_id}")
+
+        room = self.room_repository.get_by_id(room_id)
+        if not room:
+            raise ValueError(f"No existe la sala con ID {room_id}")
+        if not room.activa:
+            raise ValueError("La sala no está activa y no puede ser reservada")
+
+        # Una sola consulta para todo el rango de la serie
+        occupancy = self.repository.get_occupancy_range(
+            room_id, occurrences[0], occurrences[-1]
+        )
+        bits = hours_mask(start_hour, end_hour)
+        conflicts = [day for day in occurrences if occupancy.get(day, (0, 0))[0] & bits]
+        if conflicts and not skip_conflicts:
             raise ValueError(
-                f"Ya existe una reserva en ese horario. "
-                f"La sala {room_id} no está disponible de {start_hour} a {end_hour}"
+                f"La sala {room_id} no está disponible de {start_hour} a "
+                f"{end_hour} en: {', '.join(str(day) for day in conflicts)}"
             )
 
-        # Crear la reserva
-        reservation = self.repository.create(
+        taken = set(conflicts)
+        free_days = [day for day in occurrences if day not in taken]
+        if not free_days:
+            raise ValueError("Todas las fechas de la serie están ocupadas")
+
+        series = ReservationSeries(
             user_id=user_id,
             room_id=room_id,
-            reservation_date=reservation_date,
+            frequency=frequency,
+            interval=interval,
+            weekdays=(
+                ",".join(str(day) for day in sorted(set(weekdays)))
+                if frequency == "weekly" and weekdays
+                else None
+            ),
+            start_date=start_date,
+            end_date=end_date,
             start_hour=start_hour,
             end_hour=end_hour,
         )
+        items = [
+            {
+                "user_id": user_id,
+                "room_id": room_id,
+                "reservation_date": day,
+                "start_hour": start_hour,
+                "end_hour": end_hour,
+            }
+            for day in free_days
+        ]
+        try:
+            reservations = self.repository.create_many(items, series=series)
+        except SlotTakenError:
+            # Otra petición reservó alguna de esas fechas tras la comprobación
+            raise ValueError(
+                f"La sala {room_id} se ocupó en alguna fecha de la serie mientras "
+                f"se procesaba. Inténtelo de nuevo"
+            )
+        return series, reservations, conflicts
 
-        # Invalidar caché de disponibilidad
-        self._invalidate_availability_cache(room_id, reservation_date)
+    def _create_one_by_one(
+        self, items: List[dict], valid: List[int], errors: Dict[int, str]
+    ) -> List[dict]:
+        """Best effort tras un conflicto concurrente: una transacción por elemento."""
+        created = {}
+        for index in valid:
+            try:
+                created[index] = self.repository.create(**items[index])
+            except SlotTakenError:
+                errors[index] = str(self._overlap_error(*self._slot_of(items[index])))
+        return self._batch_results(len(items), created, errors)
 
-        return reservation
+    @staticmethod
+    def _batch_results(
+        size: int, created: Dict[int, Reservation], errors: Dict[int, str]
+    ) -> List[dict]:
+        """Un resultado por elemento del lote (los no creados ni fallidos: skipped)."""
+        results = []
+        for index in range(size):
+            if index in created:
+                status = "created"
+            elif index in errors:
+                status = "failed"
+            else:
+                status = "skipped"
+            results.append(
+                {
+                    "index": index,
+                    "status": status,
+                    "reservation": created.get(index),
+                    "error": errors.get(index),
+                }
+            )
+        return results
+
+    def _validate_batch(self, items: List[dict], errors: Dict[int, str]) -> None:
+        """
+        Valida los elementos del lote que aún no tienen error.
+
+        Carga con una consulta IN los usuarios, las salas y la ocupación de
+        todos los (sala, día) y anota en `errors` el motivo de cada fallo.
+        """
+        candidates = [item for index, item in enumerate(items) if index not in errors]
+        user_ids = self.user_repository.get_existing_ids(
+            item["user_id"] for item in candidates
+        )
+        rooms = self.room_repository.get_active_flags(
+            item["room_id"] for item in candidates
+        )
+        masks = self.repository.get_occupancy_masks(
+            (item["room_id"], item["reservation_date"]) for item in candidates
+        )
+
+        batch_masks: Dict[tuple, int] = {}  # horas que ya toman elementos anteriores
+        for index, item in enumerate(items):
+            if index in errors:
+                continue
+            try:
+                self._validate_batch_item(item, user_ids, rooms)
+                self._check_batch_overlap(item, masks, batch_masks)
+            except ValueError as e:
+                errors[index] = str(e)
+
+    def _check_batch_overlap(
+        self, item: dict, masks: Dict[tuple, int], batch_masks: Dict[tuple, int]
+    ) -> None:
+        """
+        Regla 4 de create_reservation contra las reservas existentes y contra
+        los elementos anteriores del lote (que se anotan en `batch_masks`).
+        """
+        key = (item["room_id"], item["reservation_date"])
+        bits = hours_mask(item["start_hour"], item["end_hour"])
+        if masks.get(key, 0) & bits:
+            raise self._overlap_error(*self._slot_of(item))
+        if batch_masks.get(key, 0) & bits:
+            raise ValueError("Se solapa con otra reserva del mismo lote")
+        batch_masks[key] = batch_masks.get(key, 0) | bits
+
+    def _validate_batch_item(
+        self, item: dict, user_ids: Set[int], rooms: Dict[int, bool]
+    ) -> None:
+        """Reglas 1-3 de create_reservation con los datos ya cargados del lote."""
+        self._validate_hours(item["start_hour"], item["end_hour"])
+        if item["user_id"] not in user_ids:
+            raise ValueError(f"No existe el usuario con ID {item['user_id']}")
+        if item["room_id"] not in rooms:
+            raise ValueError(f"No existe la sala con ID {item['room_id']}")
+        if not rooms[item["room_id"]]:
+            raise ValueError("La sala no está activa y no puede ser reservada")
+
+    @staticmethod
+    def _slot_of(item: dict) -> tuple:
+        """(room_id, start_hour, end_hour) de un elemento del lote."""
+        return item["room_id"], item["start_hour"], item["end_hour"]
+
+    @staticmethod
+    def _validate_hours(start_hour: int, end_hour: int) -> None:
+        """Valida que el rango de horas sea correcto."""
+        if start_hour >= end_hour:
+            raise ValueError("La hora de inicio debe ser menor que la hora de fin")
+
+        # Validar rango de horas válido
+        if not (0 <= start_hour <= 23) or not (0 <= end_hour <= 23):
+            raise ValueError("Las horas deben estar entre 0 y 23")
+
+    @staticmethod
+    def _overlap_error(room_id: int, start_hour: int, end_hour: int) -> ValueError:
+        """Error de solapamiento (mismo mensaje venga del índice o de la BD)."""
+        return ValueError(
+            f"Ya existe una reserva en ese horario. "
+            f"La sala {room_id} no está disponible de {start_hour} a {end_hour}"
+        )
 
     def get_reservation_by_id(self, reservation_id: int) -> Reservation:
         """
@@ -129,37 +481,269 @@ class ReservationService:
             raise ValueError(f"No se encontró la reserva con ID {reservation_id}")
         return reservation
 
-    def get_reservations_by_room(self, room_id: int) -> List[Reservation]:
+    def get_reservations_by_room(
+        self,
+        room_id: int,
+        limit: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[list, Optional[str]]:
         """
-        Obtiene todas las reservas de una sala.
+        Obtiene una página de reservas de una sala, en orden cronológico.
+
+        Paginación por cursor sobre (date, start_hour, id): el cursor que se
+        devuelve apunta a la última reserva de la página y la siguiente
+        página empieza justo después. Sin `limit` ni `cursor` se devuelven
+        todas las reservas de una vez (la respuesta de antes de paginar).
 
         Args:
             room_id: ID de la sala
+            limit: Máximo de reservas por página (None = todas si no hay
+                cursor, DEFAULT_PAGE_SIZE si lo hay)
+            date_from: Primera fecha (incluida)
+            date_to: Última fecha (incluida)
+            cursor: Cursor de la página anterior (None = primera página)
 
         Returns:
-            Lista de reservas
+            Tupla (filas de la página, cursor de la siguiente o None si no hay más)
 
         Raises:
-            ValueError: Si la sala no existe
+            RoomNotFoundError: Si la sala no existe
+            ValueError: Si el límite o el rango no son válidos o el cursor
+                está mal formado
         """
+        if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"El límite debe estar entre 1 y {MAX_PAGE_SIZE}")
+        if date_from and date_to and date_from > date_to:
+            raise ValueError("La fecha inicial debe ser anterior o igual a la final")
+
         # Verificar que la sala exista
         room = self.room_repository.get_by_id(room_id)
         if not room:
-            raise ValueError(f"No existe la sala con ID {room_id}")
+            raise RoomNotFoundError(f"No existe la sala con ID {room_id}")
 
-        return self.repository.get_by_room(room_id)
+        if limit is None and cursor is None:
+            rows = self.repository.get_page_by_room(
+                room_id, None, date_from=date_from, date_to=date_to
+            )
+            return rows, None
+        limit = limit or DEFAULT_PAGE_SIZE
 
-    def _invalidate_availability_cache(
-        self, room_id: int, reservation_date: date
-    ) -> None:
+        # Una fila de más indica si hay página siguiente
+        rows = self.repository.get_page_by_room(
+            room_id,
+            limit + 1,
+            date_from=date_from,
+            date_to=date_to,
+            after=self._decode_cursor(cursor) if cursor else None,
+        )
+        if len(rows) <= limit:
+            return rows, None
+
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, self._encode_cursor(last.date, last.start_hour, last.id)
+
+    def export_reservations(
+        self,
+        export_format: str,
+        room_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ) -> Iterator[str]:
         """
-        Invalida el caché de disponibilidad para una sala y fecha.
+        Exporta reservas como NDJSON o CSV, por bloques de texto.
+
+        Los parámetros se validan al llamar; las filas se leen al recorrer
+        el iterador, por bloques de EXPORT_BATCH_SIZE y sin objetos del ORM
+        ni modelos de Pydantic, así la memoria es constante aunque se
+        exporte todo el historial.
 
         Args:
-            room_id: ID de la sala
-            reservation_date: Fecha de la reserva
+            export_format: "ndjson" o "csv"
+            room_id: Filtrar por sala
+            user_id: Filtrar por usuario
+            date_from: Primera fecha (incluida)
+            date_to: Última fecha (incluida)
+
+        Returns:
+            Iterador de trozos de texto (uno por bloque de filas)
+
+        Raises:
+            ValueError: Si el formato o el rango no son válidos
         """
-        cache_key = self.cache.get_cache_key(
-            "availability", str(room_id), str(reservation_date)
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(
+                f"Formato inválido. Use uno de: {', '.join(EXPORT_FORMATS)}"
+            )
+        if date_from and date_to and date_from > date_to:
+            raise ValueError("La fecha inicial debe ser anterior o igual a la final")
+
+        return self._export_chunks(export_format, room_id, user_id, date_from, date_to)
+
+    def _export_chunks(
+        self,
+        export_format: str,
+        room_id: Optional[int],
+        user_id: Optional[int],
+        date_from: Optional[date],
+        date_to: Optional[date],
+    ) -> Iterator[str]:
+        """Genera la exportación con una sesión propia (dura lo que el stream)."""
+        if export_format == "csv":
+            yield ",".join(EXPORT_COLUMNS) + "\r\n"
+
+        with Session(bind=self.db.get_bind()) as db:
+            batches = ReservationRepository(db).iter_for_export(
+                room_id, user_id, date_from, date_to, batch_size=EXPORT_BATCH_SIZE
+            )
+            for rows in batches:
+                if export_format == "csv":
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerows(rows)
+                    yield buffer.getvalue()
+                else:
+                    yield "".join(
+                        json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str) + "\n"
+                        for row in rows
+                    )
+
+    @staticmethod
+    def _encode_cursor(last_date: date, start_hour: int, reservation_id: int) -> str:
+        """Cursor opaco (base64 url-safe) con la posición de la última fila."""
+        raw = f"{last_date.isoformat()}|{start_hour}|{reservation_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[date, int, int]:
+        """Inverso de _encode_cursor."""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw_date, start_hour, reservation_id = (
+                base64.urlsafe_b64decode(padded).decode().split("|")
+            )
+            return date.fromisoformat(raw_date), int(start_hour), int(reservation_id)
+        except ValueError:
+            raise ValueError("Cursor inválido")
+
+    def find_next_available(
+        self, from_date: date, hours: int, room_id: Optional[int] = None
+    ) -> dict:
+        """
+        Busca el primer hueco de `hours` horas seguidas desde una fecha.
+
+        Con `reservation_index_enabled` usa el índice de intervalos en
+        memoria (búsqueda binaria por sala) y comprueba el resultado contra
+        la BD; si otra instancia reservó ese hueco, recarga la sala en el
+        índice y vuelve a buscar. Sin él no se carga el índice (ocupa memoria
+        proporcional a todas las reservas): se leen los bitmaps de ocupación
+        por bloques de días, hasta NEXT_AVAILABLE_MAX_DAYS días.
+
+        Args:
+            from_date: Primera fecha a considerar (incluida)
+            hours: Horas seguidas necesarias
+            room_id: Sala concreta (None = cualquier sala activa)
+
+        Returns:
+            Dict con roomId, date, startHour y endHour
+
+        Raises:
+            ValueError: Si las horas no son válidas, no hay sala activa o
+                (sin índice) no hay hueco en NEXT_AVAILABLE_MAX_DAYS días
+        """
+        max_hours = CLOSING_HOUR - OPENING_HOUR
+        if not 1 <= hours <= max_hours:
+            raise ValueError(f"Las horas deben estar entre 1 y {max_hours}")
+
+        if room_id is not None:
+            room = self.room_repository.get_by_id(room_id)
+            if not room:
+                raise ValueError(f"No existe la sala con ID {room_id}")
+            if not room.activa:
+                raise ValueError("La sala no está activa y no puede ser reservada")
+            room_ids = [room_id]
+        else:
+            room_ids = self.room_repository.get_active_ids()
+            if not room_ids:
+                raise ValueError("No hay salas activas")
+
+        if not get_settings().reservation_index_enabled:
+            return self._scan_next_available(from_date, hours, sorted(room_ids))
+
+        index = get_interval_index()
+        index.ensure_loaded(self.db)
+
+        # Candidato de cada sala: (fecha, hora, sala); el menor es el primero
+        candidates = {
+            rid: index.next_available(rid, from_date, hours) + (rid,)
+            for rid in room_ids
+        }
+        while True:
+            slot_date, start_hour, rid = min(candidates.values())
+            if not self.repository.check_overlap(
+                rid, slot_date, start_hour, start_hour + hours
+            ):
+                return {
+                    "roomId": rid,
+                    "date": str(slot_date),
+                    "startHour": start_hour,
+                    "endHour": start_hour + hours,
+                }
+            # El índice de este proceso no conocía alguna reserva de la sala
+            index.load(self.db, room_id=rid)
+            retry = index.next_available(rid, from_date, hours) + (rid,)
+            if retry == candidates[rid]:
+                # Reservas y tabla de ocupación no coinciden (ver
+                # scripts/occupancy.py verify): no insistir
+                raise ValueError("No se pudo verificar la disponibilidad de la sala")
+            candidates[rid] = retry
+
+    def _scan_next_available(
+        self, from_date: date, hours: int, room_ids: List[int]
+    ) -> dict:
+        """
+        Primer hueco leyendo los bitmaps de ocupación (sin índice en memoria).
+
+        Una consulta por bloque de NEXT_AVAILABLE_CHUNK_DAYS días para todas
+        las salas; dentro del bloque se recorre por día, hora y sala, el
+        mismo orden que con el índice.
+
+        Args:
+            from_date: Primera fecha a considerar (incluida)
+            hours: Horas seguidas necesarias
+            room_ids: Salas candidatas, ordenadas
+
+        Returns:
+            Dict con roomId, date, startHour y endHour
+
+        Raises:
+            ValueError: Si no hay hueco en NEXT_AVAILABLE_MAX_DAYS días
+        """
+        for offset in range(0, NEXT_AVAILABLE_MAX_DAYS, NEXT_AVAILABLE_CHUNK_DAYS):
+            days = [
+                from_date + timedelta(days=day)
+                for day in range(
+                    offset,
+                    min(offset + NEXT_AVAILABLE_CHUNK_DAYS, NEXT_AVAILABLE_MAX_DAYS),
+                )
+            ]
+            masks = self.repository.get_occupancy_masks(
+                (rid, day) for rid in room_ids for day in days
+            )
+            for day in days:
+                for start_hour in range(OPENING_HOUR, CLOSING_HOUR - hours + 1):
+                    wanted = hours_mask(start_hour, start_hour + hours)
+                    for rid in room_ids:
+                        if not masks.get((rid, day), 0) & wanted:
+                            return {
+                                "roomId": rid,
+                                "date": str(day),
+                                "startHour": start_hour,
+                                "endHour": start_hour + hours,
+                            }
+        raise ValueError(
+            f"No hay {hours} horas libres seguidas en los próximos "
+            f"{NEXT_AVAILABLE_MAX_DAYS} días"
         )
-        self.cache.delete(cache_key)
@@ -0,0 +1,113 @@
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import Column, Date, ForeignKey, Integer, String
+
+from src.shared.database.connection import Base
+
+# Frecuencias admitidas para una serie
+FREQUENCIES = ("daily", "weekly")
+
+
+class ReservationSeries(Base):
+    """
+    Modelo de Serie de reservas recurrentes.
+
+    Guarda la regla (ej: cada lunes de 9 a 11 hasta junio); cada ocurrencia
+    es una fila normal de `reservations` con su series_id, así el resto de
+    la aplicación (disponibilidad, solapamientos) no distingue entre
+    reservas sueltas y recurrentes.
+
+    Atributos:
+        id: Identificador único
+        user_id: ID del usuario que reserva
+        room_id: ID de la sala reservada
+        frequency: "daily" o "weekly"
+        interval: Cada cuántos días/semanas se repite
+        weekdays: Días de la semana (0 = lunes) separados por comas (weekly)
+        start_date: Primera fecha posible (incluida)
+        end_date: Última fecha posible (incluida)
+        start_hour: Hora de inicio (0-23)
+        end_hour: Hora de fin (0-23)
+    """
+
+    __tablename__ = "reservation_series"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
+    frequency = Column(String(10), nullable=False)
+    interval = Column(Integer, nullable=False, default=1)
+    weekdays = Column(String(20), nullable=True)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    start_hour = Column(Integer, nullable=False)
+    end_hour = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<ReservationSeries(id={self.id}, room_id={self.room_id}, "
+            f"{self.frequency}/{self.interval}, {self.start_date}..{self.end_date})>"
+        )
+
+
+def expand_occurrences(
+    frequency: str,
+    start_date: date,
+    end_date: date,
+    interval: int = 1,
+    weekdays: Optional[Iterable[int]] = None,
+    limit: Optional[int] = None,
+) -> List[date]:
+    """
+    Fechas de una regla de recurrencia.
+
+    - daily: start_date y cada `interval` días
+    - weekly: los `weekdays` (0 = lunes; por defecto el de start_date) de
+      cada `interval` semanas, contando desde la semana de start_date
+
+    Ejemplo:
+        expand_occurrences("weekly", date(2025, 2, 17), date(2025, 3, 3))
+        == [date(2025, 2, 17), date(2025, 2, 24), date(2025, 3, 3)]
+
+    Args:
+        frequency: "daily" o "weekly"
+        start_date: Primera fecha posible (incluida)
+        end_date: Última fecha posible (incluida)
+        interval: Cada cuántos días/semanas
+        weekdays: Días de la semana (solo weekly)
+        limit: Máximo de fechas; si la regla da más, ValueError
+
+    Returns:
+        Lista ordenada de fechas
+
+    Raises:
+        ValueError: Si la regla no es válida o supera `limit`
+    """
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Frecuencia inválida. Use una de: {', '.join(FREQUENCIES)}")
+    if interval < 1:
+        raise ValueError("El intervalo debe ser al menos 1")
+    if start_date > end_date:
+        raise ValueError("La fecha inicial debe ser anterior o igual a la final")
+
+    if frequency == "daily":
+        step, offsets = timedelta(days=interval), [0]
+    else:
+        days = sorted(set(weekdays)) if weekdays else [start_date.weekday()]
+        if any(not 0 <= day <= 6 for day in days):
+            raise ValueError("Los días de la semana deben estar entre 0 y 6")
+        step = timedelta(weeks=interval)
+        offsets = [day - start_date.weekday() for day in days]
+
+    occurrences = []
+    anchor = start_date
+    while anchor + timedelta(days=min(offsets)) <= end_date:
+        for offset in offsets:
+            day = anchor + timedelta(days=offset)
+            if start_date <= day <= end_date:
+                occurrences.append(day)
+                if limit is not None and len(occurrences) > limit:
+                    raise ValueError(f"La serie no puede tener más de {limit} fechas")
+        anchor += step
+    return occurrences
@@ -0,0 +1,402 @@
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.modules.reservations.occupancy_model import CLOSING_HOUR, OPENING_HOUR
+from src.modules.reservations.reservation_model import Reservation
+from src.shared.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Clave en session.info donde se acumulan los cambios pendientes de publicar
+_PENDING_KEY = "availability_stream"
+
+
+class Subscription:
+    """
+    Suscripción de un cliente a la disponibilidad de unas salas y fechas.
+
+    No es una cola de eventos: guarda, por cada (sala, fecha), las horas que
+    se ocuparon desde la última entrega. Los cambios de un mismo día se
+    fusionan, así un cliente lento recibe un solo diff por día en vez de
+    acumular mensajes. Si llegan cambios de más de `max_pending` días
+    distintos sin que el cliente los lea, se marca como desbordada y el
+    stream se cierra (el cliente se reconecta y recibe una foto nueva).
+
+    Solo se modifica desde el event loop que la creó.
+    """
+
+    def __init__(
+        self,
+        room_ids: Iterable[int],
+        date_from: date,
+        date_to: date,
+        max_pending: int,
+    ):
+        """
+        Args:
+            room_ids: Salas a las que se suscribe
+            date_from: Primera fecha (incluida)
+            date_to: Última fecha (incluida)
+            max_pending: Días con cambios sin leer antes de desbordar
+        """
+        self.room_ids = frozenset(room_ids)
+        self.date_from = date_from
+        self.date_to = date_to
+        self.overflowed = False
+        self._max_pending = max_pending
+        self._pending: Dict[Tuple[int, date], Set[int]] = {}
+        self._ready = asyncio.Event()
+
+    def wants(self, room_id: int, day: date) -> bool:
+        """Si el cambio de ese día y sala le interesa a la suscripción."""
+        return room_id in self.room_ids and self.date_from <= day <= self.date_to
+
+    def offer(self, room_id: int, day: date, hours: Iterable[int]) -> None:
+        """Anota horas ocupadas, fusionándolas con las pendientes del día."""
+        key = (room_id, day)
+        if key not in self._pending and len(self._pending) >= self._max_pending:
+            self.overflowed = True
+            self._pending.clear()
+        else:
+            self._pending.setdefault(key, set()).update(hours)
+        self._ready.set()
+
+    async def next_changes(self, timeout: Optional[float] = None) -> List[dict]:
+        """
+        Espera a que haya cambios y los entrega (vaciando los pendientes).
+
+        Args:
+            timeout: Segundos máximos de espera (None = sin límite)
+
+        Returns:
+            Lista de diffs {"roomId", "date", "taken"}; vacía si venció el
+            timeout o la suscripción se desbordó
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+
+        pending, self._pending = self._pending, {}
+        return [
+            {"roomId": room_id, "date": str(day), "taken": sorted(hours)}
+            for (room_id, day), hours in sorted(pending.items())
+        ]
+
+
+class AvailabilityHub:
+    """
+    Reparte los cambios de disponibilidad a los streams abiertos (SSE).
+
+    Cada suscriptor es un objeto en el event loop del worker, no un hilo,
+    así miles de conexiones inactivas solo cuestan memoria. Las reservas se
+    confirman en los hilos de las rutas síncronas; publish() pasa el cambio
+    al event loop con call_soon_threadsafe y allí se reparte solo a los
+    suscriptores de esa sala.
+
+    Uso:
+        hub = get_availability_hub()
+        subscription = hub.subscribe([5], date(2025, 2, 17), date(2025, 2, 23))
+        changes = await subscription.next_changes(timeout=15)
+        hub.unsubscribe(subscription)
+    """
+
+    def __init__(self, max_pending: int = 256):
+        """
+        Args:
+            max_pending: Días con cambios sin leer por suscriptor
+        """
+        self._max_pending = max_pending
+        self._by_room: Dict[int, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self, room_ids: Iterable[int], date_from: date, date_to: date
+    ) -> Subscription:
+        """
+        Registra una suscripción. Debe llamarse desde el event loop.
+
+        Args:
+            room_ids: Salas a seguir
+            date_from: Primera fecha (incluida)
+            date_to: Última fecha (incluida)
+
+        Returns:
+            Suscripción de la que leer los cambios
+        """
+        subscription = Subscription(room_ids, date_from, date_to, self._max_pending)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            for room_id in subscription.room_ids:
+                self._by_room.setdefault(room_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Elimina una suscripción (al cerrarse el stream)."""
+        with self._lock:
+            for room_id in subscription.room_ids:
+                subscribers = self._by_room.get(room_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_room[room_id]
+
+    def subscriber_count(self) -> int:
+        """Número de suscripciones abiertas."""
+        with self._lock:
+            return len(set().union(*self._by_room.values()))
+
+    def publish(self, changes: Iterable[Tuple[int, date, int, int]]) -> None:
+        """
+        Publica reservas confirmadas. Se puede llamar desde cualquier hilo.
+
+        Args:
+            changes: Tuplas (room_id, fecha, hora_inicio, hora_fin)
+        """
+        with self._lock:
+            loop = self._loop
+            changes = [change for change in changes if change[0] in self._by_room]
+        if not changes or loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._dispatch, changes)
+
+    def clear(self) -> None:
+        """Olvida todas las suscripciones (útil en tests)."""
+        with self._lock:
+            self._by_room = {}
+            self._loop = None
+
+    def _dispatch(self, changes: List[Tuple[int, date, int, int]]) -> None:
+        """Reparte los cambios a los suscriptores (en el event loop)."""
+        for room_id, day, start_hour, end_hour in changes:
+            hours = range(max(start_hour, OPENING_HOUR), min(end_hour, CLOSING_HOUR))
+            if not hours:
+                continue
+            with self._lock:
+                subscribers = list(self._by_room.get(room_id, ()))
+            for subscription in subscribers:
+                if subscription.wants(room_id, day):
+                    subscription.offer(room_id, day, hours)
+
+
+class AvailabilityRelay:
+    """
+    Reenvía las reservas confirmadas al hub del resto de workers.
+
+    Con varios workers, cada uno tiene su propio hub y solo ve las reservas
+    que confirma él. El relay publica cada commit en un canal pub/sub de
+    Redis y un hilo por worker lo escucha y lo entrega a su hub, ignorando
+    los mensajes propios (esos ya se entregaron en local).
+
+    Si se corta la conexión, el hilo lo registra y vuelve a suscribirse con
+    espera exponencial; los cambios publicados mientras tanto se pierden
+    (los clientes afectados lo corrigen al reconectar y recibir la foto).
+    """
+
+    # Espera antes de resuscribirse tras un error (se duplica hasta el máximo)
+    RECONNECT_DELAY = 0.5
+    MAX_RECONNECT_DELAY = 30.0
+
+    def __init__(self, client, hub: AvailabilityHub, channel: str):
+        """
+        Args:
+            client: Cliente de Redis
+            hub: Hub local al que se entregan los cambios de otros workers
+            channel: Canal pub/sub compartido
+        """
+        self.client = client
+        self._hub = hub
+        self._channel = channel
+        self._node_id = uuid.uuid4().hex  # para ignorar nuestros propios mensajes
+        self._listener: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def publish(self, changes: Iterable[Tuple[int, date, int, int]]) -> None:
+        """
+        Publica reservas confirmadas para el resto de workers.
+
+        Un fallo de Redis se registra pero no se propaga: la reserva ya
+        está confirmada.
+
+        Args:
+            changes: Tuplas (room_id, fecha, hora_inicio, hora_fin)
+        """
+        message = {
+            "node": self._node_id,
+            "changes": [
+                [room_id, day.isoformat(), start_hour, end_hour]
+                for room_id, day, start_hour, end_hour in changes
+            ],
+        }
+        try:
+            self.client.publish(
+                self._channel, json.dumps(message, separators=(",", ":"))
+            )
+        except Exception:
+            logger.exception("No se pudo publicar en el canal %s", self._channel)
+
+    def start(self) -> None:
+        """Se suscribe al canal y arranca el hilo que lo escucha."""
+        if self._listener is not None and self._listener.is_alive():
+            return
+
+        pubsub = self._subscribe()
+        self._stop_event.clear()
+
+        def _run():
+            current = pubsub
+            delay = self.RECONNECT_DELAY
+            while not self._stop_event.is_set():
+                try:
+                    if current is None:
+                        current = self._subscribe()
+                        delay = self.RECONNECT_DELAY
+                        logger.warning("Reconectado al canal %s", self._channel)
+                    message = current.get_message(timeout=1.0)
+                    if message is not None:
+                        self._handle_message(message["data"])
+                except Exception:
+                    logger.exception(
+                        "Error escuchando el canal %s; reintento en %ss",
+                        self._channel,
+                        delay,
+                    )
+                    _close_quietly(current)
+                    current = None
+                    self._stop_event.wait(delay)
+                    delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+            _close_quietly(current)
+
+        self._listener = threading.Thread(
+            target=_run, name="availability-relay-listener", daemon=True
+        )
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo de escucha si está activo."""
+        self._stop_event.set()
+        if self._listener is not None:
+            self._listener.join()
+            self._listener = None
+
+    def _subscribe(self):
+        """Abre una suscripción al canal."""
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._channel)
+        return pubsub
+
+    def _handle_message(self, data: bytes) -> None:
+        """Entrega al hub local los cambios publicados por otro worker."""
+        message = json.loads(data)
+        if message.get("node") == self._node_id:
+            return
+        self._hub.publish(
+            (room_id, date.fromisoformat(day), start_hour, end_hour)
+            for room_id, day, start_hour, end_hour in message["changes"]
+        )
+
+
+def _close_quietly(pubsub) -> None:
+    """Cierra una suscripción ignorando errores de una conexión ya rota."""
+    if pubsub is None:
+        return
+    try:
+        pubsub.close()
+    except Exception:
+        pass
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    """Anota las reservas insertadas en el flush."""
+    for obj in session.new:
+        if isinstance(obj, Reservation):
+            session.info.setdefault(_PENDING_KEY, []).append(
+                (obj.room_id, obj.date, obj.start_hour, obj.end_hour)
+            )
+
+
+def _after_commit(session: Session) -> None:
+    """Publica las reservas solo cuando el commit tuvo éxito."""
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes and _hub is not None:
+        _hub.publish(changes)
+        if _relay is not None:
+            _relay.publish(changes)
+
+
+def _after_rollback(session: Session) -> None:
+    """Descarta las reservas de una transacción que no se confirmó."""
+    session.info.pop(_PENDING_KEY, None)
+
+
+# Instancias globales
+_hub: Optional[AvailabilityHub] = None
+_relay: Optional[AvailabilityRelay] = None
+_hub_lock = threading.Lock()
+
+
+def register_availability_stream(session_cls=Session) -> AvailabilityHub:
+    """
+    Crea el hub de disponibilidad y engancha la publicación de reservas.
+
+    Se llama al arrancar la aplicación (ver api.py): cada worker publica sus
+    reservas confirmadas desde el primer commit, haya abierto streams o no.
+    Con un backend de caché en Redis ("redis" o "tiered", es decir, varios
+    workers) arranca también el relay que comparte las reservas entre
+    workers. Llamarla más de una vez no tiene efecto.
+
+    Args:
+        session_cls: Clase de sesión a instrumentar (por defecto todas)
+
+    Returns:
+        Instancia singleton del hub
+    """
+    global _hub, _relay
+    with _hub_lock:
+        if _hub is None:
+            settings = get_settings()
+            hub = AvailabilityHub(settings.availability_stream_max_pending)
+            if settings.cache_backend in ("redis", "tiered"):
+                import redis
+
+                _relay = AvailabilityRelay(
+                    redis.Redis(
+                        host=settings.redis_host,
+                        port=settings.redis_port,
+                        db=settings.redis_db,
+                    ),
+                    hub,
+                    settings.availability_stream_channel,
+                )
+                _relay.start()
+            _hub = hub
+        if not event.contains(session_cls, "after_flush", _after_flush):
+            event.listen(session_cls, "after_flush", _after_flush)
+            event.listen(session_cls, "after_commit", _after_commit)
+            event.listen(session_cls, "after_rollback", _after_rollback)
+    return _hub
+
+
+def get_availability_hub() -> AvailabilityHub:
+    """
+    Retorna la instancia global del hub de disponibilidad.
+
+    Normalmente ya la creó register_availability_stream() al arrancar; si
+    no (tests, scripts), la crea ahora.
+
+    Returns:
+        Instancia singleton del hub
+    """
+    if _hub is not None:
+        return _hub
+    return register_availability_stream()
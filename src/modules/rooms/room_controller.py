@@ -1,7 +1,11 @@
-from typing import List
+from datetime import date, datetime
+from typing import Dict, List, Tuple
 
 from pydantic import BaseModel, Field
 
+from src.modules.rooms.availability_stream import AvailabilityHub, Subscription
+from src.modules.rooms.room_service import MAX_STREAM_ROOMS
+
 # Schemas de entrada
 
 
@@ -74,6 +78,19 @@ class AvailabilityResponse(BaseModel):
     freeSlots: List[int]
 
 
+class AvailabilityRangeResponse(BaseModel):
+    """Esquema de respuesta de disponibilidad en un rango de fechas."""
+
+    roomId: int
+    from_: str = Field(..., alias="from")
+    to: str
+    days: Dict[str, List[int]] = Field(
+        ..., description="Fecha (YYYY-MM-DD) -> horas libres"
+    )
+
+    model_config = {"populate_by_name": True}
+
+
 # Controller
 
 
@@ -102,12 +119,21 @@ class RoomController:
 
     def get_room(self, room_id: int) -> RoomResponse:
         """Obtiene una sala por ID."""
-        room = self.service.get_room_by_id(room_id)
-        return RoomResponse.model_validate(room)
+        room = self.service.get_room_data(room_id)
+        return RoomResponse(**room)
 
     def get_all_rooms(self) -> List[RoomResponse]:
         """Obtiene todas las salas."""
-        rooms = self.service.get_all_rooms()
+        rooms = self.service.get_all_rooms_data()
+        return [RoomResponse(**room) for room in rooms]
+
+    def search_rooms(
+        self, target_date: str, start_hour: int, end_hour: int, capacidad: int
+    ) -> List[RoomResponse]:
+        """Busca salas libres en un horario con capacidad suficiente."""
+        rooms = self.service.search_available_rooms(
+            self._parse_date(target_date), start_hour, end_hour, capacidad
+        )
         return [RoomResponse.model_validate(room) for room in rooms]
 
     def update_room(self, room_id: int, request: RoomUpdateRequest) -> RoomResponse:
@@ -126,15 +152,66 @@ class RoomController:
         self.service.delete_room(room_id)
         return {"message": "Sala eliminada exitosamente"}
 
-    def get_availability(self, room_id: int, target_date: str) -> AvailabilityResponse:
-        """Obtiene la disponibilidad de una sala en una fecha."""
-        from datetime import datetime
+    def get_availability(
+        self, room_id: int, target_date: str
+    ) -> Tuple[AvailabilityResponse, str]:
+        """Obtiene la disponibilidad de una sala en una fecha y su ETag."""
+        availability = self.service.get_availability(
+            room_id, self._parse_date(target_date)
+        )
+        etag = self._availability_etag(
+            room_id, availability["date"], availability["version"]
+        )
+        return AvailabilityResponse(**availability), etag
+
+    def get_availability_etag(self, room_id: int, target_date: str) -> str:
+        """ETag actual de la disponibilidad (sin calcular la disponibilidad)."""
+        date_obj = self._parse_date(target_date)
+        version = self.service.get_availability_version(room_id, date_obj)
+        return self._availability_etag(room_id, str(date_obj), version)
+
+    def get_availability_range(
+        self, room_id: int, date_from: str, date_to: str
+    ) -> AvailabilityRangeResponse:
+        """Obtiene la disponibilidad de una sala en un rango de fechas."""
+        availability = self.service.get_availability_range(
+            room_id, self._parse_date(date_from), self._parse_date(date_to)
+        )
+        return AvailabilityRangeResponse(**availability)
+
+    def open_availability_stream(
+        self, hub: AvailabilityHub, room_ids: List[int], date_from: str, date_to: str
+    ) -> Subscription:
+        """Suscribe a los cambios de disponibilidad (desde el event loop)."""
+        room_ids = sorted(set(room_ids))
+        if len(room_ids) > MAX_STREAM_ROOMS:
+            raise ValueError(f"No se pueden seguir más de {MAX_STREAM_ROOMS} salas")
+        return hub.subscribe(
+            room_ids, self._parse_date(date_from), self._parse_date(date_to)
+        )
 
-        # Convertir fecha string a date
+    def get_availability_snapshot(
+        self, subscription: Subscription
+    ) -> List[AvailabilityRangeResponse]:
+        """Disponibilidad actual de las salas y fechas de una suscripción."""
+        return [
+            AvailabilityRangeResponse(
+                **self.service.get_availability_range(
+                    room_id, subscription.date_from, subscription.date_to
+                )
+            )
+            for room_id in sorted(subscription.room_ids)
+        ]
+
+    @staticmethod
+    def _availability_etag(room_id: int, target_date: str, version: int) -> str:
+        """ETag de la disponibilidad de un día: cambia con cada versión."""
+        return f'"{room_id}-{target_date}-{version}"'
+
+    @staticmethod
+    def _parse_date(value: str) -> date:
+        """Convierte una fecha YYYY-MM-DD en date."""
         try:
-            date_obj = datetime.strptime(target_date, "%Y-%m-%d").date()
+            return datetime.strptime(value, "%Y-%m-%d").date()
         except ValueError:
             raise ValueError("Formato de fecha inválido. Use YYYY-MM-DD")
-
-        availability = self.service.get_availability(room_id, date_obj)
-        return AvailabilityResponse(**availability)
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String
+from sqlalchemy import Boolean, Column, Index, Integer, String
 
 from src.shared.database.connection import Base
 
@@ -18,6 +18,10 @@ class Room(Base):
     """
 
     __tablename__ = "rooms"
+    __table_args__ = (
+        # Búsqueda de salas libres: filtra por activa y capacidad mínima
+        Index("ix_rooms_activa_capacidad", "activa", "capacidad"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     nombre = Column(String(100), nullable=False)
@@ -1,8 +1,13 @@
-from typing import List, Optional
+from datetime import date
+from typing import Dict, Iterable, List, Optional
 
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
+from src.modules.reservations.occupancy_model import RoomDayOccupancy
 from src.modules.rooms.room_model import Room
+from src.shared.cache.cache_service import get_cache
+from src.shared.config.settings import get_settings
 
 
 class RoomRepository:
@@ -18,6 +23,8 @@ class RoomRepository:
             db: Sesión de SQLAlchemy
         """
         self.db = db
+        self.cache = get_cache()
+        self.negative_ttl = get_settings().negative_cache_ttl
 
     def create(
         self, nombre: str, capacidad: int, ubicacion: str, activa: bool = True
@@ -46,13 +53,27 @@ class RoomRepository:
         """
         Busca una sala por su ID.
 
+        Los IDs inexistentes se recuerdan durante `negative_cache_ttl`
+        segundos para no repetir la consulta; la entrada se invalida cuando
+        se crea una sala con ese ID.
+
         Args:
             room_id: ID de la sala
 
         Returns:
             Sala encontrada o None
         """
-        return self.db.query(Room).filter(Room.id == room_id).first()
+        missing_key = self.cache.get_cache_key("missing", "room", room_id)
+        if self.negative_ttl and self.cache.get(missing_key) is not None:
+            return None
+
+        room = self.db.query(Room).filter(Room.id == room_id).first()
+        if room is None and self.negative_ttl:
+            # El tag "room:{id}" se invalida al insertar la fila (eventos del ORM)
+            self.cache.set(
+                missing_key, True, ttl=self.negative_ttl, tags=[f"room:{room_id}"]
+            )
+        return room
 
     def get_all(self) -> List[Room]:
         """
@@ -63,6 +84,72 @@ class RoomRepository:
         """
         return self.db.query(Room).all()
 
+    def get_active_flags(self, room_ids: Iterable[int]) -> Dict[int, bool]:
+        """
+        Estado (activa o no) de varias salas, con una sola consulta IN.
+
+        Args:
+            room_ids: IDs de las salas
+
+        Returns:
+            Dict ID -> activa (solo las salas que existen)
+        """
+        room_ids = set(room_ids)
+        if not room_ids:
+            return {}
+        rows = self.db.query(Room.id, Room.activa).filter(Room.id.in_(room_ids))
+        return {room_id: activa for room_id, activa in rows}
+
+    def get_active_ids(self) -> List[int]:
+        """
+        Retorna los IDs de las salas activas.
+
+        Returns:
+            Lista de IDs ordenada
+        """
+        rows = self.db.query(Room.id).filter(Room.activa.is_(True)).order_by(Room.id)
+        return [room_id for (room_id,) in rows]
+
+    def search_free(
+        self, target_date: date, hours_bits: int, min_capacity: int
+    ) -> List[Room]:
+        """
+        Busca las salas activas libres en unas horas de un día.
+
+        Una sola consulta: LEFT JOIN con el bitmap de ocupación del día (por
+        su clave primaria) y descarte de las salas cuyo bitmap se cruza con
+        las horas pedidas. El filtro de activa/capacidad usa el índice
+        ix_rooms_activa_capacidad.
+
+        Args:
+            target_date: Fecha a consultar
+            hours_bits: Bitmap de las horas pedidas (ver hours_mask)
+            min_capacity: Capacidad mínima
+
+        Returns:
+            Salas libres ordenadas por mejor ajuste (menor capacidad suficiente)
+        """
+        return (
+            self.db.query(Room)
+            .outerjoin(
+                RoomDayOccupancy,
+                and_(
+                    RoomDayOccupancy.room_id == Room.id,
+                    RoomDayOccupancy.date == target_date,
+                ),
+            )
+            .filter(
+                Room.activa.is_(True),
+                Room.capacidad >= min_capacity,
+                or_(
+                    RoomDayOccupancy.mask.is_(None),
+                    RoomDayOccupancy.mask.op("&")(hours_bits) == 0,
+                ),
+            )
+            .order_by(Room.capacidad, Room.id)
+            .all()
+        )
+
     def update(self, room: Room) -> Room:
         """
         Actualiza una sala existente.
@@ -1,13 +1,26 @@
-from typing import List
+import json
+from typing import AsyncIterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from src.modules.rooms.room_controller import (AvailabilityResponse,
-                                               RoomController,
-                                               RoomCreateRequest, RoomResponse,
-                                               RoomUpdateRequest)
+from src.modules.rooms.availability_stream import (
+    AvailabilityHub,
+    Subscription,
+    get_availability_hub,
+)
+from src.modules.rooms.room_controller import (
+    AvailabilityRangeResponse,
+    AvailabilityResponse,
+    RoomController,
+    RoomCreateRequest,
+    RoomResponse,
+    RoomUpdateRequest,
+)
 from src.modules.rooms.room_service import RoomService
+from src.shared.config.settings import get_settings
 from src.shared.database.connection import get_db
 
 # Router de salas
@@ -37,6 +50,123 @@ def create_room(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+# Declarada antes de /{room_id} para que "search" no se tome como un ID
+@router.get("/search", response_model=List[RoomResponse])
+def search_rooms(
+    date: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    startHour: int = Query(..., ge=0, le=23, description="Hora de inicio (0-23)"),
+    endHour: int = Query(..., ge=0, le=23, description="Hora de fin (0-23)"),
+    capacidad: int = Query(1, ge=1, description="Capacidad mínima"),
+    controller: RoomController = Depends(get_controller),
+):
+    """
+    Busca salas libres para un horario.
+
+    Retorna las salas activas con capacidad suficiente y sin reservas en
+    ese horario, ordenadas por mejor ajuste (la capacidad más pequeña que
+    sirve primero).
+
+    - **date**: Fecha (ej: 2025-02-19)
+    - **startHour** / **endHour**: Horario [inicio, fin)
+    - **capacidad**: Número de personas
+    """
+    try:
+        return controller.search_rooms(date, startHour, endHour, capacidad)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def _sse(event: str, data: dict) -> str:
+    """Formatea un evento Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def _availability_events(
+    hub: AvailabilityHub,
+    subscription: Subscription,
+    snapshot: List[AvailabilityRangeResponse],
+    heartbeat: float,
+) -> AsyncIterator[str]:
+    """Eventos del stream: la foto inicial y después los cambios."""
+    try:
+        for availability in snapshot:
+            yield _sse("snapshot", availability.model_dump(by_alias=True))
+        while True:
+            changes = await subscription.next_changes(timeout=heartbeat)
+            if subscription.overflowed:
+                yield _sse("overflow", {})
+                return
+            if not changes:
+                # Mantiene viva la conexión y detecta clientes desconectados
+                yield ": keep-alive\n\n"
+            for change in changes:
+                yield _sse("change", change)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+# Declarada antes de /{room_id} para que no compita con las rutas por ID
+@router.get(
+    "/availability/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_availability(
+    room_ids: List[int] = Query(
+        ..., alias="roomId", description="ID de sala (se puede repetir)"
+    ),
+    date_from: str = Query(
+        ..., alias="from", description="Fecha inicial en formato YYYY-MM-DD"
+    ),
+    date_to: str = Query(
+        ..., alias="to", description="Fecha final (incluida) en formato YYYY-MM-DD"
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Stream (Server-Sent Events) de la disponibilidad de una o varias salas.
+
+    Primero envía un evento `snapshot` por sala con las horas libres de
+    cada día del rango; después, un evento `change` cada vez que se confirma
+    una reserva en esas salas y fechas, con las horas que dejaron de estar
+    libres (`taken`). Los cambios de un mismo día se agrupan si el cliente
+    va lento; si acumula demasiados, recibe `overflow` y se cierra el stream
+    (al reconectar recibe una foto nueva).
+
+    - **roomId**: Sala a seguir (ej: `?roomId=1&roomId=2`, máximo 50)
+    - **from** / **to**: Rango de fechas, incluido (máximo 92 días)
+    """
+    controller = RoomController(RoomService(db))
+    hub = get_availability_hub()
+    try:
+        # Suscribirse antes de leer la foto: un cambio confirmado entre medias
+        # llega como `change` (aplicarlo dos veces no tiene efecto)
+        subscription = controller.open_availability_stream(
+            hub, room_ids, date_from, date_to
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        snapshot = await run_in_threadpool(
+            controller.get_availability_snapshot, subscription
+        )
+    except ValueError as e:
+        hub.unsubscribe(subscription)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    finally:
+        # La sesión no se usa más: no retener una conexión mientras dure el stream
+        await run_in_threadpool(db.close)
+
+    return StreamingResponse(
+        _availability_events(
+            hub, subscription, snapshot, get_settings().availability_stream_heartbeat
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{room_id}", response_model=RoomResponse)
 def get_room(room_id: int, controller: RoomController = Depends(get_controller)):
     """
@@ -86,10 +216,26 @@ def delete_room(room_id: int, controller: RoomController = Depends(get_controlle
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
-@router.get("/{room_id}/availability", response_model=AvailabilityResponse)
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Si alguno de los ETags de If-None-Match coincide (comparación débil)."""
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in [
+        value[2:] if value.startswith("W/") else value for value in candidates
+    ]
+
+
+@router.get(
+    "/{room_id}/availability",
+    response_model=AvailabilityResponse,
+    responses={304: {"description": "Sin cambios desde el ETag enviado"}},
+)
 def get_room_availability(
     room_id: int,
+    response: Response,
     date: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
+    if_none_match: Optional[str] = Header(
+        None, description="ETag de una respuesta anterior"
+    ),
     controller: RoomController = Depends(get_controller),
 ):
     """
@@ -98,9 +244,50 @@ def get_room_availability(
     Retorna las horas libres (slots) disponibles para reservar.
     Utiliza caché para optimizar consultas repetidas.
 
+    La respuesta lleva un `ETag` que cambia con cada reserva de ese día. Si
+    se envía en `If-None-Match` y no hubo cambios, responde `304 Not Modified`
+    sin cuerpo.
+
     - **date**: Fecha en formato YYYY-MM-DD (ej: 2025-02-19)
     """
     try:
-        return controller.get_availability(room_id, date)
+        if if_none_match:
+            etag = controller.get_availability_etag(room_id, date)
+            if _etag_matches(if_none_match, etag):
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+                )
+
+        availability, etag = controller.get_availability(room_id, date)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    response.headers["ETag"] = etag
+    return availability
+
+
+@router.get("/{room_id}/availability/range", response_model=AvailabilityRangeResponse)
+def get_room_availability_range(
+    room_id: int,
+    date_from: str = Query(
+        ..., alias="from", description="Fecha inicial en formato YYYY-MM-DD"
+    ),
+    date_to: str = Query(
+        ..., alias="to", description="Fecha final (incluida) en formato YYYY-MM-DD"
+    ),
+    controller: RoomController = Depends(get_controller),
+):
+    """
+    Obtiene la disponibilidad de una sala para varios días en una sola llamada.
+
+    Retorna, por cada fecha del rango, las horas libres. Comparte el caché
+    por día con `/availability` y calcula los días que faltan con una sola
+    consulta.
+
+    - **from**: Primera fecha (ej: 2025-02-17)
+    - **to**: Última fecha, incluida (ej: 2025-02-23). Máximo 92 días.
+    """
+    try:
+        return controller.get_availability_range(room_id, date_from, date_to)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
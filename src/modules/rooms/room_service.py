@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, timedelta
 from typing import List
 
 from sqlalchemy.orm import Session
@@ -6,6 +6,13 @@ from sqlalchemy.orm import Session
 from src.modules.rooms.room_model import Room
 from src.modules.rooms.room_repository import RoomRepository
 from src.shared.cache.cache_service import get_cache
+from src.shared.config.settings import get_settings
+
+# Máximo de días que se pueden pedir en una consulta de disponibilidad por rango
+MAX_AVAILABILITY_RANGE_DAYS = 92
+
+# Máximo de salas que puede seguir un mismo stream de disponibilidad
+MAX_STREAM_ROOMS = 50
 
 
 class RoomService:
@@ -77,6 +84,26 @@ class RoomService:
             raise ValueError(f"No se encontró la sala con ID {room_id}")
         return room
 
+    def get_room_data(self, room_id: int) -> dict:
+        """
+        Obtiene los datos de una sala usando caché.
+
+        Args:
+            room_id: ID de la sala
+
+        Returns:
+            Dict con los campos de la sala
+
+        Raises:
+            ValueError: Si la sala no existe
+        """
+        cache_key = self.cache.get_cache_key("room", str(room_id))
+        return self.cache.get_or_set(
+            cache_key,
+            lambda: self._room_to_dict(self.get_room_by_id(room_id)),
+            tags=[f"room:{room_id}"],
+        )
+
     def get_all_rooms(self) -> List[Room]:
         """
         Retorna todas las salas.
@@ -86,6 +113,58 @@ class RoomService:
         """
         return self.repository.get_all()
 
+    def get_all_rooms_data(self) -> List[dict]:
+        """
+        Retorna los datos de todas las salas usando caché.
+
+        Returns:
+            Lista de dicts con los campos de cada sala
+        """
+        cache_key = self.cache.get_cache_key("rooms", "all")
+        return self.cache.get_or_set(
+            cache_key,
+            lambda: [self._room_to_dict(room) for room in self.get_all_rooms()],
+            tags=["rooms"],
+        )
+
+    def search_available_rooms(
+        self, target_date: date, start_hour: int, end_hour: int, min_capacity: int = 1
+    ) -> List[Room]:
+        """
+        Busca las salas que se pueden reservar en un horario.
+
+        Reglas:
+        - startHour < endHour, ambas entre 0 y 23
+        - Solo salas activas con capacidad >= min_capacity
+        - Ninguna reserva de la sala se cruza con [start_hour, end_hour)
+
+        Args:
+            target_date: Fecha a consultar
+            start_hour: Hora de inicio
+            end_hour: Hora de fin
+            min_capacity: Número de personas
+
+        Returns:
+            Salas libres, primero las de capacidad más ajustada
+
+        Raises:
+            ValueError: Si las horas o la capacidad no son válidas
+        """
+        from src.modules.reservations.occupancy_model import hours_mask
+
+        if start_hour >= end_hour:
+            raise ValueError("La hora de inicio debe ser menor que la hora de fin")
+
+        if not (0 <= start_hour <= 23) or not (0 <= end_hour <= 23):
+            raise ValueError("Las horas deben estar entre 0 y 23")
+
+        if min_capacity < 1:
+            raise ValueError("La capacidad debe ser al menos 1 persona")
+
+        return self.repository.search_free(
+            target_date, hours_mask(start_hour, end_hour), min_capacity
+        )
+
     def update_room(
         self, room_id: int, nombre: str, capacidad: int, ubicacion: str, activa: bool
     ) -> Room:
@@ -124,6 +203,8 @@ class RoomService:
         room.ubicacion = ubicacion
         room.activa = activa
 
+        # Al confirmar se purga todo lo que depende de la sala (datos, lista
+        # y disponibilidad), ver src/shared/cache/cache_invalidation.py
         return self.repository.update(room)
 
     def delete_room(self, room_id: int) -> None:
@@ -139,17 +220,15 @@ class RoomService:
         Raises:
             ValueError: Si la sala tiene reservas futuras
         """
-        from datetime import date
-
-        from src.modules.reservations.reservation_model import Reservation
+        from src.modules.reservations.reservation_repository import (
+            ReservationRepository,
+        )
 
         room = self.get_room_by_id(room_id)
 
         # Verificar si tiene reservas futuras
-        future_reservations = (
-            self.db.query(Reservation)
-            .filter(Reservation.room_id == room_id, Reservation.date >= date.today())
-            .count()
+        future_reservations = ReservationRepository(self.db).count_from_date(
+            room_id, date.today()
         )
 
         if future_reservations > 0:
@@ -163,52 +242,226 @@ class RoomService:
         """
         Obtiene la disponibilidad de una sala en una fecha.
 
-        Utiliza caché para optimizar consultas repetidas.
+        Utiliza caché para optimizar consultas repetidas. Si está activado
+        el modo stale-while-revalidate (`availability_cache_soft_ttl`), un
+        valor viejo se devuelve al instante y se recalcula en segundo plano.
 
         Args:
             room_id: ID de la sala
             target_date: Fecha a consultar
 
         Returns:
-            Dict con roomId, date, freeSlots
+            Dict con roomId, date, freeSlots y version
         """
-        from src.modules.reservations.reservation_model import Reservation
-
-        # Verificar caché
+        settings = get_settings()
+        soft_ttl = settings.availability_cache_soft_ttl or None
+
+        def loader():
+            if soft_ttl:
+                # El recálculo puede correr en segundo plano, cuando la sesión
+                # de esta petición ya se cerró: usar una sesión propia
+                return self._compute_availability_in_new_session(room_id, target_date)
+            return self._compute_availability(room_id, target_date)
+
+        # Verificar caché (si varias peticiones fallan a la vez en la misma
+        # clave, solo una ejecuta el cálculo y el resto espera su resultado)
         cache_key = self.cache.get_cache_key(
             "availability", str(room_id), str(target_date)
         )
-        cached_data = self.cache.get(cache_key)
+        return self.cache.get_or_set(
+            cache_key,
+            loader,
+            ttl=settings.availability_cache_ttl,
+            soft_ttl=soft_ttl,
+            tags=[f"room:{room_id}", f"date:{target_date}"],
+        )
+
+    def get_availability_version(self, room_id: int, target_date: date) -> int:
+        """
+        Versión actual de la disponibilidad de una sala en una fecha.
+
+        Es una búsqueda por clave primaria (más los datos de la sala, que
+        están en caché): permite responder 304 sin recalcular nada.
+
+        Args:
+            room_id: ID de la sala
+            target_date: Fecha a consultar
+
+        Returns:
+            Versión del día (0 si nunca tuvo reservas)
+
+        Raises:
+            ValueError: Si la sala no existe o no está activa
+        """
+        from src.modules.reservations.reservation_repository import (
+            ReservationRepository,
+        )
 
-        if cached_data:
-            return cached_data
+        if not self.get_room_data(room_id)["activa"]:
+            raise ValueError("La sala no está activa")
+
+        return ReservationRepository(self.db).get_occupancy(room_id, target_date)[1]
+
+    def get_availability_range(
+        self, room_id: int, date_from: date, date_to: date
+    ) -> dict:
+        """
+        Obtiene la disponibilidad de una sala en un rango de fechas.
+
+        Reutiliza las mismas entradas de caché por día que get_availability:
+        las que ya están se leen en bloque y los días que faltan se calculan
+        con una sola consulta y se guardan también en bloque.
+
+        Args:
+            room_id: ID de la sala
+            date_from: Primera fecha (incluida)
+            date_to: Última fecha (incluida)
+
+        Returns:
+            Dict con roomId, from, to y days (fecha -> horas libres)
+
+        Raises:
+            ValueError: Si el rango no es válido o la sala no existe o no está activa
+        """
+        if date_from > date_to:
+            raise ValueError("La fecha inicial debe ser anterior o igual a la final")
+
+        total_days = (date_to - date_from).days + 1
+        if total_days > MAX_AVAILABILITY_RANGE_DAYS:
+            raise ValueError(
+                f"El rango no puede superar {MAX_AVAILABILITY_RANGE_DAYS} días"
+            )
+
+        days = [date_from + timedelta(days=offset) for offset in range(total_days)]
+        keys = {
+            self.cache.get_cache_key("availability", str(room_id), str(day)): day
+            for day in days
+        }
+
+        def loader(missing_keys: List[str]) -> dict:
+            missing_days = [keys[key] for key in missing_keys]
+            occupancy = self._load_occupancy_range(
+                room_id, min(missing_days), max(missing_days)
+            )
+            return {
+                key: self._availability_from_mask(
+                    room_id, keys[key], *occupancy.get(keys[key], (0, 0))
+                )
+                for key in missing_keys
+            }
+
+        settings = get_settings()
+        values = self.cache.get_or_set_many(
+            keys,
+            loader,
+            ttl=settings.availability_cache_ttl,
+            soft_ttl=settings.availability_cache_soft_ttl or None,
+            tags={key: [f"room:{room_id}", f"date:{day}"] for key, day in keys.items()},
+        )
+
+        return {
+            "roomId": room_id,
+            "from": str(date_from),
+            "to": str(date_to),
+            "days": {str(day): values[key]["freeSlots"] for key, day in keys.items()},
+        }
+
+    def _compute_availability_in_new_session(
+        self, room_id: int, target_date: date
+    ) -> dict:
+        """
+        Calcula la disponibilidad con una sesión de BD independiente.
+
+        Args:
+            room_id: ID de la sala
+            target_date: Fecha a consultar
+
+        Returns:
+            Dict con roomId, date, freeSlots y version
+        """
+        with Session(bind=self.db.get_bind()) as db:
+            return RoomService(db)._compute_availability(room_id, target_date)
+
+    def _compute_availability(self, room_id: int, target_date: date) -> dict:
+        """
+        Calcula la disponibilidad de una sala consultando la BD (sin caché).
+
+        Args:
+            room_id: ID de la sala
+            target_date: Fecha a consultar
+
+        Returns:
+            Dict con roomId, date, freeSlots y version
+
+        Raises:
+            ValueError: Si la sala no existe o no está activa
+        """
+        from src.modules.reservations.reservation_repository import (
+            ReservationRepository,
+        )
 
         # Verificar que la sala existe y está activa
         room = self.get_room_by_id(room_id)
         if not room.activa:
             raise ValueError("La sala no está activa")
 
-        # Obtener reservas de ese día
-        reservations = (
-            self.db.query(Reservation)
-            .filter(Reservation.room_id == room_id, Reservation.date == target_date)
-            .all()
+        # Horas ocupadas del día (bitmap de ocupación, sin cargar reservas)
+        mask, version = ReservationRepository(self.db).get_occupancy(
+            room_id, target_date
         )
+        return self._availability_from_mask(room_id, target_date, mask, version)
 
-        # Calcular slots ocupados
-        occupied_hours = set()
-        for reservation in reservations:
-            for hour in range(reservation.start_hour, reservation.end_hour):
-                occupied_hours.add(hour)
+    def _load_occupancy_range(
+        self, room_id: int, date_from: date, date_to: date
+    ) -> dict:
+        """
+        Bitmaps y versiones de un rango en una sola consulta (sin caché).
 
-        # Slots disponibles (asumimos horario de 8 a 20)
-        all_hours = set(range(8, 20))
-        free_slots = sorted(list(all_hours - occupied_hours))
+        Raises:
+            ValueError: Si la sala no existe o no está activa
+        """
+        from src.modules.reservations.reservation_repository import (
+            ReservationRepository,
+        )
 
-        # Preparar resultado
-        result = {"roomId": room_id, "date": str(target_date), "freeSlots": free_slots}
+        room = self.get_room_by_id(room_id)
+        if not room.activa:
+            raise ValueError("La sala no está activa")
 
-        # Guardar en caché
-        self.cache.set(cache_key, result)
+        return ReservationRepository(self.db).get_occupancy_range(
+            room_id, date_from, date_to
+        )
+
+    @staticmethod
+    def _availability_from_mask(
+        room_id: int, target_date: date, mask: int, version: int
+    ) -> dict:
+        """
+        Dict de disponibilidad a partir del bitmap de ocupación del día.
+
+        Incluye la versión del día con la que se calculó, para el ETag.
+        """
+        from src.modules.reservations.occupancy_model import (
+            CLOSING_HOUR,
+            OPENING_HOUR,
+            free_hours,
+        )
 
-        return result
+        # Slots disponibles dentro del horario de apertura
+        return {
+            "roomId": room_id,
+            "date": str(target_date),
+            "freeSlots": free_hours(mask, OPENING_HOUR, CLOSING_HOUR),
+            "version": version,
+        }
+
+    @staticmethod
+    def _room_to_dict(room: Room) -> dict:
+        """Convierte una sala en un dict serializable para el caché."""
+        return {
+            "id": room.id,
+            "nombre": room.nombre,
+            "capacidad": room.capacidad,
+            "ubicacion": room.ubicacion,
+            "activa": room.activa,
+        }
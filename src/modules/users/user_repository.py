@@ -1,8 +1,10 @@
-from typing import List, Optional
+from typing import Iterable, List, Optional, Set
 
 from sqlalchemy.orm import Session
 
 from src.modules.users.user_model import User
+from src.shared.cache.cache_service import get_cache
+from src.shared.config.settings import get_settings
 
 
 class UserRepository:
@@ -19,6 +21,8 @@ class UserRepository:
             db: Sesión de SQLAlchemy
         """
         self.db = db
+        self.cache = get_cache()
+        self.negative_ttl = get_settings().negative_cache_ttl
 
     def create(self, nombre: str, email: str) -> User:
         """
@@ -41,13 +45,43 @@ class UserRepository:
         """
         Busca un usuario por su ID.
 
+        Los IDs inexistentes se recuerdan durante `negative_cache_ttl`
+        segundos para no repetir la consulta; la entrada se invalida cuando
+        se crea un usuario con ese ID.
+
         Args:
             user_id: ID del usuario
 
         Returns:
             Usuario encontrado o None
         """
-        return self.db.query(User).filter(User.id == user_id).first()
+        missing_key = self.cache.get_cache_key("missing", "user", user_id)
+        if self.negative_ttl and self.cache.get(missing_key) is not None:
+            return None
+
+        user = self.db.query(User).filter(User.id == user_id).first()
+        if user is None and self.negative_ttl:
+            # El tag "user:{id}" se invalida al insertar la fila (eventos del ORM)
+            self.cache.set(
+                missing_key, True, ttl=self.negative_ttl, tags=[f"user:{user_id}"]
+            )
+        return user
+
+    def get_existing_ids(self, user_ids: Iterable[int]) -> Set[int]:
+        """
+        Indica cuáles de varios IDs existen, con una sola consulta IN.
+
+        Args:
+            user_ids: IDs a comprobar
+
+        Returns:
+            Conjunto con los IDs que existen
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return set()
+        rows = self.db.query(User.id).filter(User.id.in_(user_ids))
+        return {user_id for (user_id,) in rows}
 
     def get_by_email(self, email: str) -> Optional[User]:
         """
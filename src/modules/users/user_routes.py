@@ -3,8 +3,11 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from src.modules.users.user_controller import (UserController,
-                                               UserCreateRequest, UserResponse)
+from src.modules.users.user_controller import (
+    UserController,
+    UserCreateRequest,
+    UserResponse,
+)
 from src.modules.users.user_service import UserService
 from src.shared.database.connection import get_db
 
@@ -0,0 +1,67 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher:
+    """
+    Ejecuta recálculos de caché en segundo plano.
+
+    Se usa en el modo stale-while-revalidate: la petición recibe el valor
+    viejo al instante y el recálculo se programa aquí. Solo se programa un
+    recálculo por clave a la vez; los errores se registran y no afectan a
+    la petición que lo disparó.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        """
+        Args:
+            max_workers: Número máximo de recálculos simultáneos
+        """
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def schedule(self, key: str, fn: Callable[[], Any]) -> bool:
+        """
+        Programa `fn` en segundo plano si no hay ya un recálculo de `key`.
+
+        Args:
+            key: Clave que se está recalculando
+            fn: Función sin argumentos que recalcula y guarda el valor
+
+        Returns:
+            True si se programó, False si ya había uno en curso
+        """
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="cache-refresh"
+                )
+
+        def _run():
+            try:
+                fn()
+            except Exception:
+                logger.exception("Error recalculando la clave de caché %s", key)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+        self._executor.submit(_run)
+        return True
+
+    def wait(self) -> None:
+        """Espera a que terminen los recálculos en curso (útil en tests)."""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True)
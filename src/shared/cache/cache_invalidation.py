@@ -0,0 +1,101 @@
+from typing import Dict, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from src.shared.cache.cache_service import get_cache
+
+# Clave en session.info donde se acumulan las invalidaciones pendientes
+_PENDING_KEY = "cache_invalidation"
+
+
+def _pending(session: Session) -> Dict[str, Set[str]]:
+    """Retorna (creándolas si hace falta) las invalidaciones pendientes de la sesión."""
+    return session.info.setdefault(_PENDING_KEY, {"keys": set(), "tags": set()})
+
+
+def _history_values(obj, attribute: str) -> Set:
+    """Valores actuales y anteriores (si cambió en este flush) de un atributo."""
+    history = inspect(obj).attrs[attribute].history
+    values = set(history.unchanged) | set(history.added) | set(history.deleted)
+    if not values:
+        values.add(getattr(obj, attribute))
+    return values
+
+
+def _collect_reservation(obj, pending: Dict[str, Set[str]]) -> None:
+    """Disponibilidad afectada por una reserva (incluida su sala/fecha anterior)."""
+    for room_id in _history_values(obj, "room_id"):
+        for reservation_date in _history_values(obj, "date"):
+            pending["keys"].add(f"availability:{room_id}:{reservation_date}")
+
+
+def _collect_room(obj, pending: Dict[str, Set[str]]) -> None:
+    """Todo lo que depende de una sala (datos, lista y disponibilidad)."""
+    pending["tags"].add("rooms")
+    if obj.id is not None:
+        pending["tags"].add(f"room:{obj.id}")
+
+
+def _collect_user(obj, pending: Dict[str, Set[str]]) -> None:
+    """Entradas que dependen de un usuario (ej: su caché negativo)."""
+    if obj.id is not None:
+        pending["tags"].add(f"user:{obj.id}")
+
+
+# Tabla -> función que deriva qué invalidar a partir de la fila modificada
+_COLLECTORS = {
+    "reservations": _collect_reservation,
+    "rooms": _collect_room,
+    "users": _collect_user,
+}
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    """Acumula las claves/tags afectados por las filas escritas en el flush."""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        collector = _COLLECTORS.get(getattr(obj, "__tablename__", None))
+        if collector is not None:
+            collector(obj, _pending(session))
+
+
+def _after_commit(session: Session) -> None:
+    """Aplica las invalidaciones solo cuando el commit tuvo éxito."""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    cache = get_cache()
+    # Todas las claves de la transacción en una sola operación (un viaje a
+    # Redis y un solo aviso pub/sub aunque se reserven muchos días)
+    cache.delete_many(pending["keys"])
+    for tag in pending["tags"]:
+        cache.invalidate_tag(tag)
+
+
+def _after_rollback(session: Session) -> None:
+    """Descarta las invalidaciones de una transacción que no se confirmó."""
+    session.info.pop(_PENDING_KEY, None)
+
+
+def register_cache_invalidation(session_cls=Session) -> None:
+    """
+    Engancha la invalidación automática del caché a los eventos del ORM.
+
+    Tras cada flush se anotan las claves de caché afectadas por las
+    reservas, salas y usuarios creados, modificados o eliminados; se
+    invalidan en after_commit (nunca antes de que el cambio sea visible) y
+    se descartan si la transacción hace rollback. Así ningún servicio tiene que acordarse
+    de invalidar a mano.
+
+    Nota: las operaciones masivas (query.update/delete, insert de Core) no
+    pasan por la unidad de trabajo y no se detectan aquí.
+
+    Args:
+        session_cls: Clase de sesión a instrumentar (por defecto todas)
+    """
+    if event.contains(session_cls, "after_flush", _after_flush):
+        return
+    event.listen(session_cls, "after_flush", _after_flush)
+    event.listen(session_cls, "after_commit", _after_commit)
+    event.listen(session_cls, "after_rollback", _after_rollback)
@@ -0,0 +1,185 @@
+import bisect
+import threading
+from typing import Dict, List, Optional
+
+# Límites superiores (en segundos) de los buckets de los histogramas de latencia
+LATENCY_BUCKETS = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+)
+
+COUNTERS = ("hits", "misses", "expirations", "evictions", "sets")
+
+
+class _Histogram:
+    """Histograma acumulativo de latencias con buckets fijos."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # el último es +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        """Cuentas acumuladas por bucket (formato Prometheus)."""
+        total = 0
+        result = []
+        for count in self.buckets:
+            total += count
+            result.append(total)
+        return result
+
+
+class CacheMetrics:
+    """
+    Métricas de un servicio de caché.
+
+    Lleva, por namespace (el prefijo de la clave construida con
+    get_cache_key, ej: "availability"), contadores de aciertos, fallos,
+    expiraciones, expulsiones y escrituras, y un histograma de latencia
+    para get y set.
+
+    Uso:
+        metrics = CacheMetrics()
+        metrics.incr("availability:5:2025-02-19", "hits")
+        metrics.observe("availability:5:2025-02-19", "get", 0.00002)
+        print(metrics.to_prometheus())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._latency: Dict[str, Dict[str, _Histogram]] = {}
+
+    @staticmethod
+    def namespace(key: str) -> str:
+        """Namespace de una clave: el primer componente antes de ':'."""
+        return key.split(":", 1)[0]
+
+    def incr(self, key: str, counter: str, amount: int = 1) -> None:
+        """
+        Incrementa un contador del namespace de la clave.
+
+        Args:
+            key: Clave de caché (o directamente el namespace)
+            counter: Uno de COUNTERS
+            amount: Cantidad a sumar
+        """
+        namespace = self.namespace(key)
+        with self._lock:
+            counters = self._counters.get(namespace)
+            if counters is None:
+                counters = self._counters[namespace] = dict.fromkeys(COUNTERS, 0)
+            counters[counter] += amount
+
+    def observe(self, key: str, operation: str, seconds: float) -> None:
+        """
+        Registra la latencia de una operación.
+
+        Args:
+            key: Clave de caché
+            operation: "get" o "set"
+            seconds: Duración en segundos
+        """
+        namespace = self.namespace(key)
+        with self._lock:
+            histograms = self._latency.setdefault(namespace, {})
+            histogram = histograms.get(operation)
+            if histogram is None:
+                histogram = histograms[operation] = _Histogram()
+            histogram.observe(seconds)
+
+    def snapshot(self) -> dict:
+        """
+        Copia de las métricas actuales.
+
+        Returns:
+            Dict {namespace: {contadores..., "latency": {op: {...}}}}
+        """
+        with self._lock:
+            namespaces = set(self._counters) | set(self._latency)
+            result = {}
+            for namespace in sorted(namespaces):
+                data = dict(self._counters.get(namespace, dict.fromkeys(COUNTERS, 0)))
+                data["latency"] = {
+                    operation: {
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "buckets": dict(
+                            zip(
+                                [str(b) for b in LATENCY_BUCKETS] + ["+Inf"],
+                                histogram.cumulative(),
+                            )
+                        ),
+                    }
+                    for operation, histogram in self._latency.get(namespace, {}).items()
+                }
+                result[namespace] = data
+            return result
+
+    def to_prometheus(
+        self, size: Optional[int] = None, size_bytes: Optional[int] = None
+    ) -> str:
+        """
+        Exporta las métricas en el formato de texto de Prometheus.
+
+        Args:
+            size: Número de claves actual (se omite si es None)
+            size_bytes: Tamaño aproximado en bytes (se omite si es None)
+
+        Returns:
+            Texto listo para servir en /metrics
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        for counter in COUNTERS:
+            name = f"bookme_cache_{counter}_total"
+            lines.append(f"# TYPE {name} counter")
+            for namespace, data in snapshot.items():
+                lines.append(f'{name}{{namespace="{namespace}"}} {data[counter]}')
+
+        for operation in ("get", "set"):
+            name = f"bookme_cache_{operation}_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for namespace, data in snapshot.items():
+                histogram = data["latency"].get(operation)
+                if histogram is None:
+                    continue
+                for bound, count in histogram["buckets"].items():
+                    lines.append(
+                        f'{name}_bucket{{namespace="{namespace}",le="{bound}"}} {count}'
+                    )
+                lines.append(
+                    f'{name}_sum{{namespace="{namespace}"}} {histogram["sum"]}'
+                )
+                lines.append(
+                    f'{name}_count{{namespace="{namespace}"}} {histogram["count"]}'
+                )
+
+        if size is not None:
+            lines.append("# TYPE bookme_cache_entries gauge")
+            lines.append(f"bookme_cache_entries {size}")
+        if size_bytes is not None:
+            lines.append("# TYPE bookme_cache_bytes gauge")
+            lines.append(f"bookme_cache_bytes {size_bytes}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Pone todas las métricas a cero."""
+        with self._lock:
+            self._counters.clear()
+            self._latency.clear()
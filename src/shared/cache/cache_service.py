@@ -1,5 +1,177 @@
-from datetime import datetime, timedelta
-from typing import Any, Optional
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from src.shared.cache.background_refresher import BackgroundRefresher
+from src.shared.cache.cache_metrics import CacheMetrics
+from src.shared.cache.redis_cache_service import RedisCacheService
+from src.shared.cache.single_flight import SingleFlight
+from src.shared.config.settings import get_settings
+
+if TYPE_CHECKING:
+    from src.shared.cache.tiered_cache_service import TieredCacheService
+
+
+def _estimate_size(value: Any) -> int:
+    """
+    Estima (aproximadamente) los bytes que ocupa un valor en memoria.
+
+    Recorre contenedores básicos (dict, list, tuple, set) sumando el tamaño
+    de sus elementos. No pretende ser exacto, solo servir de presupuesto.
+
+    Args:
+        value: Valor a medir
+
+    Returns:
+        Tamaño aproximado en bytes
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_estimate_size(item) for item in value)
+    return size
+
+
+class _TagIndex:
+    """
+    Índice inverso tag -> claves.
+
+    Permite invalidar todas las claves de un tag en O(claves con ese tag)
+    sin recorrer el caché completo.
+    """
+
+    def __init__(self):
+        self._keys_by_tag: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, tags: Tuple[str, ...]) -> None:
+        """Asocia una clave a sus tags."""
+        with self._lock:
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+
+    def discard(self, key: str, tags: Tuple[str, ...]) -> None:
+        """Quita una clave de sus tags (al borrarse o expulsarse)."""
+        with self._lock:
+            for tag in tags:
+                keys = self._keys_by_tag.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._keys_by_tag[tag]
+
+    def pop(self, tag: str) -> Set[str]:
+        """Retorna y olvida las claves asociadas a un tag."""
+        with self._lock:
+            return self._keys_by_tag.pop(tag, set())
+
+    def clear(self) -> None:
+        """Vacía el índice."""
+        with self._lock:
+            self._keys_by_tag.clear()
+
+
+class _Shard:
+    """
+    Porción independiente del caché, con su propio lock y orden LRU.
+
+    Repartir las claves entre varios shards evita que todos los hilos del
+    threadpool compitan por un único lock.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        tag_index: _TagIndex,
+        metrics: CacheMetrics,
+    ):
+        # key -> (valor, expiración, tamaño aproximado, expiración blanda, tags).
+        # Las expiraciones son instantes de time.monotonic(). Orden = uso (LRU).
+        self.entries: (
+            "OrderedDict[str, tuple[Any, float, int, Optional[float], tuple]]"
+        ) = OrderedDict()
+        self.lock = threading.RLock()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.tag_index = tag_index
+        self.metrics = metrics
+
+    def get_entry(self, key: str, now: float) -> Optional[tuple]:
+        """Retorna la entrada si existe y no expiró, marcándola como usada."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            # Verificar si expiró
+            if now > entry[1]:
+                self.remove(key)
+                self.metrics.incr(key, "expirations")
+                return None
+
+            # Marcar como usada recientemente
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: tuple) -> None:
+        """Guarda una entrada y expulsa LRU si se superan los límites."""
+        with self.lock:
+            self.remove(key)
+            self.entries[key] = entry
+            self.current_bytes += entry[2]
+            if entry[4]:
+                self.tag_index.add(key, entry[4])
+            while self.entries and (
+                len(self.entries) > self.max_entries
+                or self.current_bytes > self.max_bytes
+            ):
+                evicted_key, evicted = self.entries.popitem(last=False)
+                self.current_bytes -= evicted[2]
+                if evicted[4]:
+                    self.tag_index.discard(evicted_key, evicted[4])
+                self.metrics.incr(evicted_key, "evictions")
+
+    def remove(self, key: str) -> bool:
+        """Elimina una clave actualizando el contador de bytes."""
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                return False
+            self.current_bytes -= entry[2]
+            if entry[4]:
+                self.tag_index.discard(key, entry[4])
+            return True
+
+    def purge_expired(self, now: float) -> int:
+        """Elimina las entradas expiradas del shard."""
+        with self.lock:
+            expired = [key for key, entry in self.entries.items() if entry[1] < now]
+            for key in expired:
+                self.remove(key)
+                self.metrics.incr(key, "expirations")
+        return len(expired)
+
+    def clear(self) -> None:
+        """Vacía el shard."""
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
 
 
 class CacheService:
@@ -9,18 +181,83 @@ class CacheService:
     Almacena temporalmente datos para evitar recalcular o consultar la BD.
     En producción, esto podría cambiarse a Redis.
 
+    El caché está acotado:
+    - max_entries: número máximo de claves
+    - max_bytes: presupuesto aproximado de memoria
+    Cuando se supera alguno de los dos límites se expulsan las claves
+    menos usadas recientemente (LRU). Opcionalmente, un hilo en segundo
+    plano elimina las entradas expiradas cada `sweep_interval` segundos.
+
+    Es seguro entre hilos (las rutas síncronas de FastAPI corren en un
+    threadpool): las claves se reparten en `shards` porciones, cada una con
+    su lock y su LRU, y los límites se dividen entre ellas. Las expiraciones
+    usan time.monotonic(), que no salta con cambios del reloj del sistema.
+
+    Stale-while-revalidate: si se guarda con `soft_ttl`, pasado ese tiempo
+    get_or_set() sigue devolviendo el valor (hasta el TTL duro) y programa
+    un único recálculo en segundo plano. delete() invalida siempre en duro.
+
+    Tags: set() acepta tags (ej: "room:5", "date:2025-02-19") e
+    invalidate_tag() borra todas las claves que los llevan.
+
+    Métricas: `metrics` (CacheMetrics) cuenta aciertos, fallos,
+    expiraciones, expulsiones y escrituras por namespace, con histogramas
+    de latencia de get/set.
+
     Uso:
         cache = CacheService()
         cache.set("availability:5:2025-02-19", {"slots": [8,9,10]})
         data = cache.get("availability:5:2025-02-19")
     """
 
-    def __init__(self):
-        """Inicializa el caché como un diccionario en memoria."""
-        self._cache: dict[str, tuple[Any, datetime]] = {}
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        sweep_interval: Optional[float] = None,
+        shards: int = 16,
+    ):
+        """
+        Inicializa el caché como un conjunto de diccionarios ordenados en memoria.
+
+        Args:
+            max_entries: Número máximo de claves almacenadas
+            max_bytes: Tamaño aproximado máximo en bytes
+            sweep_interval: Segundos entre barridos de expirados (None = sin barrido)
+            shards: Número de porciones con lock independiente
+        """
         self._default_ttl = 3600  # 1 hora en segundos
+        self._tag_index = _TagIndex()
+        self.metrics = CacheMetrics()
+        # Nunca más shards que claves: cada shard guarda al menos una y la
+        # suma de sus límites es exactamente max_entries / max_bytes
+        shards = max(1, min(shards, max_entries))
+        self._shards = [
+            _Shard(entries, size, self._tag_index, self.metrics)
+            for entries, size in zip(
+                _split(max_entries, shards), _split(max_bytes, shards)
+            )
+        ]
+        self._flight = SingleFlight()
+        self._refresher = BackgroundRefresher()
+
+        # Cálculos en curso: key -> [[invalidada_durante_el_cálculo, tags], ...]
+        self._inflight: Dict[str, List[list]] = {}
+        self._inflight_lock = threading.Lock()
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        if sweep_interval:
+            self.start_sweeper(sweep_interval)
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+    ) -> None:
         """
         Guarda un valor en el caché.
 
@@ -28,9 +265,20 @@ class CacheService:
             key: Identificador único (ej: "availability:5:2025-02-19")
             value: Datos a guardar (dict, list, str, etc.)
             ttl: Tiempo de vida en segundos (None = usar default)
+            soft_ttl: Segundos tras los que el valor se considera viejo
+                y get_or_set() lo recalcula en segundo plano (None = nunca)
+            tags: Etiquetas para invalidar en grupo (ej: ["room:5"])
         """
-        expiration = datetime.now() + timedelta(seconds=ttl or self._default_ttl)
-        self._cache[key] = (value, expiration)
+        started = time.perf_counter()
+        now = time.monotonic()
+        expiration = now + (ttl or self._default_ttl)
+        soft_expiration = now + soft_ttl if soft_ttl else None
+        size = _estimate_size(key) + _estimate_size(value)
+        tags = tuple(tags) if tags else ()
+
+        self._shard(key).put(key, (value, expiration, size, soft_expiration, tags))
+        self.metrics.incr(key, "sets")
+        self.metrics.observe(key, "set", time.perf_counter() - started)
 
     def get(self, key: str) -> Optional[Any]:
         """
@@ -42,17 +290,139 @@ class CacheService:
         Returns:
             El valor guardado, o None si no existe o expiró
         """
-        if key not in self._cache:
-            return None
+        entry = self._lookup(key, time.monotonic())
+        return entry[0] if entry is not None else None
+
+    def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+    ) -> Any:
+        """
+        Recupera un valor o lo calcula y guarda si no está en caché.
+
+        Si varios hilos fallan a la vez en la misma clave, solo uno ejecuta
+        `loader`; el resto espera su resultado.
+
+        Con `soft_ttl`, un valor viejo (pero no expirado) se devuelve al
+        instante y se programa un recálculo en segundo plano. Ese recálculo
+        solo se guarda si la entrada no fue invalidada mientras tanto.
+
+        Si la clave (o uno de sus tags) se invalida mientras `loader` se
+        ejecuta, el resultado se devuelve pero no se guarda: pudo leer la BD
+        antes del cambio que provocó la invalidación. Un resultado None
+        tampoco se guarda (get() lo trataría como ausente).
+
+        Args:
+            key: Identificador único
+            loader: Función sin argumentos que calcula el valor
+            ttl: Tiempo de vida en segundos (None = usar default)
+            soft_ttl: Segundos hasta que el valor se considera viejo
+            tags: Etiquetas para invalidar en grupo
+
+        Returns:
+            El valor (de caché o recién calculado)
+        """
+        now = time.monotonic()
+        entry = self._lookup(key, now)
+        if entry is not None:
+            soft_expiration = entry[3]
+            if soft_expiration is not None and now > soft_expiration:
+                self._schedule_refresh(key, entry, loader, ttl, soft_ttl)
+            return entry[0]
+
+        def _load():
+            # Otro hilo pudo haberlo calculado mientras esperábamos turno
+            value = self.get(key)
+            if value is not None:
+                return value
+
+            pending = self._begin_load({key: tags})
+            try:
+                value = loader()
+            finally:
+                invalidated = self._end_load(pending)
+
+            if key not in invalidated and value is not None:
+                self.set(key, value, ttl, soft_ttl, tags)
+            return value
+
+        return self._flight.do(key, _load)
+
+    def get_or_set_many(
+        self,
+        keys: Iterable[str],
+        loader: Callable[[List[str]], Dict[str, Any]],
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None,
+        tags: Optional[Dict[str, Iterable[str]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Recupera varias claves y calcula de una vez solo las que faltan.
+
+        Igual que get_or_set(), un valor cuya clave (o tag) se invalida
+        mientras `loader` se ejecuta se devuelve pero no se guarda.
+
+        Args:
+            keys: Claves a consultar
+            loader: Función que recibe la lista de claves que faltan y
+                retorna un dict clave -> valor con todas ellas
+            ttl: Tiempo de vida en segundos (None = usar default)
+            soft_ttl: Segundos hasta que el valor se considera viejo
+            tags: Dict clave -> etiquetas de esa clave
+
+        Returns:
+            Dict clave -> valor (de caché o recién calculado)
+        """
+        keys = list(keys)
+        result = self.get_many(keys)
+        missing = [key for key in keys if key not in result]
+        if not missing:
+            return result
+
+        tags = tags or {}
+        pending = self._begin_load({key: tags.get(key) for key in missing})
+        try:
+            loaded = loader(missing)
+        finally:
+            invalidated = self._end_load(pending)
+
+        for key in missing:
+            if key not in invalidated:
+                self.set(key, loaded[key], ttl, soft_ttl, tags.get(key))
+        result.update(loaded)
+        return result
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Recupera varias claves de una vez.
+
+        Args:
+            keys: Claves a consultar
 
-        value, expiration = self._cache[key]
+        Returns:
+            Dict con solo las claves encontradas (y no expiradas)
+        """
+        result = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                result[key] = value
+        return result
 
-        # Verificar si expiró
-        if datetime.now() > expiration:
-            del self._cache[key]
-            return None
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """
+        Guarda varias claves de una vez.
 
-        return value
+        Args:
+            items: Dict clave -> valor
+            ttl: Tiempo de vida en segundos (None = usar default)
+        """
+        for key, value in items.items():
+            self.set(key, value, ttl)
 
     def delete(self, key: str) -> bool:
         """
@@ -64,14 +434,99 @@ class CacheService:
         Returns:
             True si se eliminó, False si no existía
         """
-        if key in self._cache:
-            del self._cache[key]
-            return True
-        return False
+        with self._inflight_lock:
+            for pending in self._inflight.get(key, ()):
+                pending[0] = True
+        return self._shard(key).remove(key)
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """
+        Elimina varias claves de una vez.
+
+        Args:
+            keys: Identificadores a eliminar
+
+        Returns:
+            Número de claves que existían
+        """
+        keys = set(keys)
+        with self._inflight_lock:
+            for key in keys:
+                for pending in self._inflight.get(key, ()):
+                    pending[0] = True
+        return sum(self._shard(key).remove(key) for key in keys)
+
+    def invalidate_tag(self, tag: str) -> List[str]:
+        """
+        Elimina todas las claves que llevan un tag.
+
+        Args:
+            tag: Etiqueta (ej: "room:5")
+
+        Returns:
+            Lista de claves eliminadas
+        """
+        with self._inflight_lock:
+            for loads in self._inflight.values():
+                for pending in loads:
+                    if tag in pending[1]:
+                        pending[0] = True
+        keys = self._tag_index.pop(tag)
+        return [key for key in keys if self.delete(key)]
 
     def clear(self) -> None:
         """Limpia todo el caché."""
-        self._cache.clear()
+        with self._inflight_lock:
+            for loads in self._inflight.values():
+                for pending in loads:
+                    pending[0] = True
+        for shard in self._shards:
+            shard.clear()
+        self._tag_index.clear()
+
+    def size(self) -> int:
+        """Retorna el número de claves almacenadas."""
+        return sum(len(shard.entries) for shard in self._shards)
+
+    def size_bytes(self) -> int:
+        """Retorna el tamaño aproximado del caché en bytes."""
+        return sum(shard.current_bytes for shard in self._shards)
+
+    def purge_expired(self) -> int:
+        """
+        Elimina todas las entradas expiradas.
+
+        Returns:
+            Número de entradas eliminadas
+        """
+        now = time.monotonic()
+        return sum(shard.purge_expired(now) for shard in self._shards)
+
+    def start_sweeper(self, interval: float) -> None:
+        """
+        Arranca el hilo que elimina entradas expiradas periódicamente.
+
+        Args:
+            interval: Segundos entre cada barrido
+        """
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+
+        self._stop_event.clear()
+
+        def _run():
+            while not self._stop_event.wait(interval):
+                self.purge_expired()
+
+        self._sweeper = threading.Thread(target=_run, name="cache-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        """Detiene el hilo de barrido si está activo."""
+        self._stop_event.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
 
     def get_cache_key(self, *parts: str) -> str:
         """
@@ -88,19 +543,146 @@ class CacheService:
         """
         return ":".join(str(part) for part in parts)
 
+    def size_snapshot(self) -> dict:
+        """Tamaño actual (claves y bytes aproximados) para las métricas."""
+        return {"entries": self.size(), "bytes": self.size_bytes()}
+
+    def _begin_load(self, keys: Dict[str, Optional[Iterable[str]]]) -> Dict[str, list]:
+        """
+        Registra claves que se van a calcular para detectar invalidaciones.
+
+        Args:
+            keys: Dict clave -> tags de la clave
+
+        Returns:
+            Registros a pasar a _end_load()
+        """
+        pending = {
+            key: [False, tuple(tags) if tags else ()] for key, tags in keys.items()
+        }
+        with self._inflight_lock:
+            for key, record in pending.items():
+                self._inflight.setdefault(key, []).append(record)
+        return pending
+
+    def _end_load(self, pending: Dict[str, list]) -> Set[str]:
+        """
+        Retira los registros de _begin_load().
+
+        Returns:
+            Claves invalidadas mientras se calculaban (no deben guardarse)
+        """
+        invalidated = set()
+        with self._inflight_lock:
+            for key, record in pending.items():
+                loads = [other for other in self._inflight[key] if other is not record]
+                self._inflight[key] = loads
+                if not loads:
+                    del self._inflight[key]
+                if record[0]:
+                    invalidated.add(key)
+        return invalidated
+
+    def _lookup(self, key: str, now: float) -> Optional[tuple]:
+        """Busca una entrada registrando acierto/fallo y latencia."""
+        started = time.perf_counter()
+        entry = self._shard(key).get_entry(key, now)
+        self.metrics.incr(key, "hits" if entry is not None else "misses")
+        self.metrics.observe(key, "get", time.perf_counter() - started)
+        return entry
+
+    def _shard(self, key: str) -> _Shard:
+        """Retorna el shard al que pertenece una clave."""
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _schedule_refresh(
+        self,
+        key: str,
+        entry: tuple,
+        loader: Callable[[], Any],
+        ttl: Optional[int],
+        soft_ttl: Optional[int],
+    ) -> None:
+        """Programa el recálculo en segundo plano de una entrada vieja."""
+        shard = self._shard(key)
+
+        def _refresh():
+            value = loader()
+            with shard.lock:
+                # Si la entrada se invalidó o reemplazó, el recálculo ya no vale
+                if shard.entries.get(key) is entry:
+                    self.set(key, value, ttl, soft_ttl, entry[4])
+
+        self._refresher.schedule(key, _refresh)
+
+
+def _split(total: int, parts: int) -> List[int]:
+    """Reparte `total` en `parts` enteros que suman exactamente `total`."""
+    size, remainder = divmod(total, parts)
+    return [size + 1 if index < remainder else size for index in range(parts)]
+
+
+def _build_redis_cache(settings) -> RedisCacheService:
+    """Construye el caché de Redis a partir de la configuración."""
+    return RedisCacheService(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.redis_db,
+        prefix=settings.cache_prefix,
+    )
+
 
 # Singleton: una sola instancia de caché para toda la app
-_cache_instance: Optional[CacheService] = None
+_cache_instance = None
+_cache_lock = threading.Lock()
 
 
-def get_cache() -> CacheService:
+def get_cache() -> Union[CacheService, RedisCacheService, "TieredCacheService"]:
     """
     Retorna la instancia global del servicio de caché.
 
+    El backend se elige con `settings.cache_backend`:
+    - "memory": CacheService (por proceso)
+    - "redis": RedisCacheService (compartido entre workers)
+    - "tiered": L1 en memoria + L2 en Redis (TieredCacheService)
+
     Returns:
-        Instancia singleton de CacheService
+        Instancia singleton del servicio de caché
     """
     global _cache_instance
-    if _cache_instance is None:
-        _cache_instance = CacheService()
+    if _cache_instance is not None:
+        return _cache_instance
+
+    # Dos peticiones del threadpool pueden llegar a la vez al arrancar: solo
+    # una construye el caché (y su listener)
+    with _cache_lock:
+        if _cache_instance is not None:
+            return _cache_instance
+
+        settings = get_settings()
+        if settings.cache_backend == "redis":
+            cache = _build_redis_cache(settings)
+        elif settings.cache_backend == "tiered":
+            from src.shared.cache.tiered_cache_service import TieredCacheService
+
+            cache = TieredCacheService(
+                l1=CacheService(
+                    max_entries=settings.cache_l1_max_entries,
+                    sweep_interval=settings.cache_sweep_interval,
+                ),
+                l2=_build_redis_cache(settings),
+                l1_ttl=settings.cache_l1_ttl,
+                channel=settings.cache_invalidation_channel,
+            )
+            cache.start_listener()
+        else:
+            cache = CacheService(
+                max_entries=settings.cache_max_entries,
+                max_bytes=settings.cache_max_bytes,
+                sweep_interval=settings.cache_sweep_interval,
+                shards=settings.cache_shards,
+            )
+        # Publicar la instancia solo cuando está lista (la lectura sin lock
+        # de arriba no debe ver un caché a medio construir)
+        _cache_instance = cache
     return _cache_instance
@@ -0,0 +1,553 @@
+import json
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import redis
+
+from src.shared.cache.background_refresher import BackgroundRefresher
+from src.shared.cache.cache_metrics import CacheMetrics
+from src.shared.cache.single_flight import SingleFlight
+
+# Los contadores de invalidación solo importan mientras hay un cálculo en
+# curso (acotado por lock_timeout), así que pueden expirar pronto
+_GENERATION_TTL = 300
+
+
+class RedisCacheService:
+    """
+    Servicio de caché respaldado por Redis.
+
+    Expone la misma interfaz que CacheService (get/set/delete/clear),
+    pero el almacenamiento es compartido por todos los workers, de modo
+    que una invalidación en un proceso la ven todos los demás.
+
+    Los valores se serializan como JSON compacto y todas las claves se
+    guardan bajo un prefijo para poder limpiar solo las de la aplicación.
+
+    Tags: cada tag es un set de Redis `tag:{tag}` con las claves que lo
+    llevan; invalidate_tag() las borra en un pipeline. El set vive tanto
+    como la más longeva de sus claves (EXPIRE NX/GT, Redis >= 7).
+
+    Cada delete()/invalidate_tag() incrementa un contador de generación
+    (`gen:{key}` / `gen:tag:{tag}`). get_or_set() solo guarda lo que calculó
+    si esos contadores no cambiaron durante el cálculo, de modo que un
+    cálculo que leyó la BD antes de un cambio no pisa la invalidación.
+
+    Stale-while-revalidate: con `soft_ttl` se guarda además una marca
+    `fresh:{key}` que expira antes que el valor. Si la marca ya no existe,
+    el primer worker que la vuelve a crear (SET NX) recalcula en segundo
+    plano; el resto sigue sirviendo el valor viejo.
+
+    Uso:
+        cache = RedisCacheService(host="localhost", port=6379)
+        cache.set("availability:5:2025-02-19", {"slots": [8,9,10]})
+        data = cache.get("availability:5:2025-02-19")
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        prefix: str = "bookme",
+        client: Optional[redis.Redis] = None,
+        lock_timeout: float = 10.0,
+        lock_wait: float = 5.0,
+    ):
+        """
+        Args:
+            host: Host del servidor Redis
+            port: Puerto del servidor Redis
+            db: Número de base de datos de Redis
+            prefix: Prefijo para todas las claves de la aplicación
+            client: Cliente ya construido (ej: fakeredis en tests)
+            lock_timeout: Segundos que dura como máximo el lock de cálculo
+            lock_wait: Segundos que se espera el resultado de otro worker
+        """
+        self._client = client or redis.Redis(host=host, port=port, db=db)
+        self._prefix = prefix
+        self._default_ttl = 3600  # 1 hora en segundos
+        self._lock_timeout = lock_timeout
+        self._lock_wait = lock_wait
+        self._flight = SingleFlight()
+        self._refresher = BackgroundRefresher()
+        self.metrics = CacheMetrics()
+
+    @property
+    def client(self) -> redis.Redis:
+        """Cliente de Redis subyacente (para pub/sub, locks, etc.)."""
+        return self._client
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Guarda un valor en Redis con expiración.
+
+        Args:
+            key: Identificador único (ej: "availability:5:2025-02-19")
+            value: Datos serializables a JSON
+            ttl: Tiempo de vida en segundos (None = usar default)
+            soft_ttl: Segundos hasta que el valor se considera viejo (None = nunca)
+            tags: Etiquetas para invalidar en grupo (ej: ["room:5"])
+        """
+        started = time.perf_counter()
+        pipe = self._client.pipeline(transaction=False)
+        self._queue_set(pipe, key, self._dumps(value), ttl, soft_ttl, tags)
+        pipe.execute()
+        self.metrics.incr(key, "sets")
+        self.metrics.observe(key, "set", time.perf_counter() - started)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Recupera un valor de Redis.
+
+        Args:
+            key: Identificador único
+
+        Returns:
+            El valor guardado, o None si no existe o expiró
+        """
+        started = time.perf_counter()
+        value = self._fetch(key)
+        self.metrics.incr(key, "hits" if value is not None else "misses")
+        self.metrics.observe(key, "get", time.perf_counter() - started)
+        return value
+
+    def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+    ) -> Any:
+        """
+        Recupera un valor o lo calcula y guarda si no está en caché.
+
+        La coalescencia funciona a dos niveles:
+        - Entre hilos del mismo proceso (SingleFlight)
+        - Entre workers, con un lock en Redis (SET NX PX): solo el worker
+          que lo obtiene ejecuta `loader`; los demás esperan a que el valor
+          aparezca. Si el lock expira o se agota la espera, se calcula
+          localmente para no bloquear la petición.
+
+        Con `soft_ttl`, un valor viejo se devuelve al instante y un único
+        worker lo recalcula en segundo plano (ver docstring de la clase).
+
+        Args:
+            key: Identificador único
+            loader: Función sin argumentos que calcula el valor
+            ttl: Tiempo de vida en segundos (None = usar default)
+            soft_ttl: Segundos hasta que el valor se considera viejo
+            tags: Etiquetas para invalidar en grupo
+
+        Returns:
+            El valor (de caché o recién calculado)
+        """
+        if soft_ttl:
+            started = time.perf_counter()
+            raw, fresh = self._client.mget([self._full_key(key), self._fresh_key(key)])
+            self.metrics.incr(key, "hits" if raw is not None else "misses")
+            self.metrics.observe(key, "get", time.perf_counter() - started)
+            if raw is not None:
+                if fresh is None and self._client.set(
+                    self._fresh_key(key), 1, nx=True, ex=soft_ttl
+                ):
+                    self._schedule_refresh(key, raw, loader, ttl, soft_ttl, tags)
+                return self._loads(raw)
+        else:
+            value = self.get(key)
+            if value is not None:
+                return value
+
+        return self._flight.do(
+            key, lambda: self._load_with_lock(key, loader, ttl, soft_ttl, tags)
+        )
+
+    def get_or_set_many(
+        self,
+        keys: Iterable[str],
+        loader: Callable[[List[str]], Dict[str, Any]],
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None,
+        tags: Optional[Dict[str, Iterable[str]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Recupera varias claves (MGET) y calcula de una vez solo las que faltan.
+
+        Las claves calculadas se guardan en una transacción solo si ninguna
+        de ellas ni de sus tags se invalidó mientras `loader` se ejecutaba
+        (WATCH sobre las generaciones, como en get_or_set). No se coordina
+        entre workers: un rango lo suele pedir un solo cliente.
+
+        Args:
+            keys: Claves a consultar
+            loader: Función que recibe la lista de claves que faltan y
+                retorna un dict clave -> valor con todas ellas
+            ttl: Tiempo de vida en segundos (None = usar default)
+            soft_ttl: Segundos hasta que el valor se considera viejo
+            tags: Dict clave -> etiquetas de esa clave
+
+        Returns:
+            Dict clave -> valor (de caché o recién calculado)
+        """
+        keys = list(keys)
+        result = self.get_many(keys)
+        missing = [key for key in keys if key not in result]
+        if not missing:
+            return result
+
+        tags = tags or {}
+        generation_keys = [self._generation_key(key) for key in missing]
+        for tag in {tag for key in missing for tag in tags.get(key) or ()}:
+            generation_keys.append(self._generation_key(f"tag:{tag}"))
+        before = self._client.mget(generation_keys)
+
+        loaded = loader(missing)
+
+        with self._client.pipeline() as pipe:
+            try:
+                pipe.watch(*generation_keys)
+                if pipe.mget(generation_keys) == before:
+                    pipe.multi()
+                    for key in missing:
+                        self._queue_set(
+                            pipe,
+                            key,
+                            self._dumps(loaded[key]),
+                            ttl,
+                            soft_ttl,
+                            tags.get(key),
+                        )
+                        self.metrics.incr(key, "sets")
+                    pipe.execute()
+                else:
+                    pipe.unwatch()
+            except redis.WatchError:
+                # Se invalidó justo ahora: no guardar valores posiblemente viejos
+                pass
+
+        result.update(loaded)
+        return result
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Recupera varias claves en un solo viaje a Redis (MGET).
+
+        Args:
+            keys: Claves a consultar
+
+        Returns:
+            Dict con solo las claves encontradas
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        raws = self._client.mget([self._full_key(key) for key in keys])
+        result = {}
+        for key, raw in zip(keys, raws):
+            if raw is None:
+                self.metrics.incr(key, "misses")
+            else:
+                self.metrics.incr(key, "hits")
+                result[key] = self._loads(raw)
+        return result
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """
+        Guarda varias claves usando un pipeline (un solo viaje de red).
+
+        Args:
+            items: Dict clave -> valor
+            ttl: Tiempo de vida en segundos (None = usar default)
+        """
+        if not items:
+            return
+
+        pipe = self._client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(
+                self._full_key(key), self._dumps(value), ex=ttl or self._default_ttl
+            )
+            self.metrics.incr(key, "sets")
+        pipe.execute()
+
+    def delete(self, key: str) -> bool:
+        """
+        Elimina una clave de Redis.
+
+        Args:
+            key: Identificador único
+
+        Returns:
+            True si se eliminó, False si no existía
+        """
+        pipe = self._client.pipeline(transaction=False)
+        pipe.delete(self._full_key(key))
+        pipe.delete(self._fresh_key(key))
+        self._queue_bump(pipe, self._generation_key(key))
+        deleted = pipe.execute()[0]
+        return deleted > 0
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """
+        Elimina varias claves en un solo viaje a Redis (pipeline).
+
+        Args:
+            keys: Identificadores a eliminar
+
+        Returns:
+            Número de claves que existían
+        """
+        keys = set(keys)
+        if not keys:
+            return 0
+
+        pipe = self._client.pipeline(transaction=False)
+        for key in keys:
+            pipe.delete(self._full_key(key))
+            pipe.delete(self._fresh_key(key))
+            self._queue_bump(pipe, self._generation_key(key))
+        results = pipe.execute()
+
+        # Cada clave encola el mismo número de comandos; el primero es el DEL
+        step = len(results) // len(keys)
+        return sum(1 for deleted in results[0::step] if deleted)
+
+    def invalidate_tag(self, tag: str) -> List[str]:
+        """
+        Elimina todas las claves que llevan un tag.
+
+        Args:
+            tag: Etiqueta (ej: "room:5")
+
+        Returns:
+            Lista de claves eliminadas (sin prefijo)
+        """
+        tag_key = self._tag_key(tag)
+        members = [member.decode() for member in self._client.smembers(tag_key)]
+
+        pipe = self._client.pipeline(transaction=False)
+        for key in members:
+            pipe.delete(self._full_key(key))
+            pipe.delete(self._fresh_key(key))
+        pipe.delete(tag_key)
+        self._queue_bump(pipe, self._generation_key(f"tag:{tag}"))
+        results = pipe.execute()
+
+        # Resultados en pares (valor, marca fresca), luego set y generación
+        return [key for key, deleted in zip(members, results[0::2]) if deleted]
+
+    def clear(self) -> None:
+        """Elimina todas las claves de la aplicación (solo las del prefijo)."""
+        batch: List[str] = []
+        for full_key in self._client.scan_iter(match=f"{self._prefix}:*", count=500):
+            batch.append(full_key)
+            if len(batch) >= 500:
+                self._client.delete(*batch)
+                batch = []
+        if batch:
+            self._client.delete(*batch)
+
+    def size_snapshot(self) -> dict:
+        """
+        Tamaño actual para las métricas.
+
+        Contar las claves del prefijo exigiría recorrer Redis, así que no
+        se reporta (Redis ya expone sus propias métricas de memoria).
+        """
+        return {"entries": None, "bytes": None}
+
+    def get_cache_key(self, *parts: str) -> str:
+        """
+        Construye una clave de caché consistente.
+
+        Args:
+            *parts: Componentes de la clave
+
+        Returns:
+            Clave formateada (ej: "availability:5:2025-02-19")
+        """
+        return ":".join(str(part) for part in parts)
+
+    def _fetch(self, key: str) -> Optional[Any]:
+        """Lee y deserializa una clave sin registrar métricas."""
+        return self._loads(self._client.get(self._full_key(key)))
+
+    def _load_with_lock(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[int],
+        soft_ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+    ) -> Any:
+        """Calcula el valor bajo un lock distribuido (ver get_or_set)."""
+        lock_key = self._full_key(f"lock:{key}")
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self._lock_wait
+
+        while True:
+            if self._client.set(
+                lock_key, token, nx=True, px=int(self._lock_timeout * 1000)
+            ):
+                try:
+                    # Otro worker pudo terminar justo antes de soltar el lock
+                    value = self._fetch(key)
+                    if value is None:
+                        value = self._load_guarded(key, loader, ttl, soft_ttl, tags)
+                    return value
+                finally:
+                    self._release_lock(lock_key, token)
+
+            value = self._fetch(key)
+            if value is not None:
+                return value
+
+            if time.monotonic() >= deadline:
+                # No bloquear indefinidamente: calcular sin lock
+                return self._load_guarded(key, loader, ttl, soft_ttl, tags)
+
+            time.sleep(0.02)
+
+    def _load_guarded(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[int],
+        soft_ttl: Optional[int],
+        tags: Optional[Iterable[str]],
+    ) -> Any:
+        """
+        Ejecuta `loader` y guarda el resultado solo si la clave y sus tags
+        no se invalidaron mientras se calculaba (WATCH sobre las generaciones).
+        """
+        generation_keys = [self._generation_key(key)] + [
+            self._generation_key(f"tag:{tag}") for tag in tags or ()
+        ]
+        before = self._client.mget(generation_keys)
+
+        value = loader()
+
+        with self._client.pipeline() as pipe:
+            try:
+                pipe.watch(*generation_keys)
+                if pipe.mget(generation_keys) != before:
+                    pipe.unwatch()
+                    return value
+                pipe.multi()
+                self._queue_set(pipe, key, self._dumps(value), ttl, soft_ttl, tags)
+                pipe.execute()
+            except redis.WatchError:
+                # Se invalidó justo ahora: no guardar un valor posiblemente viejo
+                pass
+        return value
+
+    def _release_lock(self, lock_key: str, token: str) -> None:
+        """Libera el lock solo si sigue siendo nuestro (WATCH/MULTI)."""
+        with self._client.pipeline() as pipe:
+            try:
+                pipe.watch(lock_key)
+                if pipe.get(lock_key) == token.encode():
+                    pipe.multi()
+                    pipe.delete(lock_key)
+                    pipe.execute()
+                else:
+                    pipe.unwatch()
+            except redis.WatchError:
+                # El lock expiró y otro worker lo tomó: no es nuestro
+                pass
+
+    def _schedule_refresh(
+        self,
+        key: str,
+        raw: bytes,
+        loader: Callable[[], Any],
+        ttl: Optional[int],
+        soft_ttl: Optional[int],
+        tags: Optional[Iterable[str]],
+    ) -> None:
+        """Programa el recálculo en segundo plano de un valor viejo."""
+        full_key = self._full_key(key)
+
+        def _refresh():
+            value = self._dumps(loader())
+            with self._client.pipeline() as pipe:
+                try:
+                    # Solo guardar si nadie invalidó ni reemplazó el valor
+                    pipe.watch(full_key)
+                    if pipe.get(full_key) != raw:
+                        pipe.unwatch()
+                        return
+                    pipe.multi()
+                    self._queue_set(pipe, key, value, ttl, soft_ttl, tags)
+                    pipe.execute()
+                except redis.WatchError:
+                    pass
+
+        self._refresher.schedule(key, _refresh)
+
+    def _queue_set(
+        self,
+        pipe,
+        key: str,
+        raw: str,
+        ttl: Optional[int],
+        soft_ttl: Optional[int],
+        tags: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Encola en un pipeline la escritura de un valor, su marca fresca y sus tags."""
+        ttl = ttl or self._default_ttl
+        pipe.set(self._full_key(key), raw, ex=ttl)
+        if soft_ttl:
+            pipe.set(self._fresh_key(key), 1, ex=soft_ttl)
+        else:
+            pipe.delete(self._fresh_key(key))
+        for tag in tags or ():
+            tag_key = self._tag_key(tag)
+            pipe.sadd(tag_key, key)
+            # NX fija el TTL si no tenía; GT solo lo alarga
+            pipe.expire(tag_key, ttl, nx=True)
+            pipe.expire(tag_key, ttl, gt=True)
+
+    @staticmethod
+    def _queue_bump(pipe, generation_key: str) -> None:
+        """Encola el incremento de un contador de generación."""
+        pipe.incr(generation_key)
+        pipe.expire(generation_key, _GENERATION_TTL)
+
+    def _generation_key(self, name: str) -> str:
+        """Clave del contador de invalidaciones de una clave o tag."""
+        return self._full_key(f"gen:{name}")
+
+    def _tag_key(self, tag: str) -> str:
+        """Clave del set de Redis que agrupa las claves de un tag."""
+        return self._full_key(f"tag:{tag}")
+
+    def _fresh_key(self, key: str) -> str:
+        """Clave de la marca que indica que el valor no está viejo."""
+        return self._full_key(f"fresh:{key}")
+
+    def _full_key(self, key: str) -> str:
+        """Agrega el prefijo de la aplicación a la clave."""
+        return f"{self._prefix}:{key}"
+
+    @staticmethod
+    def _dumps(value: Any) -> str:
+        """Serializa a JSON compacto (sin espacios)."""
+        return json.dumps(value, separators=(",", ":"))
+
+    @staticmethod
+    def _loads(raw: Optional[bytes]) -> Optional[Any]:
+        """Deserializa un valor de Redis (None si no existe)."""
+        if raw is None:
+            return None
+        return json.loads(raw)
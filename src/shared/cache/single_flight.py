@@ -0,0 +1,65 @@
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class _Call:
+    """Cálculo en curso para una clave (resultado compartido con los que esperan)."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalescencia de peticiones ("single-flight") dentro de un proceso.
+
+    Si varios hilos piden la misma clave a la vez, solo el primero ejecuta
+    la función; el resto espera y recibe el mismo resultado (o la misma
+    excepción). Evita que una clave recién invalidada dispare N consultas
+    idénticas a la BD.
+
+    Uso:
+        flight = SingleFlight()
+        data = flight.do("availability:5:2025-02-19", compute)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Ejecuta `fn` una sola vez por clave entre los hilos concurrentes.
+
+        Args:
+            key: Clave que identifica el cálculo
+            fn: Función sin argumentos que calcula el valor
+
+        Returns:
+            El resultado de `fn` (propio o del hilo que lo calculó)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
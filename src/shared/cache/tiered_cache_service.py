@@ -0,0 +1,465 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.shared.cache.cache_metrics import CacheMetrics
+from src.shared.cache.cache_service import CacheService
+from src.shared.cache.redis_cache_service import RedisCacheService
+
+logger = logging.getLogger(__name__)
+
+
+class TieredCacheService:
+    """
+    Caché de dos niveles.
+
+    - L1: CacheService en memoria del proceso, pequeño y con TTL corto
+    - L2: RedisCacheService compartido por todos los workers
+
+    Las lecturas consultan primero L1 y, si fallan, L2 (rellenando L1).
+    Las invalidaciones borran en ambos niveles y se publican en un canal
+    pub/sub de Redis para que el resto de workers borre su L1.
+
+    invalidate_tag() se resuelve en L2 y se difunden las claves borradas,
+    así los workers limpian también las entradas que su L1 copió de L2
+    (que no conocen los tags).
+
+    Las invalidaciones borran L2 antes que L1, y L1 solo se rellena desde L2
+    a través de su guarda de cargas en curso: un lector concurrente no puede
+    volver a dejar en L1 un valor recién borrado (el propio worker ignora su
+    aviso pub/sub, así que no hay una segunda limpieza).
+
+    El TTL corto de L1 acota cuánto tiempo puede sobrevivir un valor viejo
+    si se pierde un mensaje de invalidación.
+
+    Uso:
+        cache = TieredCacheService(l1=CacheService(max_entries=1000), l2=redis_cache)
+        cache.start_listener()
+        data = cache.get("availability:5:2025-02-19")
+    """
+
+    # Espera antes de resuscribirse tras un error (se duplica hasta el máximo)
+    RECONNECT_DELAY = 0.5
+    MAX_RECONNECT_DELAY = 30.0
+
+    def __init__(
+        self,
+        l1: CacheService,
+        l2: RedisCacheService,
+        l1_ttl: int = 5,
+        channel: str = "bookme:cache-invalidation",
+    ):
+        """
+        Args:
+            l1: Caché en memoria del proceso
+            l2: Caché compartido en Redis
+            l1_ttl: TTL máximo (segundos) de las entradas en L1
+            channel: Canal pub/sub para difundir invalidaciones
+        """
+        self.l1 = l1
+        self.l2 = l2
+        self._l1_ttl = l1_ttl
+        self._channel = channel
+        self._node_id = uuid.uuid4().hex  # para ignorar nuestros propios mensajes
+
+        self.metrics = CacheMetrics()  # métricas globales (cualquier nivel)
+        self._stats = {"l1": {"hits": 0, "misses": 0}, "l2": {"hits": 0, "misses": 0}}
+        self._stats_lock = threading.Lock()
+
+        self._listener: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Guarda un valor en ambos niveles.
+
+        Args:
+            key: Identificador único (ej: "availability:5:2025-02-19")
+            value: Datos a guardar
+            ttl: Tiempo de vida en L2 (L1 usa como mucho l1_ttl)
+            soft_ttl: Segundos hasta que el valor de L2 se considera viejo
+            tags: Etiquetas para invalidar en grupo
+        """
+        started = time.perf_counter()
+        self.l2.set(key, value, ttl, soft_ttl, tags)
+        self.l1.set(key, value, self._l1_ttl_for(ttl), tags=tags)
+        self.metrics.incr(key, "sets")
+        self.metrics.observe(key, "set", time.perf_counter() - started)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Recupera un valor consultando L1 y luego L2.
+
+        Args:
+            key: Identificador único
+
+        Returns:
+            El valor guardado, o None si no existe en ningún nivel
+        """
+        started = time.perf_counter()
+        value = self._get(key)
+        self.metrics.incr(key, "hits" if value is not None else "misses")
+        self.metrics.observe(key, "get", time.perf_counter() - started)
+        return value
+
+    def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+    ) -> Any:
+        """
+        Recupera un valor o lo calcula y guarda si no está en ningún nivel.
+
+        Un solo hilo por proceso consulta L2, y L2 coordina entre workers
+        para que solo uno ejecute `loader` (ver RedisCacheService.get_or_set).
+        El modo stale-while-revalidate (`soft_ttl`) lo resuelve L2. Si llega
+        una invalidación durante la carga, el valor no se guarda en ningún
+        nivel.
+
+        Args:
+            key: Identificador único
+            loader: Función sin argumentos que calcula el valor
+            ttl: Tiempo de vida en L2 (L1 usa como mucho l1_ttl)
+            soft_ttl: Segundos hasta que el valor de L2 se considera viejo
+            tags: Etiquetas para invalidar en grupo
+
+        Returns:
+            El valor (de caché o recién calculado)
+        """
+        started = time.perf_counter()
+        value = self.l1.get(key)
+        self.metrics.observe(key, "get", time.perf_counter() - started)
+        if value is not None:
+            self._count("l1", "hits")
+            self.metrics.incr(key, "hits")
+            return value
+        self._count("l1", "misses")
+
+        def _load():
+            computed = []
+
+            def _tracked_loader():
+                computed.append(True)
+                return loader()
+
+            value = self.l2.get_or_set(key, _tracked_loader, ttl, soft_ttl, tags)
+            self._count("l2", "misses" if computed else "hits")
+            self.metrics.incr(key, "misses" if computed else "hits")
+            return value
+
+        # L1 coalesce los hilos y, como L2, no guarda el valor si la clave o
+        # sus tags se invalidan mientras se carga
+        return self.l1.get_or_set(key, _load, self._l1_ttl_for(ttl), tags=tags)
+
+    def get_or_set_many(
+        self,
+        keys: Iterable[str],
+        loader: Callable[[List[str]], Dict[str, Any]],
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None,
+        tags: Optional[Dict[str, Iterable[str]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Recupera varias claves de L1, pide el resto a L2 en bloque y solo
+        calcula las que no están en ningún nivel.
+
+        Args:
+            keys: Claves a consultar
+            loader: Función que recibe la lista de claves que faltan y
+                retorna un dict clave -> valor con todas ellas
+            ttl: Tiempo de vida en L2 (L1 usa como mucho l1_ttl)
+            soft_ttl: Segundos hasta que el valor de L2 se considera viejo
+            tags: Dict clave -> etiquetas de esa clave
+
+        Returns:
+            Dict clave -> valor (de caché o recién calculado)
+        """
+        keys = list(keys)
+        result = self.l1.get_many(keys)
+        self._count("l1", "hits", len(result))
+
+        missing = [key for key in keys if key not in result]
+        self._count("l1", "misses", len(missing))
+        computed = []
+        if missing:
+
+            def _tracked_loader(keys_to_load: List[str]) -> Dict[str, Any]:
+                computed.extend(keys_to_load)
+                return loader(keys_to_load)
+
+            from_l2 = self.l2.get_or_set_many(
+                missing, _tracked_loader, ttl, soft_ttl, tags
+            )
+            self._count("l2", "hits", len(missing) - len(computed))
+            self._count("l2", "misses", len(computed))
+            for key in missing:
+                self.l1.set(
+                    key,
+                    from_l2[key],
+                    self._l1_ttl_for(ttl),
+                    tags=(tags or {}).get(key),
+                )
+            result.update(from_l2)
+
+        computed_keys = set(computed)
+        for key in keys:
+            self.metrics.incr(key, "misses" if key in computed_keys else "hits")
+        return result
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Recupera varias claves: las que falten en L1 se piden a L2 en bloque.
+
+        Args:
+            keys: Claves a consultar
+
+        Returns:
+            Dict con solo las claves encontradas
+        """
+        keys = list(keys)
+        result = self.l1.get_many(keys)
+        self._count("l1", "hits", len(result))
+
+        missing = [key for key in keys if key not in result]
+        self._count("l1", "misses", len(missing))
+        if not missing:
+            for key in keys:
+                self.metrics.incr(key, "hits")
+            return result
+
+        from_l2 = self.l2.get_many(missing)
+        self._count("l2", "hits", len(from_l2))
+        self._count("l2", "misses", len(missing) - len(from_l2))
+        self.l1.set_many(from_l2, self._l1_ttl)
+
+        result.update(from_l2)
+        for key in keys:
+            self.metrics.incr(key, "hits" if key in result else "misses")
+        return result
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """
+        Guarda varias claves en ambos niveles.
+
+        Args:
+            items: Dict clave -> valor
+            ttl: Tiempo de vida en L2 (L1 usa como mucho l1_ttl)
+        """
+        self.l2.set_many(items, ttl)
+        self.l1.set_many(items, self._l1_ttl_for(ttl))
+        for key in items:
+            self.metrics.incr(key, "sets")
+
+    def delete(self, key: str) -> bool:
+        """
+        Elimina una clave en ambos niveles y avisa al resto de workers.
+
+        Args:
+            key: Identificador único
+
+        Returns:
+            True si existía en L2, False si no
+        """
+        deleted = self.l2.delete(key)
+        self.l1.delete(key)
+        self._publish({"keys": [key]})
+        return deleted
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """
+        Elimina varias claves en ambos niveles con un solo aviso al resto.
+
+        Args:
+            keys: Identificadores a eliminar
+
+        Returns:
+            Número de claves que existían en L2
+        """
+        keys = sorted(set(keys))
+        if not keys:
+            return 0
+        deleted = self.l2.delete_many(keys)
+        self.l1.delete_many(keys)
+        self._publish({"keys": keys})
+        return deleted
+
+    def invalidate_tag(self, tag: str) -> List[str]:
+        """
+        Elimina todas las claves de un tag en ambos niveles y avisa al resto.
+
+        Args:
+            tag: Etiqueta (ej: "room:5")
+
+        Returns:
+            Lista de claves eliminadas de L2
+        """
+        keys = self.l2.invalidate_tag(tag)
+        self.l1.invalidate_tag(tag)
+        for key in keys:
+            self.l1.delete(key)
+        self._publish({"keys": keys, "tags": [tag]})
+        return keys
+
+    def clear(self) -> None:
+        """Limpia ambos niveles y avisa al resto de workers."""
+        self.l2.clear()
+        self.l1.clear()
+        self._publish({"all": True})
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Retorna los contadores de aciertos y fallos por nivel.
+
+        Returns:
+            Dict {"l1": {"hits", "misses"}, "l2": {"hits", "misses"}}
+        """
+        with self._stats_lock:
+            return {tier: dict(counters) for tier, counters in self._stats.items()}
+
+    def start_listener(self) -> None:
+        """
+        Arranca el hilo que escucha invalidaciones de otros workers.
+
+        Si se pierde la conexión con Redis, el hilo lo registra y vuelve a
+        suscribirse con espera exponencial. Los mensajes publicados mientras
+        tanto se pierden, así que al reconectar se vacía L1.
+        """
+        if self._listener is not None and self._listener.is_alive():
+            return
+
+        pubsub = self._subscribe()
+        self._stop_event.clear()
+
+        def _run():
+            current = pubsub
+            delay = self.RECONNECT_DELAY
+            while not self._stop_event.is_set():
+                try:
+                    if current is None:
+                        current = self._subscribe()
+                        self.l1.clear()
+                        delay = self.RECONNECT_DELAY
+                        logger.warning("Reconectado al canal %s", self._channel)
+                    message = current.get_message(timeout=1.0)
+                    if message is not None:
+                        self._handle_message(message["data"])
+                except Exception:
+                    logger.exception(
+                        "Error escuchando invalidaciones en %s; reintento en %ss",
+                        self._channel,
+                        delay,
+                    )
+                    self._close_quietly(current)
+                    current = None
+                    self._stop_event.wait(delay)
+                    delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+            self._close_quietly(current)
+
+        self._listener = threading.Thread(
+            target=_run, name="cache-invalidation-listener", daemon=True
+        )
+        self._listener.start()
+
+    def stop_listener(self) -> None:
+        """Detiene el hilo de escucha si está activo."""
+        self._stop_event.set()
+        if self._listener is not None:
+            self._listener.join()
+            self._listener = None
+
+    def size_snapshot(self) -> dict:
+        """Tamaño actual del L1 de este worker para las métricas."""
+        return self.l1.size_snapshot()
+
+    def get_cache_key(self, *parts: str) -> str:
+        """
+        Construye una clave de caché consistente.
+
+        Args:
+            *parts: Componentes de la clave
+
+        Returns:
+            Clave formateada (ej: "availability:5:2025-02-19")
+        """
+        return ":".join(str(part) for part in parts)
+
+    def _get(self, key: str) -> Optional[Any]:
+        """
+        Lee de L1 y luego de L2 (rellenando L1), contando por nivel.
+
+        El relleno pasa por l1.get_or_set(): si la clave se borra mientras
+        se lee L2, el valor se devuelve pero no se copia a L1. No se conocen
+        los tags de la clave, pero las invalidaciones por tag también borran
+        cada clave del tag (las resuelve L2).
+        """
+        value = self.l1.get(key)
+        if value is not None:
+            self._count("l1", "hits")
+            return value
+        self._count("l1", "misses")
+
+        def _from_l2():
+            value = self.l2.get(key)
+            self._count("l2", "hits" if value is not None else "misses")
+            return value
+
+        return self.l1.get_or_set(key, _from_l2, self._l1_ttl)
+
+    def _subscribe(self):
+        """Abre una suscripción al canal de invalidaciones."""
+        pubsub = self.l2.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._channel)
+        return pubsub
+
+    @staticmethod
+    def _close_quietly(pubsub) -> None:
+        """Cierra una suscripción ignorando errores de una conexión ya rota."""
+        if pubsub is None:
+            return
+        try:
+            pubsub.close()
+        except Exception:
+            pass
+
+    def _handle_message(self, data: bytes) -> None:
+        """Aplica en L1 una invalidación recibida de otro worker."""
+        message = json.loads(data)
+        if message.get("node") == self._node_id:
+            return
+
+        if message.get("all"):
+            self.l1.clear()
+        for tag in message.get("tags", []):
+            self.l1.invalidate_tag(tag)
+        for key in message.get("keys", []):
+            self.l1.delete(key)
+
+    def _publish(self, message: dict) -> None:
+        """Publica una invalidación en el canal compartido."""
+        message["node"] = self._node_id
+        self.l2.client.publish(
+            self._channel, json.dumps(message, separators=(",", ":"))
+        )
+
+    def _l1_ttl_for(self, ttl: Optional[int]) -> int:
+        """TTL de L1: nunca mayor que l1_ttl ni que el TTL pedido."""
+        return min(ttl, self._l1_ttl) if ttl else self._l1_ttl
+
+    def _count(self, tier: str, counter: str, amount: int = 1) -> None:
+        """Incrementa un contador de estadísticas de forma segura entre hilos."""
+        if amount:
+            with self._stats_lock:
+                self._stats[tier][counter] += amount
@@ -15,6 +15,45 @@ class Settings(BaseSettings):
     database_url: str = "sqlite:///./bookme.db"
     redis_host: str = "localhost"
     redis_port: int = 6379
+    redis_db: int = 0
+
+    # Backend de caché: "memory" (por proceso), "redis" (compartido)
+    # o "tiered" (L1 en memoria + L2 en Redis)
+    cache_backend: str = "memory"
+    cache_prefix: str = "bookme"
+
+    # Caché de disponibilidad. La invalidación tras cada commit (eventos del ORM)
+    # permite un TTL largo. Con soft TTL > 0 se activa stale-while-revalidate:
+    # pasado ese tiempo se sirve el valor viejo y se recalcula en segundo plano
+    availability_cache_ttl: int = 7 * 24 * 3600  # segundos (TTL duro, 7 días)
+    availability_cache_soft_ttl: int = 0  # segundos (0 = desactivado)
+
+    # Caché negativo: cuánto se recuerda que una sala/usuario no existe.
+    # Se invalida al crear la fila; el TTL corto acota cualquier carrera
+    negative_cache_ttl: int = 30  # segundos (0 = desactivado)
+
+    # Índice de reservas en memoria cargado al arrancar (memoria proporcional a
+    # todas las reservas): rechaza solapamientos evidentes en create_reservation
+    # sin consultar la BD (la BD decide siempre) y acelera next-available
+    reservation_index_enabled: bool = False
+
+    # Stream de disponibilidad (SSE): días con cambios sin leer por cliente
+    # antes de cerrar su stream, y cada cuánto se envía un keep-alive
+    availability_stream_max_pending: int = 256
+    availability_stream_heartbeat: int = 15  # segundos
+    # Canal pub/sub que comparte las reservas entre workers (backend redis/tiered)
+    availability_stream_channel: str = "bookme:availability"
+
+    # Caché de dos niveles (solo con cache_backend = "tiered")
+    cache_l1_max_entries: int = 1000
+    cache_l1_ttl: int = 5  # segundos
+    cache_invalidation_channel: str = "bookme:cache-invalidation"
+
+    # Caché en memoria
+    cache_max_entries: int = 10000
+    cache_max_bytes: int = 64 * 1024 * 1024  # 64 MB aprox.
+    cache_sweep_interval: int = 60  # segundos (0 = sin barrido)
+    cache_shards: int = 16  # porciones con lock independiente
 
     class Config:
         env_file = ".env"
@@ -1,7 +1,8 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, sessionmaker
 
+from src.shared.cache.cache_invalidation import register_cache_invalidation
 from src.shared.config.settings import get_settings
 
 # Configuración
@@ -10,14 +11,17 @@ settings = get_settings()
 # Motor de base de datos
 engine = create_engine(
     settings.database_url,
-    connect_args={"check_same_thread": False}
-    if "sqlite" in settings.database_url
-    else {},
+    connect_args=(
+        {"check_same_thread": False} if "sqlite" in settings.database_url else {}
+    ),
 )
 
 # Sesión de BD
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Invalidación automática del caché tras cada commit (ver cache_invalidation)
+register_cache_invalidation()
+
 # Base para los modelos
 Base = declarative_base()
 
@@ -39,9 +43,65 @@ def get_db() -> Session:
         db.close()
 
 
+# Columnas añadidas a tablas que ya existían: (tabla, columna, tipo en el DDL).
+# create_all no modifica tablas existentes; upgrade_schema las añade
+_ADDED_COLUMNS = [
+    ("room_day_occupancy", "version", "INTEGER NOT NULL DEFAULT 0"),
+    ("reservations", "series_id", "INTEGER REFERENCES reservation_series (id)"),
+]
+
+
+def upgrade_schema(bind) -> None:
+    """
+    Pone al día una base de datos creada con una versión anterior.
+
+    create_all solo crea las tablas que faltan: no añade columnas ni índices
+    a las que ya existen. Aquí se añaden las columnas de _ADDED_COLUMNS que
+    falten y se crean los índices del modelo que no existan. Se puede
+    ejecutar tantas veces como se quiera.
+
+    Args:
+        bind: Engine de la base de datos (con las tablas ya creadas)
+    """
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table, column, ddl in _ADDED_COLUMNS:
+            existing = {info["name"] for info in inspector.get_columns(table)}
+            if column not in existing:
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"
+                )
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+
 def init_db():
     """
     Inicializa la base de datos creando todas las tablas.
     Se llama al iniciar la aplicación.
+
+    En una base de datos anterior añade las columnas e índices nuevos (ver
+    upgrade_schema).
+
+    Si la tabla de ocupación o la de horas reclamadas están vacías pero ya
+    hay reservas (base de datos anterior a ellas), las reconstruye a partir
+    de las reservas.
     """
+    from src.modules.reservations.occupancy_model import (
+        ReservationSlot,
+        RoomDayOccupancy,
+    )
+    from src.modules.reservations.reservation_model import Reservation
+    from src.modules.reservations.reservation_repository import ReservationRepository
+
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    with SessionLocal() as db:
+        is_derived_complete = (
+            db.query(RoomDayOccupancy).first() is not None
+            and db.query(ReservationSlot).first() is not None
+        )
+        if not is_derived_complete and db.query(Reservation).first() is not None:
+            ReservationRepository(db).rebuild_occupancy()
@@ -1,7 +1,14 @@
+from contextlib import contextmanager
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
+from src.modules.reservations.interval_index import get_interval_index
+from src.modules.rooms.availability_stream import get_availability_hub
+from src.modules.rooms.room_model import Room  # noqa: F401 (registra la tabla)
+from src.modules.users.user_model import User  # noqa: F401 (registra la tabla)
+from src.shared.cache.cache_service import get_cache
 from src.shared.database.connection import Base
 
 
@@ -11,6 +18,11 @@ def test_db():
     Fixture que crea una base de datos en memoria para tests.
     Se crea y destruye en cada test para aislarlos.
     """
+    # El caché es global: limpiarlo para que no arrastre datos entre tests
+    get_cache().clear()
+    get_interval_index().clear()
+    get_availability_hub().clear()
+
     # Crear engine en memoria
     engine = create_engine("sqlite:///:memory:")
 
@@ -25,3 +37,40 @@ def test_db():
 
     # Limpiar después del test
     session.close()
+
+
+@pytest.fixture(scope="function")
+def captured_statements(test_db):
+    """
+    Fixture para contar las consultas SQL que lanza un bloque de código.
+
+    Retorna una función que abre un bloque `with`: dentro de él, cada
+    sentencia que ejecuta el engine de test_db se añade a la lista.
+
+    Uso:
+        with captured_statements(select_only=True) as statements:
+            service.get_user_by_id(1)
+        assert len(statements) == 1
+
+    Args (de la función retornada):
+        select_only: Capturar solo los SELECT
+        with_parameters: Guardar tuplas (sql, parámetros) en vez del sql
+    """
+    engine = test_db.get_bind()
+
+    @contextmanager
+    def capture(select_only=False, with_parameters=False):
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            if select_only and not statement.lstrip().upper().startswith("SELECT"):
+                return
+            statements.append((statement, parameters) if with_parameters else statement)
+
+        event.listen(engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", _record)
+
+    return capture
@@ -10,6 +10,9 @@ from api import app
 
 # IMPORTANTE: Importar modelos ANTES de importar app
 # Esto asegura que los modelos estén registrados en Base.metadata
+from src.modules.reservations.interval_index import get_interval_index
+from src.modules.rooms.availability_stream import get_availability_hub
+from src.shared.cache.cache_service import get_cache
 from src.shared.database.connection import Base, get_db
 
 # Crear base de datos de prueba EN ARCHIVO TEMPORAL
@@ -50,6 +53,11 @@ def test_client():
     # Crear todas las tablas frescas
     Base.metadata.create_all(bind=test_engine)
 
+    # Estado global en memoria: que no arrastre datos de la BD anterior
+    get_cache().clear()
+    get_interval_index().clear()
+    get_availability_hub().clear()
+
     # Crear cliente de prueba
     client = TestClient(app)
 
@@ -261,3 +269,395 @@ class TestIntegration:
         # Verificar que el error menciona el problema de capacidad
         errors = invalid_room_response.json()["detail"]
         assert any("capacidad" in str(error).lower() for error in errors)
+
+    def test_admin_cache_metrics(self, test_client):
+        """
+        Test de integración: Las métricas del caché se exponen en /admin.
+        """
+        test_client.get("/rooms/")
+        test_client.get("/rooms/")
+
+        stats = test_client.get("/admin/cache/stats")
+        assert stats.status_code == 200
+        assert stats.json()["namespaces"]["rooms"]["hits"] >= 1
+
+        metrics = test_client.get("/admin/cache/metrics")
+        assert metrics.status_code == 200
+        assert "bookme_cache_hits_total" in metrics.text
+
+    def test_room_availability_range(self, test_client):
+        """
+        Test de integración: Disponibilidad de varios días en una sola llamada.
+        """
+        room = test_client.post(
+            "/rooms/",
+            json={"nombre": "Sala Semana", "capacidad": 5, "ubicacion": "Piso 3"},
+        ).json()
+
+        response = test_client.get(
+            f"/rooms/{room['id']}/availability/range",
+            params={"from": "2025-02-17", "to": "2025-02-19"},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["from"] == "2025-02-17"
+        assert data["to"] == "2025-02-19"
+        assert list(data["days"]) == ["2025-02-17", "2025-02-18", "2025-02-19"]
+        assert data["days"]["2025-02-18"] == list(range(8, 20))
+
+    def test_search_free_rooms(self, test_client):
+        """
+        Test de integración: Buscar salas libres por horario y capacidad.
+        """
+        for nombre, capacidad in [("Sala Grande", 20), ("Sala Justa", 8)]:
+            test_client.post(
+                "/rooms/",
+                json={"nombre": nombre, "capacidad": capacidad, "ubicacion": "Piso 1"},
+            )
+
+        response = test_client.get(
+            "/rooms/search",
+            params={
+                "date": "2025-02-19",
+                "startHour": 10,
+                "endHour": 12,
+                "capacidad": 8,
+            },
+        )
+
+        assert response.status_code == 200
+        assert [room["nombre"] for room in response.json()] == [
+            "Sala Justa",
+            "Sala Grande",
+        ]
+
+        invalid = test_client.get(
+            "/rooms/search",
+            params={"date": "2025-02-19", "startHour": 12, "endHour": 10},
+        )
+        assert invalid.status_code == 400
+
+    def test_utilization_report(self, test_client):
+        """
+        Test de integración: Reporte de utilización con filtros de fecha.
+        """
+        test_client.post(
+            "/rooms/",
+            json={"nombre": "Sala Reporte", "capacidad": 5, "ubicacion": "Piso 1"},
+        )
+
+        response = test_client.get(
+            "/reports/utilization", params={"from": "2025-02-01", "to": "2025-02-28"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["from"] == "2025-02-01"
+        assert data["utilization"] == 0.0
+        assert len(data["byHour"]) == 24
+
+        invalid = test_client.get(
+            "/reports/utilization", params={"from": "2025-03-01", "to": "2025-02-01"}
+        )
+        assert invalid.status_code == 400
+
+    def test_next_available_slot(self, test_client):
+        """
+        Test de integración: Primer hueco disponible de una sala.
+        """
+        user = test_client.post(
+            "/users/", json={"nombre": "Pablo", "email": "pablo@example.com"}
+        ).json()
+        room = test_client.post(
+            "/rooms/",
+            json={"nombre": "Sala Hueco", "capacidad": 5, "ubicacion": "Piso 1"},
+        ).json()
+        test_client.post(
+            "/reservations/",
+            json={
+                "userId": user["id"],
+                "roomId": room["id"],
+                "date": "2030-01-07",
+                "startHour": 8,
+                "endHour": 12,
+            },
+        )
+
+        response = test_client.get(
+            "/reservations/next-available",
+            params={"date": "2030-01-07", "hours": 3, "roomId": room["id"]},
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "roomId": room["id"],
+            "date": "2030-01-07",
+            "startHour": 12,
+            "endHour": 15,
+        }
+
+    def test_availability_etag(self, test_client):
+        """
+        Test de integración: ETag / If-None-Match en la disponibilidad.
+
+        Verifica:
+        - Sin cambios, el ETag devuelve 304 sin cuerpo
+        - Una reserva de ese día cambia el ETag y vuelve a responder 200
+        """
+        user = test_client.post(
+            "/users/", json={"nombre": "Teo", "email": "teo@example.com"}
+        ).json()
+        room = test_client.post(
+            "/rooms/",
+            json={"nombre": "Sala ETag", "capacidad": 5, "ubicacion": "Piso 1"},
+        ).json()
+        url = f"/rooms/{room['id']}/availability"
+        params = {"date": "2030-02-04"}
+
+        first = test_client.get(url, params=params)
+        etag = first.headers["ETag"]
+
+        cached = test_client.get(url, params=params, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+        test_client.post(
+            "/reservations/",
+            json={
+                "userId": user["id"],
+                "roomId": room["id"],
+                "date": "2030-02-04",
+                "startHour": 9,
+                "endHour": 10,
+            },
+        )
+
+        changed = test_client.get(url, params=params, headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert 9 not in changed.json()["freeSlots"]
+
+    def test_availability_stream_rejects_invalid_subscription(self, test_client):
+        """
+        Test de integración: el stream valida antes de quedarse abierto.
+
+        Verifica:
+        - Una sala inexistente responde 400 y no deja la suscripción colgada
+        - Un rango de fechas al revés responde 400
+        """
+        room = test_client.post(
+            "/rooms/",
+            json={"nombre": "Sala Stream", "capacidad": 5, "ubicacion": "Piso 1"},
+        ).json()
+
+        response = test_client.get(
+            "/rooms/availability/stream",
+            params={
+                "roomId": [room["id"], 999],
+                "from": "2030-02-04",
+                "to": "2030-02-05",
+            },
+        )
+        assert response.status_code == 400
+        assert get_availability_hub().subscriber_count() == 0
+
+        response = test_client.get(
+            "/rooms/availability/stream",
+            params={"roomId": room["id"], "from": "2030-02-05", "to": "2030-02-04"},
+        )
+        assert response.status_code == 400
+
+    def test_batch_reservations(self, test_client):
+        """
+        Test de integración: POST /reservations/batch.
+
+        Verifica:
+        - atomic con un elemento inválido responde 400 y no crea nada
+        - best_effort responde 201 con el resultado de cada elemento
+        - Una fecha mal formada solo hace fallar a su elemento
+        """
+        user = test_client.post(
+            "/users/", json={"nombre": "Iris", "email": "iris@example.com"}
+        ).json()
+        room = test_client.post(
+            "/rooms/",
+            json={"nombre": "Sala Evento", "capacidad": 30, "ubicacion": "Piso 0"},
+        ).json()
+        reservations = [
+            {
+                "userId": user["id"],
+                "roomId": room["id"],
+                "date": "2030-04-01",
+                "startHour": start,
+                "endHour": start + 2,
+            }
+            for start in (9, 10, 13)
+        ]
+
+        response = test_client.post(
+            "/reservations/batch", json={"reservations": reservations}
+        )
+        assert response.status_code == 400
+        body = response.json()
+        assert [r["status"] for r in body["results"]] == [
+            "skipped",
+            "failed",
+            "skipped",
+        ]
+        assert test_client.get(f"/reservations/room/{room['id']}").json() == []
+
+        response = test_client.post(
+            "/reservations/batch",
+            json={"mode": "best_effort", "reservations": reservations},
+        )
+        assert response.status_code == 201
+        body = response.json()
+        assert (body["created"], body["failed"]) == (2, 1)
+        assert body["results"][2]["reservation"]["start_hour"] == 13
+
+        availability = test_client.get(
+            f"/rooms/{room['id']}/availability", params={"date": "2030-04-01"}
+        ).json()
+        assert availability["freeSlots"] == [8, 11, 12, 15, 16, 17, 18, 19]
+
+        bad_date = dict(reservations[0], date="2030-04-31")
+        next_day = dict(reservations[0], date="2030-04-02")
+        response = test_client.post(
+            "/reservations/batch",
+            json={"mode": "best_effort", "reservations": [bad_date, next_day]},
+        )
+        assert response.status_code == 201
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == ["failed", "created"]
+        assert results[0]["error"] == "Formato de fecha inválido. Use YYYY-MM-DD"
+
+    def test_create_series(self, test_client):
+        """
+        Test de integración: POST /reservations/series.
+
+        Verifica:
+        - Una serie semanal crea una reserva por semana
+        - Una segunda serie que choca con la primera responde 400
+        """
+        user = test_client.post(
+            "/users/", json={"nombre": "Leo", "email": "leo@example.com"}
+        ).json()
+        room = test_client.post(
+            "/rooms/",
+            json={"nombre": "Sala Semanal", "capacidad": 8, "ubicacion": "Piso 2"},
+        ).json()
+        rule = {
+            "userId": user["id"],
+            "roomId": room["id"],
+            "frequency": "weekly",
+            "weekdays": [0, 2],
+            "startDate": "2030-09-02",
+            "endDate": "2030-09-15",
+            "startHour": 9,
+            "endHour": 11,
+        }
+
+        response = test_client.post("/reservations/series", json=rule)
+        assert response.status_code == 201
+        body = response.json()
+        assert [res["date"] for res in body["reservations"]] == [
+            "2030-09-02",
+            "2030-09-04",
+            "2030-09-09",
+            "2030-09-11",
+        ]
+        assert body["weekdays"] == [0, 2]
+        assert body["skippedDates"] == []
+
+        response = test_client.post(
+            "/reservations/series", json={**rule, "frequency": "daily"}
+        )
+        assert response.status_code == 400
+        assert "2030-09-02" in response.json()["detail"]
+
+    def test_room_reservations_pagination(self, test_client):
+        """
+        Test de integración: GET /reservations/room/{id} paginado.
+
+        Verifica:
+        - X-Next-Cursor aparece mientras queden reservas
+        - Siguiendo el cursor se obtienen todas sin repetir
+        - Sin limit ni cursor se devuelven todas (sin X-Next-Cursor)
+        - Sala inexistente: 404; cursor inválido: 400
+        """
+        user = test_client.post(
+            "/users/", json={"nombre": "Max", "email": "max@example.com"}
+        ).json()
+        room = test_client.post(
+            "/rooms/",
+            json={"nombre": "Sala Páginas", "capacidad": 4, "ubicacion": "Piso 6"},
+        ).json()
+        for hour in (8, 10, 12):
+            test_client.post(
+                "/reservations/",
+                json={
+                    "userId": user["id"],
+                    "roomId": room["id"],
+                    "date": "2030-07-01",
+                    "startHour": hour,
+                    "endHour": hour + 1,
+                },
+            )
+
+        url = f"/reservations/room/{room['id']}"
+        first = test_client.get(url, params={"limit": 2})
+        assert [r["start_hour"] for r in first.json()] == [8, 10]
+        cursor = first.headers["X-Next-Cursor"]
+
+        second = test_client.get(url, params={"limit": 2, "cursor": cursor})
+        assert [r["start_hour"] for r in second.json()] == [12]
+        assert "X-Next-Cursor" not in second.headers
+
+        unpaginated = test_client.get(url)
+        assert [r["start_hour"] for r in unpaginated.json()] == [8, 10, 12]
+        assert "X-Next-Cursor" not in unpaginated.headers
+
+        assert test_client.get("/reservations/room/999").status_code == 404
+        assert test_client.get(url, params={"cursor": "x"}).status_code == 400
+
+    def test_export_reservations(self, test_client):
+        """
+        Test de integración: GET /reservations/export en NDJSON y CSV.
+        """
+        user = test_client.post(
+            "/users/", json={"nombre": "Sol", "email": "sol@example.com"}
+        ).json()
+        room = test_client.post(
+            "/rooms/",
+            json={"nombre": "Sala Finanzas", "capacidad": 4, "ubicacion": "Piso 1"},
+        ).json()
+        for hour in (9, 11):
+            test_client.post(
+                "/reservations/",
+                json={
+                    "userId": user["id"],
+                    "roomId": room["id"],
+                    "date": "2030-08-01",
+                    "startHour": hour,
+                    "endHour": hour + 1,
+                },
+            )
+
+        response = test_client.get(
+            "/reservations/export", params={"userId": user["id"]}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert len(response.text.splitlines()) == 2
+
+        response = test_client.get(
+            "/reservations/export", params={"format": "csv", "from": "2030-08-02"}
+        )
+        assert response.status_code == 200
+        assert response.text.splitlines() == [
+            "id,user_id,room_id,date,start_hour,end_hour,series_id"
+        ]
+
+        response = test_client.get("/reservations/export", params={"format": "xml"})
+        assert response.status_code == 400
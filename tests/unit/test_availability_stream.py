@@ -0,0 +1,213 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from src.modules.reservations.reservation_model import Reservation
+from src.modules.reservations.reservation_repository import ReservationRepository
+from src.modules.rooms.availability_stream import (
+    AvailabilityHub,
+    AvailabilityRelay,
+    get_availability_hub,
+)
+from src.modules.rooms.room_model import Room
+from src.modules.users.user_model import User
+
+DAY = date(2030, 3, 4)
+
+
+def _publish_from_thread(hub, changes):
+    """Publica desde otro hilo, como lo hace una ruta síncrona."""
+    thread = threading.Thread(target=hub.publish, args=(changes,))
+    thread.start()
+    thread.join()
+
+
+class TestAvailabilityStream:
+    """Pruebas unitarias para el hub de disponibilidad (SSE)."""
+
+    def test_changes_are_filtered_and_coalesced(self):
+        """
+        Test 1: Un suscriptor solo recibe sus salas y fechas, agrupadas por día.
+
+        Verifica:
+        - Dos reservas del mismo día llegan como un único diff
+        - Las horas fuera del horario (8-20) no se envían
+        - Otras salas y fechas fuera del rango se ignoran
+        """
+        hub = AvailabilityHub()
+
+        async def scenario():
+            subscription = hub.subscribe([1], DAY, date(2030, 3, 10))
+            _publish_from_thread(
+                hub,
+                [
+                    (1, DAY, 9, 11),
+                    (1, DAY, 6, 9),
+                    (2, DAY, 9, 10),
+                    (1, date(2030, 3, 11), 9, 10),
+                ],
+            )
+            changes = await subscription.next_changes(timeout=1)
+            hub.unsubscribe(subscription)
+            return changes
+
+        changes = asyncio.run(scenario())
+
+        assert changes == [{"roomId": 1, "date": "2030-03-04", "taken": [8, 9, 10]}]
+        assert hub.subscriber_count() == 0
+
+    def test_slow_subscriber_overflows(self):
+        """
+        Test 2: Un cliente que no lee y acumula demasiados días se desborda.
+        """
+        hub = AvailabilityHub(max_pending=2)
+
+        async def scenario():
+            subscription = hub.subscribe([1], DAY, date(2030, 3, 10))
+            for offset in range(3):
+                _publish_from_thread(hub, [(1, date(2030, 3, 4 + offset), 9, 10)])
+            await asyncio.sleep(0)
+            changes = await subscription.next_changes(timeout=1)
+            return subscription.overflowed, changes
+
+        overflowed, changes = asyncio.run(scenario())
+
+        assert overflowed is True
+        assert changes == []
+
+    def test_only_committed_reservations_are_published(self, test_db):
+        """
+        Test 3: Las reservas se publican tras el commit, no si hay rollback.
+
+        Verifica:
+        - La reserva deshecha (14-15) no llega al suscriptor
+        - La confirmada (10-12) llega como diff de su día
+        """
+        user = User(nombre="Ana", email="ana@example.com")
+        room = Room(nombre="Sala SSE", capacidad=4, ubicacion="Piso 1")
+        test_db.add_all([user, room])
+        test_db.commit()
+        user_id, room_id = user.id, room.id
+
+        hub = get_availability_hub()
+        repository = ReservationRepository(test_db)
+
+        async def scenario():
+            subscription = hub.subscribe([room_id], DAY, DAY)
+            test_db.add(
+                Reservation(
+                    user_id=user_id,
+                    room_id=room_id,
+                    date=DAY,
+                    start_hour=14,
+                    end_hour=15,
+                )
+            )
+            test_db.flush()
+            test_db.rollback()
+            repository.create(user_id, room_id, DAY, 10, 12)
+            changes = await subscription.next_changes(timeout=1)
+            hub.unsubscribe(subscription)
+            return changes
+
+        changes = asyncio.run(scenario())
+
+        assert changes == [{"roomId": room_id, "date": "2030-03-04", "taken": [10, 11]}]
+
+    def test_relay_reaches_other_workers(self):
+        """
+        Test 4: Una reserva confirmada en un worker llega al stream de otro.
+
+        Verifica:
+        - El relay del worker B entrega al hub de B lo publicado por A
+        - Cada worker ignora sus propios mensajes (A ya lo entregó en local)
+        """
+        fakeredis = pytest.importorskip("fakeredis")
+
+        server = fakeredis.FakeServer()
+        hub_a, hub_b = AvailabilityHub(), AvailabilityHub()
+        relay_a = AvailabilityRelay(
+            fakeredis.FakeRedis(server=server), hub_a, "test:availability"
+        )
+        relay_b = AvailabilityRelay(
+            fakeredis.FakeRedis(server=server), hub_b, "test:availability"
+        )
+        relay_a.start()
+        relay_b.start()
+
+        async def scenario():
+            on_a = hub_a.subscribe([1], DAY, DAY)
+            on_b = hub_b.subscribe([1], DAY, DAY)
+            relay_a.publish([(1, DAY, 9, 11)])
+            return (
+                await on_b.next_changes(timeout=2),
+                await on_a.next_changes(timeout=0.3),
+            )
+
+        try:
+            changes_b, changes_a = asyncio.run(scenario())
+        finally:
+            relay_a.stop()
+            relay_b.stop()
+
+        assert changes_b == [{"roomId": 1, "date": "2030-03-04", "taken": [9, 10]}]
+        assert changes_a == []
+
+    def test_worker_without_streams_publishes(self, test_db, monkeypatch):
+        """
+        Test 5: Un worker que nunca abrió un stream publica sus reservas.
+
+        Simula el arranque de un worker (register_availability_stream, como
+        en api.py) con backend Redis y confirma una reserva sin suscribirse
+        a su hub.
+
+        Verifica:
+        - El commit llega al canal compartido para los streams de otros workers
+        """
+        fakeredis = pytest.importorskip("fakeredis")
+        import redis
+
+        from src.modules.rooms import availability_stream
+        from src.shared.config.settings import Settings
+
+        server = fakeredis.FakeServer()
+        settings = Settings(
+            cache_backend="redis", availability_stream_channel="test:availability"
+        )
+        monkeypatch.setattr(availability_stream, "get_settings", lambda: settings)
+        monkeypatch.setattr(
+            redis, "Redis", lambda **kwargs: fakeredis.FakeRedis(server=server)
+        )
+        # Proceso recién arrancado: sin hub ni relay
+        monkeypatch.setattr(availability_stream, "_hub", None)
+        monkeypatch.setattr(availability_stream, "_relay", None)
+
+        listener = fakeredis.FakeRedis(server=server).pubsub(
+            ignore_subscribe_messages=True
+        )
+        listener.subscribe("test:availability")
+
+        user = User(nombre="Ana", email="ana@example.com")
+        room = Room(nombre="Sala SSE", capacidad=4, ubicacion="Piso 1")
+        test_db.add_all([user, room])
+        test_db.commit()
+
+        availability_stream.register_availability_stream()
+        try:
+            ReservationRepository(test_db).create(user.id, room.id, DAY, 9, 11)
+            # El primer get_message consume la confirmación de la suscripción
+            message = None
+            deadline = time.monotonic() + 2
+            while message is None and time.monotonic() < deadline:
+                message = listener.get_message(timeout=0.1)
+        finally:
+            availability_stream._relay.stop()
+
+        assert message is not None
+        assert json.loads(message["data"])["changes"] == [
+            [room.id, "2030-03-04", 9, 11]
+        ]
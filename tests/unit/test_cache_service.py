@@ -0,0 +1,274 @@
+import threading
+import time
+
+from src.shared.cache.cache_service import CacheService
+
+
+class TestCacheService:
+    """Pruebas unitarias para el servicio de caché en memoria."""
+
+    def test_set_and_get(self):
+        """
+        Test 1: Un valor guardado se puede recuperar y borrar.
+        """
+        cache = CacheService()
+
+        cache.set("availability:1:2025-02-19", {"freeSlots": [8, 9]})
+
+        assert cache.get("availability:1:2025-02-19") == {"freeSlots": [8, 9]}
+        assert cache.delete("availability:1:2025-02-19") is True
+        assert cache.get("availability:1:2025-02-19") is None
+
+    def test_evicts_least_recently_used(self):
+        """
+        Test 2: Al superar max_entries se expulsa la clave menos usada.
+
+        Verifica:
+        - La clave leída recientemente sobrevive
+        - La clave más antigua sin uso se expulsa
+        """
+        cache = CacheService(max_entries=2, shards=1)
+
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "a" pasa a ser la más reciente
+        cache.set("c", 3)
+
+        assert cache.size() == 2
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_evicts_when_over_byte_budget(self):
+        """
+        Test 3: Al superar max_bytes se expulsan claves hasta volver al presupuesto.
+        """
+        cache = CacheService(max_bytes=2000, shards=1)
+
+        for i in range(50):
+            cache.set(f"key:{i}", list(range(20)))
+
+        assert cache.size_bytes() <= 2000
+        assert cache.size() < 50
+        assert cache.get("key:49") == list(range(20))
+
+    def test_sweeper_removes_expired_entries(self):
+        """
+        Test 4: El barrido en segundo plano elimina claves expiradas sin leerlas.
+        """
+        cache = CacheService(sweep_interval=0.05)
+        try:
+            cache.set("short", "x", ttl=0.01)
+            cache.set("long", "y", ttl=60)
+
+            time.sleep(0.3)
+
+            assert cache.size() == 1
+            assert cache.get("long") == "y"
+        finally:
+            cache.stop_sweeper()
+
+    def test_get_or_set_coalesces_concurrent_misses(self):
+        """
+        Test 5: Con muchos hilos fallando a la vez, el cálculo se ejecuta una vez.
+
+        Verifica:
+        - Todos los hilos reciben el mismo valor
+        - El loader se llama una sola vez
+        """
+        cache = CacheService()
+        calls = []
+        start = threading.Barrier(8)
+        results = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)  # simula la consulta a la BD
+            return {"freeSlots": [8, 9]}
+
+        def worker():
+            start.wait()
+            results.append(cache.get_or_set("availability:1:2025-02-19", loader))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [{"freeSlots": [8, 9]}] * 8
+
+    def test_stale_while_revalidate(self):
+        """
+        Test 6: Pasado el soft TTL se sirve el valor viejo y se recalcula en segundo plano.
+
+        Verifica:
+        - La lectura vieja no bloquea (devuelve el valor anterior)
+        - Tras el recálculo, la siguiente lectura ve el valor nuevo
+        - Una invalidación durante el recálculo no se ve pisada
+        """
+        cache = CacheService()
+        cache.set("k", "old", ttl=60, soft_ttl=0.01)
+        time.sleep(0.05)
+
+        assert cache.get_or_set("k", lambda: "new", ttl=60, soft_ttl=60) == "old"
+        cache._refresher.wait()
+        assert cache.get("k") == "new"
+
+        # Recalculo que termina después de una invalidación dura
+        cache.set("k", "old", ttl=60, soft_ttl=0.01)
+        time.sleep(0.05)
+        release = threading.Event()
+
+        def slow_loader():
+            release.wait()
+            return "stale-refresh"
+
+        cache.get_or_set("k", slow_loader, ttl=60, soft_ttl=60)
+        cache.delete("k")
+        release.set()
+        cache._refresher.wait()
+
+        assert cache.get("k") is None
+
+    def test_invalidate_tag(self):
+        """
+        Test 7: invalidate_tag borra solo las claves que llevan ese tag.
+        """
+        cache = CacheService()
+        cache.set("availability:1:2025-02-19", "a", tags=["room:1", "date:2025-02-19"])
+        cache.set("availability:1:2025-02-20", "b", tags=["room:1", "date:2025-02-20"])
+        cache.set("availability:2:2025-02-19", "c", tags=["room:2", "date:2025-02-19"])
+
+        removed = cache.invalidate_tag("room:1")
+
+        assert sorted(removed) == [
+            "availability:1:2025-02-19",
+            "availability:1:2025-02-20",
+        ]
+        assert cache.get("availability:2:2025-02-19") == "c"
+        assert cache.invalidate_tag("date:2025-02-19") == ["availability:2:2025-02-19"]
+
+    def test_load_invalidated_while_computing_is_not_stored(self):
+        """
+        Test 8: Un cálculo que se solapa con una invalidación no se guarda.
+
+        Evita que un valor leído antes de un commit sobreviva a la invalidación.
+        """
+        cache = CacheService()
+
+        def loader():
+            # Mientras "consultamos la BD", otro hilo confirma un cambio
+            cache.invalidate_tag("room:1")
+            return {"freeSlots": [8, 9, 10]}
+
+        value = cache.get_or_set("availability:1:2025-02-19", loader, tags=["room:1"])
+
+        assert value == {"freeSlots": [8, 9, 10]}
+        assert cache.get("availability:1:2025-02-19") is None
+
+    def test_metrics_per_namespace(self):
+        """
+        Test 9: Las métricas se agrupan por el prefijo de la clave.
+
+        Verifica:
+        - Aciertos, fallos, escrituras y expulsiones por namespace
+        - Histograma de latencia de get
+        - Exportación en formato Prometheus con el tamaño actual
+        """
+        cache = CacheService(max_entries=1, shards=1)
+
+        cache.set("availability:1:2025-02-19", {"freeSlots": [8]})
+        cache.get("availability:1:2025-02-19")
+        cache.get("availability:2:2025-02-19")
+        cache.set("room:1", {"id": 1})  # expulsa la disponibilidad
+
+        snapshot = cache.metrics.snapshot()
+        assert snapshot["availability"]["hits"] == 1
+        assert snapshot["availability"]["misses"] == 1
+        assert snapshot["availability"]["sets"] == 1
+        assert snapshot["availability"]["evictions"] == 1
+        assert snapshot["availability"]["latency"]["get"]["count"] == 2
+        assert snapshot["room"]["sets"] == 1
+
+        text = cache.metrics.to_prometheus(size=cache.size())
+        assert 'bookme_cache_hits_total{namespace="availability"} 1' in text
+        assert "bookme_cache_entries 1" in text
+
+    def test_get_or_set_many_loads_only_missing_keys(self):
+        """
+        Test 10: get_or_set_many calcula en bloque solo las claves que faltan.
+
+        Verifica:
+        - El loader recibe únicamente las claves ausentes
+        - Las claves invalidadas durante el cálculo no se guardan
+        """
+        cache = CacheService()
+        cache.set("availability:1:2025-02-19", [8])
+        calls = []
+
+        def loader(keys):
+            calls.append(keys)
+            cache.invalidate_tag("date:2025-02-21")
+            return {key: [9] for key in keys}
+
+        keys = [f"availability:1:2025-02-{day}" for day in (19, 20, 21)]
+        tags = {key: [f"date:{key.split(':')[2]}"] for key in keys}
+
+        values = cache.get_or_set_many(keys, loader, tags=tags)
+
+        assert calls == [keys[1:]]
+        assert values == {keys[0]: [8], keys[1]: [9], keys[2]: [9]}
+        assert cache.get(keys[1]) == [9]
+        assert cache.get(keys[2]) is None
+
+    def test_small_cap_is_respected_across_shards(self):
+        """
+        Test 11: Con menos claves que shards no se supera max_entries.
+
+        Verifica:
+        - El límite total es exactamente max_entries (el resto se reparte)
+        - Con max_entries menor que shards se usan menos shards
+        """
+        cache = CacheService(max_entries=5, shards=16)
+        for index in range(50):
+            cache.set(f"key:{index}", index)
+        assert cache.size() <= 5
+
+        cache = CacheService(max_entries=100, shards=16)
+        for index in range(1000):
+            cache.set(f"key:{index}", index)
+        assert cache.size() <= 100
+
+    def test_get_cache_builds_a_single_instance(self, monkeypatch):
+        """
+        Test 12: Varios hilos que piden el caché a la vez reciben la misma
+        instancia y solo se construye una.
+        """
+        from src.shared.cache import cache_service
+
+        built = []
+
+        class SlowCacheService(CacheService):
+            def __init__(self, *args, **kwargs):
+                built.append(self)
+                time.sleep(0.05)  # ensancha la ventana de la carrera
+                super().__init__(*args, **kwargs)
+
+        monkeypatch.setattr(cache_service, "_cache_instance", None)
+        monkeypatch.setattr(cache_service, "CacheService", SlowCacheService)
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache_service.get_cache()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(built) == 1
+        assert all(result is built[0] for result in results)
+        built[0].stop_sweeper()
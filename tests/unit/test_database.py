@@ -0,0 +1,115 @@
+from datetime import date
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from src.modules.reservations.occupancy_model import RoomDayOccupancy
+from src.modules.reservations.reservation_model import Reservation
+from src.shared.database import connection
+from src.shared.database.connection import Base, init_db
+
+DAY = date(2030, 5, 6)
+
+# Esquema de la primera versión (sin series_id, índices ni tablas derivadas)
+BASELINE_SCHEMA = [
+    "CREATE TABLE users (id INTEGER NOT NULL, nombre VARCHAR(100) NOT NULL, "
+    "email VARCHAR(100) NOT NULL, PRIMARY KEY (id))",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    "CREATE TABLE rooms (id INTEGER NOT NULL, nombre VARCHAR(100) NOT NULL, "
+    "capacidad INTEGER NOT NULL, ubicacion VARCHAR(200) NOT NULL, "
+    "activa BOOLEAN NOT NULL, PRIMARY KEY (id))",
+    "CREATE TABLE reservations (id INTEGER NOT NULL, user_id INTEGER NOT NULL, "
+    "room_id INTEGER NOT NULL, date DATE NOT NULL, start_hour INTEGER NOT NULL, "
+    "end_hour INTEGER NOT NULL, PRIMARY KEY (id), "
+    "FOREIGN KEY(user_id) REFERENCES users (id), "
+    "FOREIGN KEY(room_id) REFERENCES rooms (id))",
+    "CREATE INDEX ix_reservations_date ON reservations (date)",
+    "INSERT INTO users VALUES (1, 'Ana', 'ana@example.com')",
+    "INSERT INTO rooms VALUES (1, 'Sala A', 4, 'Piso 1', 1)",
+    "INSERT INTO reservations VALUES (1, 1, 1, '2030-05-06', 9, 11)",
+]
+
+
+def _use_engine(monkeypatch, engine):
+    """Hace que init_db trabaje sobre `engine` en vez de la BD configurada."""
+    monkeypatch.setattr(connection, "engine", engine)
+    monkeypatch.setattr(
+        connection,
+        "SessionLocal",
+        sessionmaker(autocommit=False, autoflush=False, bind=engine),
+    )
+
+
+def _columns(engine, table):
+    return {column["name"] for column in inspect(engine).get_columns(table)}
+
+
+class TestDatabase:
+    """Pruebas unitarias para la inicialización de la base de datos."""
+
+    def test_init_db_upgrades_baseline_database(self, tmp_path, monkeypatch):
+        """
+        Test 1: init_db pone al día una BD creada con la primera versión.
+
+        Verifica:
+        - Se añade reservations.series_id y las reservas se leen con el ORM
+        - Se crean los índices del modelo que faltaban
+        - Se reconstruye la ocupación a partir de las reservas existentes
+        - Arrancar otra vez no cambia nada (es idempotente)
+        """
+        engine = create_engine(f"sqlite:///{tmp_path / 'bookme.db'}")
+        with engine.begin() as conn:
+            for statement in BASELINE_SCHEMA:
+                conn.exec_driver_sql(statement)
+        _use_engine(monkeypatch, engine)
+
+        init_db()
+        init_db()
+
+        assert "series_id" in _columns(engine, "reservations")
+        indexes = {
+            index["name"] for index in inspect(engine).get_indexes("reservations")
+        }
+        assert {
+            "ix_reservations_room_date_hour_id",
+            "ix_reservations_user_date",
+        } <= indexes
+        with connection.SessionLocal() as db:
+            reservation = db.get(Reservation, 1)
+            occupancy = db.get(RoomDayOccupancy, (1, DAY))
+        assert reservation.series_id is None
+        assert occupancy.mask == 0b110 << 8
+
+    def test_init_db_adds_occupancy_version(self, tmp_path, monkeypatch):
+        """
+        Test 2: Una tabla de ocupación anterior a las versiones recibe la columna.
+
+        Verifica:
+        - room_day_occupancy.version se añade con valor 0 en las filas existentes
+        - El resto de la tabla se conserva
+        """
+        engine = create_engine(f"sqlite:///{tmp_path / 'bookme.db'}")
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[
+                table
+                for table in Base.metadata.sorted_tables
+                if table.name != "room_day_occupancy"
+            ],
+        )
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TABLE room_day_occupancy (room_id INTEGER NOT NULL, "
+                "date DATE NOT NULL, mask INTEGER NOT NULL, "
+                "PRIMARY KEY (room_id, date))"
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO room_day_occupancy VALUES (1, '2030-05-06', 768)"
+            )
+        _use_engine(monkeypatch, engine)
+
+        init_db()
+
+        with connection.SessionLocal() as db:
+            occupancy = db.get(RoomDayOccupancy, (1, DAY))
+        assert (occupancy.mask, occupancy.version) == (768, 0)
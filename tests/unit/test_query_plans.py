@@ -0,0 +1,265 @@
+import inspect
+from datetime import date
+
+from src.modules.reports.report_repository import ReportRepository
+from src.modules.reservations.interval_index import IntervalIndex
+from src.modules.reservations.reservation_repository import ReservationRepository
+from src.modules.rooms.room_model import Room
+from src.modules.rooms.room_repository import RoomRepository
+from src.modules.users.user_repository import UserRepository
+from src.shared.cache.cache_service import get_cache
+from src.shared.database.connection import Base
+
+DAY = date(2030, 1, 7)
+
+# Consultas de lectura que deben resolverse con un índice:
+# (Clase.método, variante, llamada)
+INDEXED_QUERIES = [
+    (
+        "ReservationRepository.get_by_id",
+        "",
+        lambda db: ReservationRepository(db).get_by_id(1),
+    ),
+    (
+        "ReservationRepository.get_by_room",
+        "",
+        lambda db: ReservationRepository(db).get_by_room(1),
+    ),
+    (
+        "ReservationRepository.get_page_by_room",
+        "primera página",
+        lambda db: ReservationRepository(db).get_page_by_room(1, 10),
+    ),
+    (
+        "ReservationRepository.get_page_by_room",
+        "con cursor y rango",
+        lambda db: ReservationRepository(db).get_page_by_room(
+            1, 10, DAY, DAY, after=(DAY, 9, 3)
+        ),
+    ),
+    (
+        "ReservationRepository.count_from_date",
+        "",
+        lambda db: ReservationRepository(db).count_from_date(1, DAY),
+    ),
+    (
+        "ReservationRepository.get_by_room_and_date",
+        "",
+        lambda db: ReservationRepository(db).get_by_room_and_date(1, DAY),
+    ),
+    (
+        "ReservationRepository.iter_for_export",
+        "por sala",
+        lambda db: list(ReservationRepository(db).iter_for_export(room_id=1)),
+    ),
+    (
+        "ReservationRepository.iter_for_export",
+        "por usuario",
+        lambda db: list(ReservationRepository(db).iter_for_export(user_id=1)),
+    ),
+    (
+        "ReservationRepository.iter_for_export",
+        "por fechas",
+        lambda db: list(
+            ReservationRepository(db).iter_for_export(date_from=DAY, date_to=DAY)
+        ),
+    ),
+    (
+        "ReservationRepository.check_overlap",
+        "",
+        lambda db: ReservationRepository(db).check_overlap(1, DAY, 9, 10),
+    ),
+    (
+        "ReservationRepository.get_occupancy_mask",
+        "",
+        lambda db: ReservationRepository(db).get_occupancy_mask(1, DAY),
+    ),
+    (
+        "ReservationRepository.get_occupancy",
+        "",
+        lambda db: ReservationRepository(db).get_occupancy(1, DAY),
+    ),
+    (
+        "ReservationRepository.get_occupancy_masks",
+        "",
+        lambda db: ReservationRepository(db).get_occupancy_masks(
+            [(1, DAY), (2, date(2030, 1, 8))]
+        ),
+    ),
+    (
+        "ReservationRepository.get_occupancy_range",
+        "",
+        lambda db: ReservationRepository(db).get_occupancy_range(1, DAY, DAY),
+    ),
+    ("RoomRepository.get_by_id", "", lambda db: RoomRepository(db).get_by_id(1)),
+    (
+        "RoomRepository.get_active_flags",
+        "",
+        lambda db: RoomRepository(db).get_active_flags([1, 2]),
+    ),
+    (
+        "RoomRepository.get_active_ids",
+        "",
+        lambda db: RoomRepository(db).get_active_ids(),
+    ),
+    (
+        "RoomRepository.search_free",
+        "",
+        lambda db: RoomRepository(db).search_free(DAY, 6, 2),
+    ),
+    ("UserRepository.get_by_id", "", lambda db: UserRepository(db).get_by_id(1)),
+    (
+        "UserRepository.get_existing_ids",
+        "",
+        lambda db: UserRepository(db).get_existing_ids([1, 2]),
+    ),
+    (
+        "UserRepository.get_by_email",
+        "",
+        lambda db: UserRepository(db).get_by_email("ana@example.com"),
+    ),
+    (
+        "ReportRepository.get_rooms",
+        "una sala",
+        lambda db: ReportRepository(db).get_rooms(1),
+    ),
+    (
+        "ReportRepository.iter_reservation_chunks",
+        "todas las salas",
+        lambda db: list(ReportRepository(db).iter_reservation_chunks(DAY, DAY)),
+    ),
+    (
+        "ReportRepository.iter_reservation_chunks",
+        "una sala",
+        lambda db: list(ReportRepository(db).iter_reservation_chunks(DAY, DAY, 1)),
+    ),
+    (
+        "IntervalIndex.load",
+        "una sala",
+        lambda db: IntervalIndex().load(db, room_id=1),
+    ),
+]
+
+# Métodos que no están en INDEXED_QUERIES a propósito
+NOT_CHECKED = {
+    # Escrituras
+    "ReservationRepository.create",
+    "ReservationRepository.create_many",
+    "RoomRepository.create",
+    "RoomRepository.update",
+    "RoomRepository.delete",
+    "UserRepository.create",
+    # Listados completos: recorrer la tabla es lo que se pide
+    "RoomRepository.get_all",
+    "UserRepository.get_all",
+    # Mantenimiento (scripts/occupancy.py): leen todas las reservas
+    "ReservationRepository.rebuild_occupancy",
+    "ReservationRepository.verify_occupancy",
+}
+
+REPOSITORIES = [ReservationRepository, RoomRepository, UserRepository, ReportRepository]
+
+
+def _query_plans(db, captured_statements, action):
+    """
+    Ejecuta `action` y devuelve el plan de cada SELECT que lanzó.
+
+    Returns:
+        Lista de tuplas (sql, [detalle de cada paso del plan])
+    """
+    get_cache().clear()
+    with captured_statements(select_only=True, with_parameters=True) as statements:
+        action(db)
+
+    connection = db.connection()
+    return [
+        (
+            statement,
+            [
+                row[3]
+                for row in connection.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement, parameters
+                )
+            ],
+        )
+        for statement, parameters in statements
+    ]
+
+
+def _full_scans(details):
+    """Pasos del plan que recorren una tabla entera (con o sin índice)."""
+    tables = set(Base.metadata.tables)
+    return [
+        detail
+        for detail in details
+        if detail.startswith("SCAN ") and detail.split()[1] in tables
+    ]
+
+
+class TestQueryPlans:
+    """Regresión de planes de consulta (EXPLAIN QUERY PLAN de SQLite)."""
+
+    def test_queries_use_indexes(self, test_db, captured_statements):
+        """
+        Test 1: Ninguna consulta de los repositorios recorre una tabla entera.
+
+        Verifica:
+        - Cada SELECT que lanza cada método se resuelve con SEARCH (índice)
+        - Todos los métodos comprobados lanzan al menos un SELECT
+        """
+        failures = []
+        for name, variant, action in INDEXED_QUERIES:
+            label = f"{name} ({variant})" if variant else name
+            plans = _query_plans(test_db, captured_statements, action)
+            assert plans, f"{label} no lanzó ninguna consulta"
+            for statement, details in plans:
+                if _full_scans(details):
+                    failures.append(f"{label}: {details}\n    {statement}")
+
+        assert not failures, "Consultas sin índice:\n" + "\n".join(failures)
+
+    def test_every_repository_method_is_checked(self):
+        """
+        Test 2: Todo método público de los repositorios está en la suite.
+
+        Verifica:
+        - Un método nuevo obliga a añadir su consulta a INDEXED_QUERIES o a
+          justificarlo en NOT_CHECKED
+        - No quedan entradas de métodos que ya no existen
+        """
+        methods = {
+            f"{repository.__name__}.{name}"
+            for repository in REPOSITORIES
+            for name, _ in inspect.getmembers(repository, inspect.isfunction)
+            if not name.startswith("_")
+        }
+        checked = {
+            name
+            for name, _, _ in INDEXED_QUERIES
+            if name.split(".")[0] != IntervalIndex.__name__
+        }
+
+        assert methods - checked - NOT_CHECKED == set()
+        assert (checked | NOT_CHECKED) - methods == set()
+
+    def test_full_scan_is_detected(self, test_db, captured_statements):
+        """
+        Test 3: La comprobación detecta un recorrido completo.
+
+        Verifica:
+        - Un filtro por una columna sin índice (nombre de sala) se marca
+        - Los filtros por las columnas indexadas no se marcan
+        """
+        scan = _query_plans(
+            test_db,
+            captured_statements,
+            lambda db: db.query(Room).filter(Room.nombre == "Sala A").all(),
+        )
+        search = _query_plans(
+            test_db,
+            captured_statements,
+            lambda db: RoomRepository(db).get_active_flags([1]),
+        )
+
+        assert _full_scans(scan[0][1]) == ["SCAN rooms"]
+        assert _full_scans(search[0][1]) == []
@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+from src.shared.cache.redis_cache_service import RedisCacheService
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_cache():
+    """Caché Redis sobre un servidor falso en memoria."""
+    return RedisCacheService(client=fakeredis.FakeRedis(), prefix="test")
+
+
+class TestRedisCacheService:
+    """Pruebas unitarias para el backend de caché en Redis."""
+
+    def test_set_get_delete(self, redis_cache):
+        """
+        Test 1: Un valor guardado se recupera igual y se puede borrar.
+        """
+        redis_cache.set("availability:1:2025-02-19", {"freeSlots": [8, 9]})
+
+        assert redis_cache.get("availability:1:2025-02-19") == {"freeSlots": [8, 9]}
+        assert redis_cache.delete("availability:1:2025-02-19") is True
+        assert redis_cache.get("availability:1:2025-02-19") is None
+
+    def test_get_many_and_set_many(self, redis_cache):
+        """
+        Test 2: get_many devuelve solo las claves existentes.
+        """
+        redis_cache.set_many({"a": 1, "b": [2, 3]})
+
+        assert redis_cache.get_many(["a", "b", "missing"]) == {"a": 1, "b": [2, 3]}
+
+    def test_delete_many(self, redis_cache):
+        """
+        Test 2b: delete_many borra varias claves y cuenta solo las que existían.
+        """
+        redis_cache.set_many({"a": 1, "b": 2, "c": 3})
+
+        assert redis_cache.delete_many(["a", "b", "missing"]) == 2
+        assert redis_cache.get_many(["a", "b", "c"]) == {"c": 3}
+        assert redis_cache.delete_many([]) == 0
+
+    def test_clear_only_removes_prefixed_keys(self, redis_cache):
+        """
+        Test 3: clear() no borra claves ajenas a la aplicación.
+        """
+        client = redis_cache._client
+        client.set("other-app:key", "keep")
+        redis_cache.set("a", 1)
+
+        redis_cache.clear()
+
+        assert redis_cache.get("a") is None
+        assert client.get("other-app:key") == b"keep"
+
+    def test_get_or_set_coalesces_across_workers(self):
+        """
+        Test 4: Dos "workers" con el mismo Redis calculan la clave una sola vez.
+        """
+        server = fakeredis.FakeServer()
+        workers = [
+            RedisCacheService(client=fakeredis.FakeRedis(server=server), prefix="test")
+            for _ in range(2)
+        ]
+        calls = []
+        start = threading.Barrier(6)
+        results = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return {"freeSlots": [10]}
+
+        def request(cache):
+            start.wait()
+            results.append(cache.get_or_set("availability:1:2025-02-19", loader))
+
+        threads = [
+            threading.Thread(target=request, args=(workers[i % 2],)) for i in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [{"freeSlots": [10]}] * 6
+
+    def test_stale_while_revalidate(self, redis_cache):
+        """
+        Test 5: Un valor viejo se sirve al instante y se recalcula en segundo plano.
+        """
+        redis_cache.set("k", "old", ttl=60, soft_ttl=1)
+        redis_cache.client.delete("test:fresh:k")  # simula que pasó el soft TTL
+
+        assert redis_cache.get_or_set("k", lambda: "new", ttl=60, soft_ttl=60) == "old"
+        redis_cache._refresher.wait()
+
+        assert redis_cache.get("k") == "new"
+
+    def test_invalidate_tag(self, redis_cache):
+        """
+        Test 6: invalidate_tag borra todas las claves del tag y nada más.
+        """
+        redis_cache.set("availability:1:2025-02-19", "a", tags=["room:1"])
+        redis_cache.set("room:1", {"activa": True}, tags=["room:1"])
+        redis_cache.set("availability:2:2025-02-19", "c", tags=["room:2"])
+
+        removed = redis_cache.invalidate_tag("room:1")
+
+        assert sorted(removed) == ["availability:1:2025-02-19", "room:1"]
+        assert redis_cache.get("room:1") is None
+        assert redis_cache.get("availability:2:2025-02-19") == "c"
+
+    def test_get_or_set_many(self, redis_cache):
+        """
+        Test 7: get_or_set_many calcula en bloque solo las claves que faltan.
+        """
+        redis_cache.set("availability:1:2025-02-19", [8])
+        calls = []
+
+        def loader(keys):
+            calls.append(keys)
+            return {key: [9] for key in keys}
+
+        keys = ["availability:1:2025-02-19", "availability:1:2025-02-20"]
+        values = redis_cache.get_or_set_many(keys, loader, tags={keys[1]: ["room:1"]})
+
+        assert calls == [keys[1:]]
+        assert values == {keys[0]: [8], keys[1]: [9]}
+        assert redis_cache.invalidate_tag("room:1") == [keys[1]]
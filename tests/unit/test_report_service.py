@@ -0,0 +1,68 @@
+from datetime import date
+
+import pytest
+
+from src.modules.reports.report_service import ReportService
+from src.modules.reservations.reservation_repository import ReservationRepository
+from src.modules.rooms.room_service import RoomService
+from src.modules.users.user_service import UserService
+
+
+class TestReportService:
+    """Pruebas unitarias para el servicio de reportes."""
+
+    def test_utilization_report(self, test_db):
+        """
+        Test 1: El reporte agrega la ocupación por sala, día de la semana y hora.
+
+        Verifica:
+        - Las horas fuera del horario de apertura cuentan como reservadas pero
+          no en la utilización
+        - Las reservas fuera del rango se ignoran
+        - Las horas pico se ordenan por ocupación (y por hora en empate)
+        """
+        user = UserService(test_db).create_user("Irene", "irene@example.com")
+        room_a = RoomService(test_db).create_room("Sala A", 4, "Piso 1")
+        room_b = RoomService(test_db).create_room("Sala B", 6, "Piso 1")
+        repository = ReservationRepository(test_db)
+
+        monday, tuesday = date(2025, 2, 17), date(2025, 2, 18)
+        repository.create(user.id, room_a.id, monday, 8, 10)
+        repository.create(user.id, room_a.id, monday, 10, 11)
+        repository.create(user.id, room_a.id, tuesday, 6, 8)
+        repository.create(user.id, room_b.id, tuesday, 18, 20)
+        repository.create(user.id, room_b.id, date(2025, 2, 19), 8, 20)
+
+        report = ReportService(test_db).get_utilization(monday, tuesday)
+
+        assert report["reservedHours"] == 7
+        assert report["utilization"] == 10.42
+        assert [(r["reservedHours"], r["utilization"]) for r in report["rooms"]] == [
+            (5, 12.5),
+            (2, 8.33),
+        ]
+        assert report["byWeekday"] == [
+            {"weekday": 0, "utilization": 12.5},
+            {"weekday": 1, "utilization": 8.33},
+        ]
+        assert report["byHour"][8] == {"hour": 8, "utilization": 25.0}
+        assert report["byHour"][12] == {"hour": 12, "utilization": 0.0}
+        assert report["peakHours"] == [6, 7, 8]
+
+    def test_utilization_report_filters(self, test_db):
+        """
+        Test 2: Filtro por sala y validación del rango.
+        """
+        room = RoomService(test_db).create_room("Sala Sola", 4, "Piso 1")
+        service = ReportService(test_db)
+
+        report = service.get_utilization(
+            date(2025, 1, 1), date(2025, 1, 31), room_id=room.id
+        )
+        assert [r["roomId"] for r in report["rooms"]] == [room.id]
+        assert report["peakHours"] == []
+
+        with pytest.raises(ValueError):
+            service.get_utilization(date(2025, 2, 1), date(2025, 1, 1))
+        with pytest.raises(ValueError):
+            service.get_utilization(date(2025, 1, 1), date(2025, 1, 2), room_id=999)
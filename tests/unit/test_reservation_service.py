@@ -1,8 +1,16 @@
 from datetime import date
 
 import pytest
+from sqlalchemy import insert
 
-from src.modules.reservations.reservation_service import ReservationService
+from src.modules.reservations.interval_index import get_interval_index
+from src.modules.reservations.occupancy_model import hours_mask
+from src.modules.reservations.reservation_model import Reservation
+from src.modules.reservations.reservation_repository import ReservationRepository
+from src.modules.reservations.reservation_service import (
+    ReservationService,
+    RoomNotFoundError,
+)
 from src.modules.rooms.room_service import RoomService
 from src.modules.users.user_service import UserService
 
@@ -163,3 +171,555 @@ class TestReservationService:
             )
 
         assert "No existe el usuario con ID 9999" in str(exc_info.value)
+
+    def test_create_reservation_invalidates_cached_availability(self, test_db):
+        """
+        Test 6: Tras el commit de una reserva, la disponibilidad cacheada se invalida.
+
+        Verifica:
+        - La primera consulta queda en caché
+        - Crear la reserva (sin invalidar a mano) hace que la siguiente
+          consulta ya no ofrezca las horas reservadas
+        """
+        user_service = UserService(test_db)
+        room_service = RoomService(test_db)
+        reservation_service = ReservationService(test_db)
+
+        user = user_service.create_user("Eva", "eva@example.com")
+        room = room_service.create_room("Sala Eventos", 6, "Piso 6")
+
+        before = room_service.get_availability(room.id, date(2025, 7, 1))
+        assert 10 in before["freeSlots"]
+
+        reservation_service.create_reservation(
+            user_id=user.id,
+            room_id=room.id,
+            reservation_date=date(2025, 7, 1),
+            start_hour=10,
+            end_hour=12,
+        )
+
+        after = room_service.get_availability(room.id, date(2025, 7, 1))
+        assert 10 not in after["freeSlots"]
+        assert 11 not in after["freeSlots"]
+
+    def test_occupancy_bitmap_tracks_reservations(self, test_db):
+        """
+        Test 7: Cada reserva marca sus horas en el bitmap de ocupación del día.
+
+        Verifica:
+        - El bitmap acumula las horas de varias reservas
+        - Rangos contiguos no se consideran solapados
+        - rebuild_occupancy reconstruye el mismo bitmap desde las reservas
+        """
+        user_service = UserService(test_db)
+        room_service = RoomService(test_db)
+        reservation_service = ReservationService(test_db)
+        repository = ReservationRepository(test_db)
+
+        user = user_service.create_user("Luis", "luis@example.com")
+        room = room_service.create_room("Sala Bitmap", 4, "Piso 7")
+        day = date(2025, 8, 1)
+
+        for start_hour, end_hour in [(9, 11), (14, 15)]:
+            reservation_service.create_reservation(
+                user_id=user.id,
+                room_id=room.id,
+                reservation_date=day,
+                start_hour=start_hour,
+                end_hour=end_hour,
+            )
+
+        expected = hours_mask(9, 11) | hours_mask(14, 15)
+        assert repository.get_occupancy_mask(room.id, day) == expected
+        assert repository.check_overlap(room.id, day, 10, 12) is True
+        assert repository.check_overlap(room.id, day, 11, 14) is False
+
+        assert repository.rebuild_occupancy() == 1
+        assert repository.get_occupancy_mask(room.id, day) == expected
+
+    def test_verify_occupancy_detects_drift(self, test_db):
+        """
+        Test 8: verify_occupancy detecta días desincronizados y rebuild los repara.
+        """
+        from src.modules.reservations.occupancy_model import RoomDayOccupancy
+
+        user = UserService(test_db).create_user("Raúl", "raul@example.com")
+        room = RoomService(test_db).create_room("Sala Check", 4, "Piso 8")
+        repository = ReservationRepository(test_db)
+        day = date(2025, 10, 1)
+
+        repository.create(user.id, room.id, day, 9, 10)
+        assert repository.verify_occupancy() == {}
+
+        # Simular una escritura que no pasó por el repositorio
+        test_db.query(RoomDayOccupancy).update({"mask": 0})
+        test_db.commit()
+
+        assert repository.verify_occupancy() == {(room.id, day): (0, hours_mask(9, 10))}
+
+        repository.rebuild_occupancy()
+        assert repository.verify_occupancy() == {}
+
+    def test_find_next_available(self, test_db, monkeypatch):
+        """
+        Test 9: Busca el primer hueco de K horas seguidas con el índice en memoria.
+
+        Verifica:
+        - Salta las reservas y el final del horario del día
+        - Sin sala, elige el hueco más temprano de cualquier sala activa
+        - Una reserva que el índice no conoce (otro proceso) se detecta en la
+          BD y se recarga la sala
+        """
+        from src.shared.config.settings import get_settings
+
+        monkeypatch.setattr(get_settings(), "reservation_index_enabled", True)
+
+        user = UserService(test_db).create_user("Olga", "olga@example.com")
+        room_service = RoomService(test_db)
+        room_a = room_service.create_room("Sala A", 4, "Piso 1")
+        room_b = room_service.create_room("Sala B", 4, "Piso 1")
+        service = ReservationService(test_db)
+        day = date(2025, 11, 3)
+
+        service.create_reservation(user.id, room_a.id, day, 8, 10)
+        service.create_reservation(user.id, room_a.id, day, 11, 19)
+
+        # El índice ya está cargado: las siguientes reservas llegan por el commit
+        assert service.find_next_available(day, 2, room_a.id) == {
+            "roomId": room_a.id,
+            "date": "2025-11-04",
+            "startHour": 8,
+            "endHour": 10,
+        }
+        assert service.find_next_available(day, 1, room_a.id)["startHour"] == 10
+
+        service.create_reservation(user.id, room_b.id, day, 8, 9)
+        assert service.find_next_available(day, 1) == {
+            "roomId": room_b.id,
+            "date": "2025-11-03",
+            "startHour": 9,
+            "endHour": 10,
+        }
+
+        # Reserva escrita por "otro proceso": con Core, el índice no se entera
+        repository = ReservationRepository(test_db)
+        test_db.execute(
+            insert(Reservation).values(
+                user_id=user.id, room_id=room_b.id, date=day, start_hour=9, end_hour=20
+            )
+        )
+        repository._mark_occupied(room_b.id, day, hours_mask(9, 20))
+        test_db.commit()
+
+        assert service.find_next_available(day, 1)["roomId"] == room_a.id
+        assert get_interval_index().next_available(room_b.id, day, 1) == (
+            date(2025, 11, 4),
+            8,
+        )
+
+    def test_index_precheck_rejects_without_db(
+        self, test_db, monkeypatch, captured_statements
+    ):
+        """
+        Test 10: Con el índice activado, un solapamiento conocido no llega a la BD.
+
+        Verifica:
+        - La reserva confirmada llega al índice tras el commit
+        - El rechazo no ejecuta ninguna consulta
+        - El solapamiento tiene prioridad sobre un usuario inexistente o una
+          sala inactiva; en un horario libre esos errores se mantienen
+        - Un horario libre se sigue validando y guardando en la BD
+        """
+        from src.shared.config.settings import get_settings
+
+        monkeypatch.setattr(get_settings(), "reservation_index_enabled", True)
+        get_interval_index().load(test_db)
+
+        user = UserService(test_db).create_user("Nora", "nora@example.com")
+        room = RoomService(test_db).create_room("Sala Índice", 4, "Piso 1")
+        service = ReservationService(test_db)
+        day = date(2025, 12, 1)
+        service.create_reservation(user.id, room.id, day, 10, 12)
+        user_id, room_id = user.id, room.id  # tras el commit, leerlos consulta la BD
+
+        with captured_statements() as statements:
+            with pytest.raises(ValueError) as exc_info:
+                service.create_reservation(user_id, room_id, day, 11, 13)
+
+        assert "Ya existe una reserva" in str(exc_info.value)
+        assert statements == []
+
+        with pytest.raises(ValueError) as exc_info:
+            service.create_reservation(9999, room_id, day, 11, 13)
+        assert "Ya existe una reserva" in str(exc_info.value)
+        with pytest.raises(ValueError) as exc_info:
+            service.create_reservation(9999, room_id, day, 14, 15)
+        assert "No existe el usuario" in str(exc_info.value)
+
+        reservation = service.create_reservation(user_id, room_id, day, 12, 13)
+        assert reservation.id is not None
+
+        RoomService(test_db).update_room(room_id, "Sala Índice", 4, "Piso 1", False)
+        with pytest.raises(ValueError) as exc_info:
+            service.create_reservation(user_id, room_id, day, 11, 13)
+        assert "Ya existe una reserva" in str(exc_info.value)
+        with pytest.raises(ValueError) as exc_info:
+            service.create_reservation(user_id, room_id, day, 14, 15)
+        assert "no está activa" in str(exc_info.value)
+
+    def test_concurrent_bookings_rejected_by_slot_claims(self, tmp_path):
+        """
+        Test 11: Dos peticiones que pasan la comprobación a la vez no reservan
+        la misma hora.
+
+        Verifica:
+        - Ambas sesiones ven el horario libre antes de escribir
+        - La segunda en confirmar recibe el error de solapamiento
+        - Solo queda una reserva y la sesión que falló sigue siendo usable
+        - Reservar otra sala no se ve afectado
+        """
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+
+        from src.shared.database.connection import Base
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'slots.db'}")
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(bind=engine)
+        day = date(2030, 5, 6)
+
+        with SessionLocal() as setup:
+            user = UserService(setup).create_user("Eva", "eva@example.com")
+            room = RoomService(setup).create_room("Sala Carrera", 4, "Piso 1")
+            other = RoomService(setup).create_room("Sala Libre", 4, "Piso 2")
+            user_id, room_id, other_id = user.id, room.id, other.id
+
+        with SessionLocal() as first_db, SessionLocal() as second_db:
+            first = ReservationRepository(first_db)
+            second = ReservationRepository(second_db)
+            assert first.check_overlap(room_id, day, 9, 11) is False
+            assert second.check_overlap(room_id, day, 10, 12) is False
+            first_db.rollback()
+            second_db.rollback()
+
+            first.create(user_id, room_id, day, 9, 11)
+            service = ReservationService(second_db)
+            service.repository.check_overlap = lambda **kwargs: False  # ya pasó
+            with pytest.raises(ValueError) as exc_info:
+                service.create_reservation(user_id, room_id, day, 10, 12)
+            assert "Ya existe una reserva" in str(exc_info.value)
+
+            assert second_db.query(Reservation).count() == 1
+            assert service.create_reservation(user_id, other_id, day, 10, 12).id
+            assert ReservationRepository(second_db).verify_occupancy() == {}
+
+    def test_batch_reservations_atomic_and_best_effort(
+        self, test_db, captured_statements
+    ):
+        """
+        Test 12: Un lote se valida junto y respeta el modo elegido.
+
+        Verifica:
+        - atomic: un elemento inválido impide crear todos (los válidos: skipped)
+        - best_effort: se crean los válidos y se informa de cada fallo
+        - Se detectan solapamientos dentro del lote y con reservas existentes
+        - Las validaciones no dependen del tamaño del lote (consultas IN)
+        """
+        user = UserService(test_db).create_user("Olga", "olga@example.com")
+        room = RoomService(test_db).create_room("Sala Lote", 10, "Piso 3")
+        service = ReservationService(test_db)
+        day = date(2030, 6, 3)
+        service.create_reservation(user.id, room.id, day, 8, 9)
+        user_id, room_id = user.id, room.id
+
+        def item(start_hour, end_hour, reservation_date=day, user=user_id):
+            return {
+                "user_id": user,
+                "room_id": room_id,
+                "reservation_date": reservation_date,
+                "start_hour": start_hour,
+                "end_hour": end_hour,
+            }
+
+        items = [
+            item(9, 10),
+            item(8, 10),  # se solapa con la reserva existente
+            item(10, 12),
+            item(11, 13),  # se solapa con el elemento anterior
+            item(14, 15, user=999),
+        ]
+
+        results = service.create_reservations_batch(items, atomic=True)
+        assert [r["status"] for r in results] == [
+            "skipped",
+            "failed",
+            "skipped",
+            "failed",
+            "failed",
+        ]
+        assert "Ya existe una reserva" in results[1]["error"]
+        assert "mismo lote" in results[3]["error"]
+        assert "No existe el usuario" in results[4]["error"]
+        assert test_db.query(Reservation).count() == 1
+
+        items += [item(9, 10, reservation_date=date(2030, 6, 4 + n)) for n in range(10)]
+        with captured_statements(select_only=True) as selects:
+            results = service.create_reservations_batch(items, atomic=False)
+
+        assert [r["status"] for r in results[:5]] == [
+            "created",
+            "failed",
+            "created",
+            "failed",
+            "failed",
+        ]
+        assert all(r["status"] == "created" for r in results[5:])
+        assert results[0]["reservation"].start_hour == 9
+        assert test_db.query(Reservation).count() == 13
+        assert ReservationRepository(test_db).verify_occupancy() == {}
+
+        assert len(selects) == 4  # usuarios, salas, ocupación y refresco final
+
+    def test_create_series_with_conflicts(self, test_db, monkeypatch):
+        """
+        Test 13: Una serie semanal se expande, detecta conflictos y se crea en bloque.
+
+        Verifica:
+        - Sin skip_conflicts, una fecha ocupada impide crear la serie
+        - Con skip_conflicts se crean las demás y se informa de la omitida
+        - Las reservas quedan asociadas a la serie
+        - El caché de todos los días se invalida en una sola llamada
+        """
+        from src.shared.cache.cache_service import get_cache
+
+        user = UserService(test_db).create_user("Hugo", "hugo@example.com")
+        room = RoomService(test_db).create_room("Sala Serie", 6, "Piso 4")
+        service = ReservationService(test_db)
+        service.create_reservation(user.id, room.id, date(2030, 9, 16), 10, 11)
+        user_id, room_id = user.id, room.id
+
+        rule = dict(
+            user_id=user_id,
+            room_id=room_id,
+            frequency="weekly",
+            start_date=date(2030, 9, 2),  # lunes
+            end_date=date(2030, 9, 30),
+            start_hour=9,
+            end_hour=11,
+        )
+        with pytest.raises(ValueError) as exc_info:
+            service.create_series(**rule)
+        assert "2030-09-16" in str(exc_info.value)
+        assert test_db.query(Reservation).count() == 1
+
+        calls = []
+        cache = get_cache()
+        original = cache.delete_many
+        monkeypatch.setattr(
+            cache, "delete_many", lambda keys: calls.append(set(keys)) or original(keys)
+        )
+
+        series, reservations, skipped = service.create_series(
+            **rule, skip_conflicts=True
+        )
+
+        assert skipped == [date(2030, 9, 16)]
+        assert [res.date for res in reservations] == [
+            date(2030, 9, 2),
+            date(2030, 9, 9),
+            date(2030, 9, 23),
+            date(2030, 9, 30),
+        ]
+        assert all(res.series_id == series.id for res in reservations)
+        assert calls == [{f"availability:{room_id}:{res.date}" for res in reservations}]
+        assert ReservationRepository(test_db).verify_occupancy() == {}
+
+    def test_reservations_by_room_keyset_pagination(self, test_db):
+        """
+        Test 14: Las reservas de una sala se recorren por páginas con cursor.
+
+        Verifica:
+        - El orden es (fecha, hora de inicio, id) y ninguna fila se repite
+        - La última página no trae cursor
+        - Los filtros from/to y un cursor mal formado
+        """
+        user = UserService(test_db).create_user("Pia", "pia@example.com")
+        room = RoomService(test_db).create_room("Sala Historial", 4, "Piso 5")
+        service = ReservationService(test_db)
+        slots = [
+            (date(2030, 1, 2), 9),
+            (date(2030, 1, 1), 14),
+            (date(2030, 1, 1), 9),
+            (date(2030, 1, 3), 8),
+            (date(2030, 1, 2), 12),
+        ]
+        for day, hour in slots:
+            service.create_reservation(user.id, room.id, day, hour, hour + 1)
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            rows, cursor = service.get_reservations_by_room(
+                room.id, limit=2, cursor=cursor
+            )
+            seen += [(row.date, row.start_hour) for row in rows]
+            pages += 1
+            if cursor is None:
+                break
+
+        assert pages == 3
+        assert seen == sorted(slots)
+
+        rows, cursor = service.get_reservations_by_room(
+            room.id, date_from=date(2030, 1, 2), date_to=date(2030, 1, 2)
+        )
+        assert [(row.date, row.start_hour) for row in rows] == [
+            (date(2030, 1, 2), 9),
+            (date(2030, 1, 2), 12),
+        ]
+        assert cursor is None
+
+        with pytest.raises(ValueError) as exc_info:
+            service.get_reservations_by_room(room.id, cursor="no-es-un-cursor")
+        assert "Cursor inválido" in str(exc_info.value)
+
+        with pytest.raises(RoomNotFoundError):
+            service.get_reservations_by_room(9999)
+
+    def test_export_reservations_streams_batches(self, test_db, monkeypatch):
+        """
+        Test 15: La exportación se genera por bloques y respeta los filtros.
+
+        Verifica:
+        - No se lee nada hasta recorrer el iterador
+        - Un trozo de texto por bloque de filas (más la cabecera en CSV)
+        - NDJSON y CSV con las mismas columnas y filtros por sala/fechas
+        """
+        import json
+
+        from src.modules.reservations import reservation_service
+
+        monkeypatch.setattr(reservation_service, "EXPORT_BATCH_SIZE", 2)
+        user = UserService(test_db).create_user("Rita", "rita@example.com")
+        room = RoomService(test_db).create_room("Sala Export", 4, "Piso 9")
+        other = RoomService(test_db).create_room("Sala Otra", 4, "Piso 9")
+        service = ReservationService(test_db)
+        for day in range(1, 6):
+            service.create_reservation(user.id, room.id, date(2030, 2, day), 9, 10)
+        service.create_reservation(user.id, other.id, date(2030, 2, 1), 9, 10)
+
+        chunks = service.export_reservations("ndjson", room_id=room.id)
+        assert not isinstance(chunks, list)
+        chunks = list(chunks)
+        assert len(chunks) == 3  # 5 filas en bloques de 2
+        rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+        assert [row["date"] for row in rows] == [f"2030-02-0{d}" for d in range(1, 6)]
+        assert rows[0]["series_id"] is None
+
+        csv_text = "".join(
+            service.export_reservations(
+                "csv", date_from=date(2030, 2, 1), date_to=date(2030, 2, 1)
+            )
+        )
+        lines = csv_text.splitlines()
+        assert lines[0] == "id,user_id,room_id,date,start_hour,end_hour,series_id"
+        assert len(lines) == 3
+        assert lines[1].endswith(",2030-02-01,9,10,")
+
+        with pytest.raises(ValueError):
+            service.export_reservations("xml")
+
+    def test_concurrent_first_bookings_of_a_day(self):
+        """
+        Test 16: Dos primeras reservas simultáneas del mismo día (horas
+        distintas) se confirman ambas.
+
+        Verifica:
+        - La segunda sesión escribe la ocupación justo cuando la primera ya
+          creó la fila del día y no falla por la clave primaria
+        - El bitmap acaba con las horas de las dos reservas
+        """
+        from sqlalchemy import create_engine, event
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+
+        from src.modules.reservations.occupancy_model import RoomDayOccupancy
+        from src.shared.database.connection import Base
+
+        # Una sola conexión compartida: SQLite no deja intercalar dos
+        # escritores, así se simula el orden exacto de una BD con bloqueo
+        # por filas
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(bind=engine)
+        day = date(2030, 5, 6)
+
+        with SessionLocal() as setup:
+            user_id = UserService(setup).create_user("Noa", "noa@example.com").id
+            room_id = RoomService(setup).create_room("Sala Doble", 4, "Piso 1").id
+
+        with SessionLocal() as first_db, SessionLocal() as second_db:
+            interleaved = []
+
+            def first_books_meanwhile(conn, cursor, statement, *args):
+                # Tras la primera escritura de la ocupación de la segunda
+                # sesión, la otra confirma su reserva del mismo día
+                if "room_day_occupancy" in statement and not interleaved:
+                    interleaved.append(statement)
+                    ReservationRepository(first_db).create(user_id, room_id, day, 9, 10)
+
+            event.listen(engine, "after_cursor_execute", first_books_meanwhile)
+            try:
+                ReservationRepository(second_db).create(user_id, room_id, day, 14, 16)
+            finally:
+                event.remove(engine, "after_cursor_execute", first_books_meanwhile)
+
+            assert interleaved
+            occupancy = second_db.get(RoomDayOccupancy, (room_id, day))
+            assert occupancy.mask == hours_mask(9, 10) | hours_mask(14, 16)
+            assert occupancy.version == 2
+            assert second_db.query(Reservation).count() == 2
+
+    def test_find_next_available_without_index(self, test_db, monkeypatch):
+        """
+        Test 17: Sin el índice activado, el primer hueco sale de los bitmaps.
+
+        Verifica:
+        - Da los mismos huecos que el índice (por sala y entre salas)
+        - No carga el índice en memoria
+        - La búsqueda está acotada a NEXT_AVAILABLE_MAX_DAYS días
+        """
+        from src.modules.reservations import reservation_service
+
+        user = UserService(test_db).create_user("Olga", "olga@example.com")
+        room_service = RoomService(test_db)
+        room_a = room_service.create_room("Sala A", 4, "Piso 1")
+        room_b = room_service.create_room("Sala B", 4, "Piso 1")
+        service = ReservationService(test_db)
+        day = date(2025, 11, 3)
+        service.create_reservation(user.id, room_a.id, day, 8, 10)
+        service.create_reservation(user.id, room_a.id, day, 11, 19)
+        service.create_reservation(user.id, room_b.id, day, 8, 9)
+
+        assert service.find_next_available(day, 2, room_a.id) == {
+            "roomId": room_a.id,
+            "date": "2025-11-04",
+            "startHour": 8,
+            "endHour": 10,
+        }
+        assert service.find_next_available(day, 1) == {
+            "roomId": room_b.id,
+            "date": "2025-11-03",
+            "startHour": 9,
+            "endHour": 10,
+        }
+        assert get_interval_index().loaded is False
+
+        monkeypatch.setattr(reservation_service, "NEXT_AVAILABLE_MAX_DAYS", 1)
+        with pytest.raises(ValueError) as exc_info:
+            service.find_next_available(day, 9, room_a.id)
+        assert "próximos 1 días" in str(exc_info.value)
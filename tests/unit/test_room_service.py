@@ -92,3 +92,119 @@ class TestRoomService:
         # Verificar que ya no existe
         with pytest.raises(ValueError):
             service.get_room_by_id(room.id)
+
+    def test_update_room_purges_cached_room_data(self, test_db):
+        """
+        Test 5: Desactivar una sala purga su caché (datos y disponibilidad).
+
+        Verifica:
+        - Los datos cacheados reflejan el cambio de estado
+        - La disponibilidad cacheada deja de servirse para la sala inactiva
+        """
+        from datetime import date
+
+        service = RoomService(test_db)
+        room = service.create_room(nombre="Sala Tags", capacidad=4, ubicacion="Piso 1")
+
+        assert service.get_room_data(room.id)["activa"] is True
+        assert service.get_availability(room.id, date(2025, 2, 19))["freeSlots"]
+
+        service.update_room(
+            room_id=room.id,
+            nombre=room.nombre,
+            capacidad=room.capacidad,
+            ubicacion=room.ubicacion,
+            activa=False,
+        )
+
+        assert service.get_room_data(room.id)["activa"] is False
+        with pytest.raises(ValueError):
+            service.get_availability(room.id, date(2025, 2, 19))
+
+    def test_availability_range_reuses_daily_cache(self, test_db, captured_statements):
+        """
+        Test 6: La disponibilidad por rango comparte el caché por día.
+
+        Verifica:
+        - Los días ya cacheados no se recalculan
+        - Los días que faltan se calculan con una sola consulta
+        - Un rango invertido se rechaza
+        """
+        from datetime import date
+
+        service = RoomService(test_db)
+        room = service.create_room(nombre="Sala Rango", capacidad=4, ubicacion="Piso 2")
+        service.get_availability(room.id, date(2025, 3, 2))
+
+        with captured_statements() as statements:
+            result = service.get_availability_range(
+                room.id, date(2025, 3, 1), date(2025, 3, 7)
+            )
+
+        assert len([s for s in statements if "room_day_occupancy" in s]) == 1
+        assert list(result["days"]) == [f"2025-03-0{day}" for day in range(1, 8)]
+        assert result["days"]["2025-03-01"] == list(range(8, 20))
+        assert service.cache.get(f"availability:{room.id}:2025-03-05") is not None
+
+        with pytest.raises(ValueError):
+            service.get_availability_range(room.id, date(2025, 3, 7), date(2025, 3, 1))
+
+    def test_search_available_rooms(self, test_db):
+        """
+        Test 7: La búsqueda devuelve las salas libres ordenadas por mejor ajuste.
+
+        Verifica:
+        - Se excluyen las salas pequeñas, inactivas u ocupadas en ese horario
+        - Una reserva contigua no bloquea la sala
+        - La sala de capacidad más ajustada va primero
+        """
+        from datetime import date
+
+        from src.modules.reservations.reservation_service import ReservationService
+        from src.modules.users.user_service import UserService
+
+        service = RoomService(test_db)
+        user = UserService(test_db).create_user("Sara", "sara@example.com")
+
+        small = service.create_room("Sala 4", 4, "Piso 1")
+        big = service.create_room("Sala 20", 20, "Piso 1")
+        fit = service.create_room("Sala 8", 8, "Piso 1")
+        busy = service.create_room("Sala 10", 10, "Piso 1")
+        inactive = service.create_room("Sala 12", 12, "Piso 1")
+        service.update_room(inactive.id, "Sala 12", 12, "Piso 1", activa=False)
+
+        reservations = ReservationService(test_db)
+        day = date(2025, 9, 1)
+        reservations.create_reservation(user.id, busy.id, day, 11, 13)
+        reservations.create_reservation(user.id, fit.id, day, 12, 14)
+
+        rooms = service.search_available_rooms(day, 10, 12, min_capacity=8)
+
+        assert [room.id for room in rooms] == [fit.id, big.id]
+        assert small.id not in [room.id for room in rooms]
+
+    def test_missing_room_is_negatively_cached(self, test_db, captured_statements):
+        """
+        Test 8: Un ID de sala inexistente se recuerda hasta que se crea la sala.
+
+        Verifica:
+        - RoomRepository.get_by_id cachea el fallo y no repite la consulta
+        - Al crear la sala con ese ID se invalida la entrada `missing:room:{id}`
+        """
+        from src.modules.rooms.room_repository import RoomRepository
+        from src.shared.cache.cache_service import get_cache
+
+        repository = RoomRepository(test_db)
+
+        with captured_statements(select_only=True) as statements:
+            for _ in range(3):
+                assert repository.get_by_id(1) is None
+
+        assert len(statements) == 1
+        assert get_cache().get("missing:room:1") is True
+
+        room = RoomService(test_db).create_room("Sala Nueva", 4, "Piso 1")
+
+        assert room.id == 1
+        assert get_cache().get("missing:room:1") is None
+        assert repository.get_by_id(1).nombre == "Sala Nueva"
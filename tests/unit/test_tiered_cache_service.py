@@ -0,0 +1,196 @@
+import time
+
+import pytest
+
+from src.shared.cache.cache_service import CacheService
+from src.shared.cache.redis_cache_service import RedisCacheService
+from src.shared.cache.tiered_cache_service import TieredCacheService
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def _make_worker(server):
+    """Crea un caché de dos niveles que simula un worker independiente."""
+    l2 = RedisCacheService(client=fakeredis.FakeRedis(server=server), prefix="test")
+    return TieredCacheService(l1=CacheService(max_entries=100), l2=l2, l1_ttl=60)
+
+
+def _wait_until(condition, timeout=2.0):
+    """Espera (con límite) a que se cumpla una condición."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestTieredCacheService:
+    """Pruebas unitarias para el caché de dos niveles."""
+
+    def test_read_through_and_stats(self):
+        """
+        Test 1: Un fallo en L1 se resuelve en L2 y la siguiente lectura es de L1.
+        """
+        server = fakeredis.FakeServer()
+        writer = _make_worker(server)
+        reader = _make_worker(server)
+
+        writer.set("availability:1:2025-02-19", {"freeSlots": [8]})
+
+        assert reader.get("availability:1:2025-02-19") == {"freeSlots": [8]}
+        assert reader.get("availability:1:2025-02-19") == {"freeSlots": [8]}
+        assert reader.get("missing") is None
+        assert reader.stats() == {
+            "l1": {"hits": 1, "misses": 2},
+            "l2": {"hits": 1, "misses": 1},
+        }
+
+    def test_delete_is_broadcast_to_other_workers(self):
+        """
+        Test 2: Invalidar en un worker limpia el L1 de los demás.
+        """
+        server = fakeredis.FakeServer()
+        worker_a = _make_worker(server)
+        worker_b = _make_worker(server)
+        worker_b.start_listener()
+        try:
+            worker_a.set("availability:1:2025-02-19", {"freeSlots": [8, 9]})
+            worker_b.get("availability:1:2025-02-19")  # llena L1 de B
+            assert worker_b.l1.get("availability:1:2025-02-19") is not None
+
+            worker_a.delete("availability:1:2025-02-19")
+
+            assert _wait_until(
+                lambda: worker_b.l1.get("availability:1:2025-02-19") is None
+            )
+            assert worker_b.get("availability:1:2025-02-19") is None
+        finally:
+            worker_b.stop_listener()
+
+    def test_invalidate_tag_reaches_other_workers(self):
+        """
+        Test 3: invalidate_tag limpia también las copias en L1 de otros workers.
+        """
+        server = fakeredis.FakeServer()
+        worker_a = _make_worker(server)
+        worker_b = _make_worker(server)
+        worker_b.start_listener()
+        try:
+            worker_a.set("room:1", {"activa": True}, tags=["room:1"])
+            worker_b.get("room:1")  # copia en L1 sin tags
+
+            assert worker_a.invalidate_tag("room:1") == ["room:1"]
+            assert _wait_until(lambda: worker_b.l1.get("room:1") is None)
+        finally:
+            worker_b.stop_listener()
+
+    def test_invalidation_during_load_skips_l1(self):
+        """
+        Test 4: Un valor invalidado mientras se calcula no se guarda en L1.
+
+        Verifica:
+        - get_or_set devuelve el valor calculado
+        - Ni L2 ni L1 lo guardan, y la siguiente lectura vuelve a calcularlo
+        """
+        server = fakeredis.FakeServer()
+        worker = _make_worker(server)
+        key = "availability:1:2025-02-19"
+
+        def loader():
+            worker.delete(key)  # llega una reserva mientras se lee la BD
+            return {"freeSlots": [8, 9]}
+
+        assert worker.get_or_set(key, loader) == {"freeSlots": [8, 9]}
+        assert worker.l2.get(key) is None
+        assert worker.l1.get(key) is None
+        assert worker.get_or_set(key, lambda: {"freeSlots": [9]}) == {"freeSlots": [9]}
+
+    def test_listener_resubscribes_after_redis_error(self, monkeypatch, caplog):
+        """
+        Test 5: Si se corta la conexión, el listener se vuelve a suscribir.
+
+        Verifica:
+        - El error se registra en el log y el hilo sigue vivo
+        - Al reconectar se vacía L1 (pudo perder invalidaciones)
+        - Las invalidaciones posteriores vuelven a llegar
+        """
+        import redis
+
+        monkeypatch.setattr(TieredCacheService, "RECONNECT_DELAY", 0.01)
+        server = fakeredis.FakeServer()
+        worker_a = _make_worker(server)
+        worker_b = _make_worker(server)
+
+        subscribe = worker_b._subscribe
+        broken = []
+
+        def flaky_subscribe():
+            pubsub = subscribe()
+            if not broken:
+                broken.append(pubsub)
+
+                def get_message(timeout=None):
+                    raise redis.ConnectionError("Connection reset by peer")
+
+                pubsub.get_message = get_message
+            return pubsub
+
+        monkeypatch.setattr(worker_b, "_subscribe", flaky_subscribe)
+        worker_b.l1.set("stale", {"freeSlots": [8]})
+        worker_b.start_listener()
+        try:
+            assert _wait_until(lambda: worker_b.l1.get("stale") is None)
+            assert "Error escuchando invalidaciones" in caplog.text
+
+            worker_a.set("room:1", {"activa": True})
+            worker_b.get("room:1")
+            worker_a.delete("room:1")
+            assert _wait_until(lambda: worker_b.l1.get("room:1") is None)
+            assert worker_b._listener.is_alive()
+        finally:
+            worker_b.stop_listener()
+
+    def test_concurrent_read_cannot_refill_deleted_key(self, monkeypatch):
+        """
+        Test 6: Una lectura concurrente con un borrado no deja el valor en L1.
+
+        Verifica:
+        - Un lector que llega mientras se borra L2 no copia a L1 el valor viejo
+        - Un lector que leyó L2 antes del borrado no lo guarda en L1 después
+          (incluidas las entradas de caché negativo `missing:*`)
+        """
+        server = fakeredis.FakeServer()
+        worker = _make_worker(server)
+        key = "availability:1:2025-02-19"
+        worker.set(key, {"freeSlots": [8]})
+        worker.l1.delete(key)  # L1 vacío: la próxima lectura va a L2
+
+        l2_delete = worker.l2.delete
+
+        def delete_with_reader(deleted_key):
+            worker.get(deleted_key)  # otro hilo lee justo antes del borrado
+            return l2_delete(deleted_key)
+
+        monkeypatch.setattr(worker.l2, "delete", delete_with_reader)
+        worker.delete(key)
+
+        assert worker.l1.get(key) is None
+        assert worker.get(key) is None
+
+        missing_key = "missing:room:5"
+        worker.set(missing_key, True, tags=["room:5"])
+        worker.l1.delete(missing_key)
+        l2_get = worker.l2.get
+
+        def get_then_invalidate(read_key):
+            value = l2_get(read_key)
+            worker.invalidate_tag("room:5")  # se crea la sala tras leer L2
+            return value
+
+        monkeypatch.setattr(worker.l2, "get", get_then_invalidate)
+        assert worker.get(missing_key) is True
+        monkeypatch.setattr(worker.l2, "get", l2_get)
+
+        assert worker.l1.get(missing_key) is None
+        assert worker.get(missing_key) is None
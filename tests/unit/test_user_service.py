@@ -68,3 +68,24 @@ class TestUserService:
             service.get_user_by_id(999)
 
         assert "No se encontró el usuario con ID 999" in str(exc_info.value)
+
+    def test_missing_user_is_negatively_cached(self, test_db, captured_statements):
+        """
+        Test 5: Un ID inexistente se recuerda hasta que se crea el usuario.
+
+        Verifica:
+        - La segunda búsqueda de un ID inexistente no consulta la BD
+        - Al crear el usuario con ese ID se invalida el caché negativo
+        """
+        service = UserService(test_db)
+
+        with captured_statements(select_only=True) as statements:
+            for _ in range(3):
+                with pytest.raises(ValueError):
+                    service.get_user_by_id(1)
+
+        assert len(statements) == 1
+
+        user = service.create_user(nombre="Ana", email="ana@example.com")
+        assert user.id == 1
+        assert service.get_user_by_id(1).email == "ana@example.com"